@@ -0,0 +1,7 @@
+"""Benchmarks of cogite commands.
+
+Each command is run end to end (from the start of the interpreter to
+its exit) in a pseudo-terminal, in a synthetic Git repository, against
+a fake Git host that runs on the local machine. See
+``docs/contributing.rst`` for usage.
+"""
@@ -0,0 +1,79 @@
+import argparse
+import dataclasses
+import json
+import pathlib
+import sys
+
+from . import results
+from . import runner
+from . import scenarios
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time cogite commands end to end, against a fake Git host.",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    run = subparsers.add_parser("run", help="Run benchmarks.")
+    defaults = runner.Settings()
+    for field in dataclasses.fields(runner.Settings):
+        run.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=field.type if isinstance(field.type, type) else type(field.default),
+            default=getattr(defaults, field.name),
+            help=f"(default: {getattr(defaults, field.name)})",
+        )
+    run.add_argument(
+        "--only",
+        action="append",
+        choices=[scenario.name for scenario in scenarios.get_scenarios()],
+        metavar="NAME",
+        help="Run only this benchmark. May be given multiple times.",
+    )
+    run.add_argument("-o", "--output", type=pathlib.Path, help="Write results to this JSON file.")
+
+    compare = subparsers.add_parser("compare", help="Compare two JSON results.")
+    compare.add_argument("old", type=pathlib.Path)
+    compare.add_argument("new", type=pathlib.Path)
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Report benchmarks that are slower by more than this ratio (default: 0.1).",
+    )
+
+    subparsers.add_parser("list", help="List benchmarks.")
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    if args.action == "list":
+        for scenario in scenarios.get_scenarios():
+            print(scenario.name)
+    elif args.action == "run":
+        settings = runner.Settings(**{
+            field.name: getattr(args, field.name) for field in dataclasses.fields(runner.Settings)
+        })
+        log = lambda message: print(message, file=sys.stderr)
+        try:
+            durations = runner.run(settings, names=args.only, log=log)
+        except runner.BenchmarkError as exc:
+            sys.exit(f"Error: {exc}")
+        report = results.make_report(durations, settings)
+        if args.output:
+            args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(results.format_report(report))
+    else:  # compare
+        table, regressions = results.compare(
+            results.load(args.old), results.load(args.new), args.threshold,
+        )
+        print(table)
+        if regressions:
+            sys.exit(f"\n{len(regressions)} benchmark(s) are slower: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
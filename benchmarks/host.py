@@ -0,0 +1,397 @@
+"""A fake GitHub GraphQL API, backed by an in-memory model.
+
+It answers the GraphQL documents of ``cogite/backends/graphql/github``
+(identified by their operation name, not by parsing them), with
+responses that have the same shape as those of GitHub.
+"""
+
+import dataclasses
+import datetime
+import json
+import random
+import re
+import time
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+OPERATION_REGEXP = re.compile(r"\s*(query|mutation)\s+(?P<name>\w+)")
+
+
+@dataclasses.dataclass
+class User:
+    id: str
+    login: str
+    name: str
+
+
+@dataclasses.dataclass
+class PullRequest:
+    id: str
+    number: int
+    head: str
+    base: str
+    title: str = ""
+    body: str = ""
+    draft: bool = False
+    head_sha: str = "0" * 40
+    requested_reviewers: List[str] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class HostSettings:
+    owner: str = "Polyconseil"
+    repository: str = "cogite"
+    n_collaborators: int = 50
+    # Check runs are spread over check suites.
+    n_checks: int = 5
+    n_check_suites: int = 1
+    # Number of collaborators who have approved each pull request.
+    n_reviews: int = 0
+    # Number of status requests for which checks are still pending.
+    pending_polls: int = 0
+    # Branches that already have an open pull request.
+    open_pull_requests: Tuple[str, ...] = ()
+    base_branch: str = "master"
+    # Latency of each request, in seconds, with a random jitter
+    # between -jitter and +jitter.
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Ratio of requests that fail with a "502 Bad Gateway" error.
+    error_rate: float = 0.0
+    # Number of requests that are allowed in each window of
+    # `rate_limit_window` seconds (0 for no limit). Past that, requests
+    # get the same response as GitHub's when the rate limit is
+    # exceeded.
+    rate_limit: int = 0
+    rate_limit_window: float = 3600.0
+    seed: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(dataclasses.asdict(self))
+
+    @classmethod
+    def from_json(cls, text: str) -> "HostSettings":
+        values = json.loads(text)
+        values["open_pull_requests"] = tuple(values.get("open_pull_requests", ()))
+        return cls(**values)
+
+
+def _paginate(nodes: List[dict], start: int, page_size: int) -> dict:
+    """Return a page of a GraphQL connection. Cursors are offsets."""
+    end = start + page_size
+    has_next_page = end < len(nodes)
+    return {
+        "nodes": nodes[start:end],
+        "pageInfo": {"hasNextPage": has_next_page, "endCursor": str(end) if has_next_page else None},
+        "totalCount": len(nodes),
+    }
+
+
+class FakeGitHost:
+    def __init__(self, settings: Optional[HostSettings] = None):
+        self.settings = settings or HostSettings()
+        self.random = random.Random(self.settings.seed)
+        self.repository_id = "R_fake"
+        self.users = [
+            User(id=f"U_{i:05}", login=f"user{i:05}", name=f"User {i}")
+            for i in range(self.settings.n_collaborators)
+        ]
+        self.pull_requests: Dict[str, PullRequest] = {}
+        for branch in self.settings.open_pull_requests:
+            self._add_pull_request(branch, self.settings.base_branch)
+        self.status_requests = 0
+        self.pending = False
+        self.rate_limit_remaining = self.settings.rate_limit
+        self.rate_limit_reset_at = time.time() + self.settings.rate_limit_window
+        self.handlers: Dict[str, Callable[[dict], dict]] = {
+            "createPullRequest": self._create_pull_request,
+            "markAsReady": self._mark_as_ready,
+            "pullRequest": self._pull_request,
+            "checkRuns": self._check_runs_page,
+            "checkSuites": self._check_suites_page,
+            "pullRequestStatus": self._pull_request_status,
+            "pullRequestStatusSummary": self._pull_request_status_summary,
+            "pullRequestWithStatus": self._pull_request_with_status,
+            "repository": self._repository,
+            "repositoryContributors": self._repository_contributors,
+            "requestReviews": self._request_reviews,
+            "reviewRequests": self._review_requests_page,
+            "reviews": self._reviews_page,
+            "searchCollaborators": self._search_collaborators,
+        }
+
+    def wait(self):
+        """Sleep as long as the configured latency."""
+        delay = self.settings.latency
+        if self.settings.jitter:
+            delay += self.random.uniform(-self.settings.jitter, self.settings.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def should_fail(self) -> bool:
+        """Return whether the current request should fail, depending
+        on the configured error rate.
+        """
+        return self.random.random() < self.settings.error_rate
+
+    def consume_rate_limit(self) -> bool:
+        """Count a request against the rate limit and return whether
+        it is allowed.
+        """
+        if not self.settings.rate_limit:
+            return True
+        now = time.time()
+        if now >= self.rate_limit_reset_at:
+            self.rate_limit_remaining = self.settings.rate_limit
+            self.rate_limit_reset_at = now + self.settings.rate_limit_window
+        if self.rate_limit_remaining <= 0:
+            return False
+        self.rate_limit_remaining -= 1
+        return True
+
+    def get_rate_limit_headers(self) -> Dict[str, str]:
+        if not self.settings.rate_limit:
+            return {}
+        return {
+            "X-RateLimit-Limit": str(self.settings.rate_limit),
+            "X-RateLimit-Remaining": str(self.rate_limit_remaining),
+            "X-RateLimit-Reset": str(int(self.rate_limit_reset_at)),
+        }
+
+    def handle(self, payload: dict) -> dict:
+        """Return the response to a GraphQL request."""
+        query = payload.get("query", "")
+        match = OPERATION_REGEXP.match(query)
+        handler = self.handlers.get(match.group("name")) if match else None
+        if handler is None:
+            return {"errors": [{"message": "Unknown operation"}]}
+        data = handler(payload.get("variables") or {})
+        if "rateLimit" in query:
+            data["rateLimit"] = self._rate_limit()
+        return {"data": data}
+
+    # Model
+
+    def _add_pull_request(self, head: str, base: str, **kwargs) -> PullRequest:
+        number = len(self.pull_requests) + 1
+        pr = PullRequest(id=f"PR_{number}", number=number, head=head, base=base, **kwargs)
+        self.pull_requests[head] = pr
+        return pr
+
+    def _get_pull_request_by_id(self, pr_id: str) -> Optional[PullRequest]:
+        for pr in self.pull_requests.values():
+            if pr.id == pr_id:
+                return pr
+        return None
+
+    def _get_pull_request_by_commit_id(self, commit_id: str) -> Optional[PullRequest]:
+        for pr in self.pull_requests.values():
+            if self._commit_id(pr) == commit_id:
+                return pr
+        return None
+
+    def _commit_id(self, pr: PullRequest) -> str:
+        return f"C_{pr.number}"
+
+    def _permalink(self, pr: PullRequest) -> str:
+        return f"https://github.com/{self.settings.owner}/{self.settings.repository}/pull/{pr.number}"
+
+    # Responses
+
+    def _rate_limit(self) -> Optional[dict]:
+        if not self.settings.rate_limit:
+            # Unlimited. GitHub always returns this block, but that
+            # would slow down polling.
+            return None
+        reset_at = datetime.datetime.fromtimestamp(self.rate_limit_reset_at, datetime.timezone.utc)
+        return {
+            "cost": 1,
+            "remaining": self.rate_limit_remaining,
+            "resetAt": reset_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+    def _repository(self, variables: dict) -> dict:
+        return {"repository": {"deleteBranchOnMerge": False, "id": self.repository_id}}
+
+    def _pull_request_node(self, pr: PullRequest) -> dict:
+        return {
+            "baseRefName": pr.base,
+            "id": pr.id,
+            "number": pr.number,
+            "permalink": self._permalink(pr),
+        }
+
+    def _pull_requests(self, variables: dict, with_status: bool) -> dict:
+        pr = self.pull_requests.get(variables.get("headRefName", ""))
+        nodes = []
+        if pr:
+            node = self._pull_request_node(pr)
+            if with_status:
+                node.update(self._status_node(pr))
+            nodes.append(node)
+        return {
+            "nodes": nodes,
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "totalCount": len(nodes),
+        }
+
+    def _pull_request(self, variables: dict) -> dict:
+        return {"repository": {"pullRequests": self._pull_requests(variables, with_status=False)}}
+
+    def _pull_request_with_status(self, variables: dict) -> dict:
+        repository = self._repository(variables)["repository"]
+        repository["pullRequests"] = self._pull_requests(variables, with_status=True)
+        return {"repository": repository}
+
+    def _pull_request_status(self, variables: dict) -> dict:
+        pr = self._get_pull_request_by_id(variables.get("pullRequestId", ""))
+        return {"node": self._status_node(pr) if pr else None}
+
+    def _pull_request_status_summary(self, variables: dict) -> dict:
+        pr = self._get_pull_request_by_id(variables.get("pullRequestId", ""))
+        if not pr:
+            return {"node": None}
+        node = self._status_node(pr)
+        del node["commits"]["nodes"][0]["commit"]["checkSuites"]
+        del node["commits"]["nodes"][0]["commit"]["status"]
+        del node["reviewRequests"]["nodes"]
+        del node["reviews"]["nodes"]
+        return {"node": node}
+
+    def _check_runs(self, suite: int) -> List[dict]:
+        return [
+            {
+                "conclusion": None if self.pending else "SUCCESS",
+                "name": f"check-{i}",
+                "permalink": f"https://ci.example.com/runs/{i}",
+                "status": "IN_PROGRESS" if self.pending else "COMPLETED",
+                "startedAt": "2021-01-01T00:00:00Z",
+                "completedAt": None if self.pending else "2021-01-01T00:05:00Z",
+            }
+            for i in range(suite, self.settings.n_checks, self.settings.n_check_suites)
+        ]
+
+    def _check_runs_page(self, variables: dict) -> dict:
+        # Check suite ids look like "CS_<pull request number>_<suite>".
+        suite = int(variables.get("checkSuiteId", "").rsplit("_", 1)[-1] or 0)
+        start = int(variables.get("cursor") or 0)
+        return {"node": {"checkRuns": _paginate(self._check_runs(suite), start, 100)}}
+
+    def _check_suites(self, pr: PullRequest) -> List[dict]:
+        return [
+            {"id": f"CS_{pr.number}_{suite}", "checkRuns": _paginate(self._check_runs(suite), 0, 50)}
+            for suite in range(self.settings.n_check_suites)
+        ]
+
+    def _check_suites_page(self, variables: dict) -> dict:
+        pr = self._get_pull_request_by_commit_id(variables.get("commitId", ""))
+        if not pr:
+            return {"node": None}
+        start = int(variables.get("cursor") or 0)
+        return {"node": {"checkSuites": _paginate(self._check_suites(pr), start, 50)}}
+
+    def _review_requests_page(self, variables: dict) -> dict:
+        pr = self._get_pull_request_by_id(variables.get("pullRequestId", ""))
+        if not pr:
+            return {"node": None}
+        start = int(variables.get("cursor") or 0)
+        return {"node": {"reviewRequests": _paginate(self._review_requests(pr), start, 100)}}
+
+    def _review_requests(self, pr: PullRequest) -> List[dict]:
+        return [{"requestedReviewer": {"login": login}} for login in pr.requested_reviewers]
+
+    def _reviews_page(self, variables: dict) -> dict:
+        pr = self._get_pull_request_by_id(variables.get("pullRequestId", ""))
+        if not pr:
+            return {"node": None}
+        start = int(variables.get("cursor") or 0)
+        return {"node": {"reviews": _paginate(self._reviews(), start, 100)}}
+
+    def _reviews(self) -> List[dict]:
+        return [
+            {"author": {"login": user.login}, "state": "APPROVED"}
+            for user in self.users[:self.settings.n_reviews]
+        ]
+
+    def _status_node(self, pr: PullRequest) -> dict:
+        self.status_requests += 1
+        self.pending = self.status_requests <= self.settings.pending_polls
+        run_state = "IN_PROGRESS" if self.pending else "SUCCESS"
+        return {
+            "commits": {
+                "nodes": [{
+                    "commit": {
+                        "id": self._commit_id(pr),
+                        "oid": pr.head_sha,
+                        "checkSuites": _paginate(self._check_suites(pr), 0, 50),
+                        "statusCheckRollup": {
+                            "state": "PENDING" if self.pending else "SUCCESS",
+                            "contexts": {
+                                "checkRunCountsByState": [
+                                    {"count": self.settings.n_checks, "state": run_state},
+                                ],
+                                "statusContextCountsByState": [],
+                                "totalCount": self.settings.n_checks,
+                            },
+                        },
+                        "status": None,
+                    },
+                }],
+            },
+            "reviewRequests": _paginate(self._review_requests(pr), 0, 20),
+            "reviews": _paginate(self._reviews(), 0, 20),
+        }
+
+    def _repository_contributors(self, variables: dict) -> dict:
+        start = int(variables.get("paginationCursor") or 0)
+        users = [dataclasses.asdict(user) for user in self.users]
+        return {"repository": {"collaborators": _paginate(users, start, 100)}}
+
+    def _search_collaborators(self, variables: dict) -> dict:
+        query = variables.get("query", "").lower()
+        first = variables.get("first", 10)
+        matching = [
+            user for user in self.users
+            if query in user.login.lower() or query in user.name.lower()
+        ]
+        return {
+            "repository": {
+                "collaborators": {
+                    "nodes": [dataclasses.asdict(user) for user in matching[:first]],
+                    "pageInfo": {"hasNextPage": len(matching) > first},
+                },
+            },
+        }
+
+    def _create_pull_request(self, variables: dict) -> dict:
+        pr = self._add_pull_request(
+            variables["headRefName"],
+            variables["baseRefName"],
+            title=variables.get("title", ""),
+            body=variables.get("body", ""),
+            draft=variables.get("draft", False),
+        )
+        return {
+            "createPullRequest": {
+                "pullRequest": {"id": pr.id, "number": pr.number, "permalink": self._permalink(pr)},
+            },
+        }
+
+    def _mark_as_ready(self, variables: dict) -> dict:
+        pr = self._get_pull_request_by_id(variables.get("pullRequestId", ""))
+        if pr:
+            pr.draft = False
+        return {"markPullRequestReadyForReview": {"clientMutationId": None}}
+
+    def _request_reviews(self, variables: dict) -> dict:
+        pr = self._get_pull_request_by_id(variables.get("pullRequestId", ""))
+        logins = {user.id: user.login for user in self.users}
+        if pr:
+            for user_id in variables.get("userIds") or ():
+                if user_id in logins and logins[user_id] not in pr.requested_reviewers:
+                    pr.requested_reviewers.append(logins[user_id])
+        return {"requestReviews": {"clientMutationId": None}}
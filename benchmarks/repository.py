@@ -0,0 +1,128 @@
+"""Create synthetic Git repositories of configurable size."""
+
+import dataclasses
+import os
+import pathlib
+import shutil
+import subprocess
+from typing import Dict
+
+
+# The URL of the remote, as seen by cogite. Git itself is told to use
+# a local bare repository instead (see `Repository.get_git_env()`).
+REMOTE_URL = "git@github.com:Polyconseil/cogite.git"
+BASE_BRANCH = "master"
+FEATURE_BRANCH = "feature"
+IDENTITY = {
+    "GIT_AUTHOR_NAME": "Jane Doe",
+    "GIT_AUTHOR_EMAIL": "jdoe@example.com",
+    "GIT_COMMITTER_NAME": "Jane Doe",
+    "GIT_COMMITTER_EMAIL": "jdoe@example.com",
+}
+
+
+@dataclasses.dataclass
+class Repository:
+    root: pathlib.Path
+
+    @property
+    def work_dir(self) -> pathlib.Path:
+        return self.root / "work"
+
+    @property
+    def remote_dir(self) -> pathlib.Path:
+        return self.root / "remote.git"
+
+    def get_git_env(self) -> Dict[str, str]:
+        env = {
+            "GIT_CONFIG_NOSYSTEM": "1",
+            # Rewrite the GitHub URL to the local remote. This is done
+            # through the environment, so that cogite (which reads
+            # `.git/config` itself) still sees the GitHub URL.
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": f"url.{self.remote_dir}.insteadOf",
+            "GIT_CONFIG_VALUE_0": REMOTE_URL,
+        }
+        env.update(IDENTITY)
+        return env
+
+    def git(self, *args: str) -> str:
+        result = subprocess.run(
+            ("git",) + args,
+            cwd=self.work_dir,
+            env={**os.environ, **self.get_git_env()},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        return result.stdout.decode("utf-8").strip()
+
+    def copy(self, destination: pathlib.Path) -> "Repository":
+        shutil.copytree(self.root, destination, symlinks=True)
+        return Repository(destination)
+
+    def push_feature_branch(self):
+        self.git("push", "--quiet", "--set-upstream", "origin", FEATURE_BRANCH)
+
+
+def _fast_import_commits(branch: str, n_commits: int, n_files: int, start: int, parent: str):
+    """Yield `git fast-import` commands that create ``n_commits``
+    commits on ``branch``, each of which modifies one of ``n_files``
+    files.
+    """
+    for i in range(start, start + n_commits):
+        message = f"Commit {i}\n\nThis commit changes file-{i % n_files}.txt.\n"
+        content = f"Content of file {i % n_files}, version {i}\n"
+        yield f"commit refs/heads/{branch}"
+        yield f"committer Jane Doe <jdoe@example.com> {1600000000 + i} +0000"
+        yield f"data {len(message.encode())}"
+        yield message
+        if i == start and parent:
+            yield f"from {parent}"
+        yield f"M 644 inline file-{i % n_files}.txt"
+        yield f"data {len(content.encode())}"
+        yield content
+
+
+def create(
+    root: pathlib.Path,
+    n_commits: int = 1000,
+    n_files: int = 100,
+    n_feature_commits: int = 1,
+) -> Repository:
+    """Create a repository with ``n_commits`` commits on the base
+    branch and ``n_feature_commits`` commits on the feature branch,
+    which is checked out and not pushed.
+    """
+    repository = Repository(root)
+    root.mkdir(parents=True)
+    env = {**os.environ, **repository.get_git_env()}
+    subprocess.run(
+        ["git", "init", "--quiet", "--bare", str(repository.remote_dir)], env=env, check=True,
+    )
+    subprocess.run(
+        ["git", "init", "--quiet", "--initial-branch", BASE_BRANCH, str(repository.work_dir)],
+        env=env,
+        check=True,
+    )
+    commands = list(_fast_import_commits(BASE_BRANCH, n_commits, n_files, start=0, parent=""))
+    commands += _fast_import_commits(
+        FEATURE_BRANCH,
+        n_feature_commits,
+        n_files,
+        start=n_commits,
+        parent=f"refs/heads/{BASE_BRANCH}",
+    )
+    subprocess.run(
+        ["git", "fast-import", "--quiet"],
+        input="\n".join(commands).encode("utf-8") + b"\n",
+        cwd=repository.work_dir,
+        env=env,
+        check=True,
+    )
+    repository.git("remote", "add", "origin", REMOTE_URL)
+    repository.git("checkout", "--quiet", "--force", BASE_BRANCH)
+    repository.git("push", "--quiet", "--set-upstream", "origin", BASE_BRANCH)
+    repository.git("checkout", "--quiet", FEATURE_BRANCH)
+    repository.git("gc", "--quiet")
+    return repository
@@ -0,0 +1,101 @@
+"""Store, show and compare results of benchmarks."""
+
+import dataclasses
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+FORMAT_VERSION = 1
+
+
+def _get_git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=pathlib.Path(__file__).parent,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.decode("utf-8").strip()
+
+
+def summarize(durations: List[float]) -> Dict:
+    return {
+        "durations": durations,
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.mean(durations),
+        "stdev": statistics.stdev(durations) if len(durations) > 1 else 0.0,
+    }
+
+
+def make_report(results: Dict[str, List[float]], settings) -> Dict:
+    return {
+        "version": FORMAT_VERSION,
+        "metadata": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "revision": _get_git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": dataclasses.asdict(settings),
+        },
+        "benchmarks": {name: summarize(durations) for name, durations in results.items()},
+    }
+
+
+def load(path: pathlib.Path) -> Dict:
+    report = json.loads(path.read_text())
+    if report.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported format version {report.get('version')}")
+    return report
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{'benchmark':<20} {'median':>10} {'min':>10} {'stdev':>10}"]
+    for name, stats in sorted(report["benchmarks"].items()):
+        lines.append(
+            f"{name:<20} {stats['median'] * 1000:>8.1f}ms {stats['min'] * 1000:>8.1f}ms "
+            f"{stats['stdev'] * 1000:>8.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> Tuple[str, List[str]]:
+    """Compare median durations of two reports.
+
+    Return a table and the names of benchmarks that are slower by more
+    than ``threshold`` (e.g. 0.1 for 10%).
+    """
+    lines = [f"{'benchmark':<20} {'old':>10} {'new':>10} {'change':>8}"]
+    regressions = []
+    for name in sorted(set(old["benchmarks"]) | set(new["benchmarks"])):
+        if name not in old["benchmarks"] or name not in new["benchmarks"]:
+            lines.append(f"{name:<20} (only in one report)")
+            continue
+        before = old["benchmarks"][name]["median"]
+        after = new["benchmarks"][name]["median"]
+        change = (after - before) / before if before else 0.0
+        marker = ""
+        if change > threshold:
+            regressions.append(name)
+            marker = "  slower"
+        elif change < -threshold:
+            marker = "  faster"
+        lines.append(
+            f"{name:<20} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {change:>+7.1%}{marker}"
+        )
+    if old["metadata"]["settings"] != new["metadata"]["settings"]:
+        lines.append("")
+        lines.append("Warning: reports have been produced with different settings.")
+    return "\n".join(lines), regressions
@@ -0,0 +1,226 @@
+"""Run each scenario end to end, in a pseudo-terminal, and time it."""
+
+import dataclasses
+import fcntl
+import os
+import pathlib
+import pty
+import re
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import termios
+import time
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from . import host
+from . import repository
+from . import scenarios
+from . import server
+
+
+TERMINAL_SIZE = (50, 200)  # rows, columns
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class Settings:
+    repeat: int = 5
+    warmup: int = 1
+    n_commits: int = 1000
+    n_files: int = 100
+    n_collaborators: int = 500
+    n_checks: int = 20
+    n_check_suites: int = 1
+    n_reviews: int = 0
+    latency: float = 0.05  # seconds
+    jitter: float = 0.0  # seconds
+    poll_iterations: int = 5
+    timeout: float = 60.0  # seconds, for each run
+
+
+def _slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def _write_user_files(home: pathlib.Path, api_url: str):
+    config_dir = home / ".config" / "cogite"
+    (config_dir / "auth").mkdir(parents=True)
+    (config_dir / "auth" / "github.com").write_text("token")
+    (config_dir / "config.toml").write_text(
+        "\n".join((
+            f'host-api-url = "{api_url}"',
+            f'master-branch = "{repository.BASE_BRANCH}"',
+            'ci-platform = "github"',
+            "status-poll-frequency = 0",
+        ))
+    )
+
+
+def _get_env(home: pathlib.Path, repo: repository.Repository) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(repo.get_git_env())
+    env.update({
+        "HOME": str(home),
+        "XDG_CONFIG_HOME": str(home / ".config"),
+        "XDG_CACHE_HOME": str(home / ".cache"),
+        "TERM": "xterm-256color",
+        # Do not open anything.
+        "BROWSER": "true",
+        "EDITOR": "true",
+        "GIT_EDITOR": "true",
+        # We do not answer cursor position requests.
+        "PROMPT_TOOLKIT_NO_CPR": "1",
+    })
+    return env
+
+
+def run_command(
+    argv: List[str],
+    cwd: pathlib.Path,
+    env: Dict[str, str],
+    interactions: Iterable[Tuple[str, str]] = (),
+    timeout: float = 60.0,
+) -> float:
+    """Run cogite in a pseudo-terminal, answer its prompts and return
+    how long it took (in seconds).
+    """
+    master, slave = pty.openpty()
+    fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack("HHHH", *TERMINAL_SIZE, 0, 0))
+    pending = list(interactions)
+    output = bytearray()
+    position = 0
+    start = time.perf_counter()
+    with subprocess.Popen(
+        [sys.executable, "-m", "cogite.cli", *argv],
+        stdin=slave,
+        stdout=slave,
+        stderr=slave,
+        cwd=cwd,
+        env=env,
+        start_new_session=True,
+    ) as process:
+        os.close(slave)
+        try:
+            while True:
+                remaining = start + timeout - time.perf_counter()
+                if remaining <= 0:
+                    process.kill()
+                    raise BenchmarkError(f"`cogite {' '.join(argv)}` timed out:\n{_tail(output)}")
+                ready, _, _ = select.select([master], [], [], min(remaining, 0.1))
+                if not ready:
+                    if process.poll() is not None:
+                        break
+                    continue
+                try:
+                    chunk = os.read(master, 64 * 1024)
+                except OSError:  # the other end has been closed
+                    chunk = b""
+                if not chunk:
+                    break
+                output += chunk
+                while pending:
+                    expected, answer = pending[0]
+                    idx = output.find(expected.encode("utf-8"), position)
+                    if idx == -1:
+                        break
+                    position = idx + len(expected)
+                    os.write(master, answer.encode("utf-8"))
+                    pending.pop(0)
+            returncode = process.wait()
+            elapsed = time.perf_counter() - start
+        finally:
+            os.close(master)
+    if returncode != 0 or pending:
+        raise BenchmarkError(
+            f"`cogite {' '.join(argv)}` failed (return code: {returncode}):\n{_tail(output)}"
+        )
+    return elapsed
+
+
+def _tail(output: Union[bytes, bytearray], n_lines: int = 20) -> str:
+    return "\n".join(output.decode("utf-8", errors="replace").splitlines()[-n_lines:])
+
+
+def run_scenario(
+    scenario: scenarios.Scenario,
+    template: repository.Repository,
+    settings: Settings,
+    work_dir: pathlib.Path,
+) -> List[float]:
+    slug = _slugify(scenario.name)
+    # The home directory (and hence cogite's caches) and the server
+    # are shared by all runs of the scenario, as they would be for a
+    # user who runs the same command again and again.
+    home = work_dir / f"home-{slug}"
+    host_settings = host.HostSettings(
+        n_collaborators=settings.n_collaborators,
+        n_checks=settings.n_checks,
+        n_check_suites=settings.n_check_suites,
+        n_reviews=settings.n_reviews,
+        latency=settings.latency,
+        jitter=settings.jitter,
+        open_pull_requests=scenarios.get_open_pull_requests(scenario),
+        **scenario.host,
+    )
+    fake_server = server.start(host.FakeGitHost(host_settings))
+    try:
+        _write_user_files(home, fake_server.url)
+        durations = []
+        for i in range(settings.warmup + settings.repeat):
+            repo = template.copy(work_dir / f"{slug}-{i}")
+            if scenario.pushed:
+                repo.push_feature_branch()
+            # Each run starts with a fresh model.
+            fake_server.fake_host = host.FakeGitHost(host_settings)
+            duration = run_command(
+                scenario.argv,
+                cwd=repo.work_dir,
+                env=_get_env(home, repo),
+                interactions=scenario.interactions,
+                timeout=settings.timeout,
+            )
+            if i >= settings.warmup:
+                durations.append(duration)
+            shutil.rmtree(repo.root)
+    finally:
+        fake_server.shutdown()
+        fake_server.server_close()
+    return durations
+
+
+def run(
+    settings: Settings,
+    names: Optional[Iterable[str]] = None,
+    log: Callable[[str], None] = print,
+) -> Dict[str, List[float]]:
+    """Run the scenarios (all of them or those in ``names``) and
+    return the duration of each run, by scenario.
+    """
+    selected = [
+        scenario for scenario in scenarios.get_scenarios(settings.poll_iterations)
+        if not names or scenario.name in names
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="cogite-benchmarks-") as tmp:
+        work_dir = pathlib.Path(tmp)
+        log(f"Creating repository with {settings.n_commits} commits...")
+        template = repository.create(
+            work_dir / "template", n_commits=settings.n_commits, n_files=settings.n_files,
+        )
+        for scenario in selected:
+            log(f"Running `cogite {' '.join(scenario.argv)}`...")
+            results[scenario.name] = run_scenario(scenario, template, settings, work_dir)
+    return results
@@ -0,0 +1,79 @@
+"""The commands that are benchmarked."""
+
+import dataclasses
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from . import repository
+
+
+# Answer to the prompt for reviewers (a user of the fake host).
+REVIEWER = "user00001 (User 1) \r"
+
+
+@dataclasses.dataclass
+class Scenario:
+    name: str
+    argv: List[str]
+    # Each interaction is a text to wait for in the output and the
+    # keys to type when it appears.
+    interactions: List[Tuple[str, str]] = dataclasses.field(default_factory=list)
+    # Whether the feature branch has been pushed and has an open pull
+    # request before the command is run.
+    pushed: bool = True
+    # Overrides of `host.HostSettings`.
+    host: Dict = dataclasses.field(default_factory=dict)
+
+
+def get_scenarios(poll_iterations: int = 5) -> List[Scenario]:
+    return [
+        Scenario(
+            name="auth add",
+            argv=["auth", "add"],  # a token already exists: nothing to do
+        ),
+        Scenario(
+            name="auth delete",
+            argv=["auth", "delete"],
+            interactions=[("Continue [y/N]?", "n\n")],
+        ),
+        Scenario(
+            name="ci browse",
+            argv=["ci", "browse"],
+        ),
+        Scenario(
+            name="pr add",
+            argv=["pr", "add"],
+            interactions=[("Continue [Y/e/n]?", "y\n"), ("Reviewers", REVIEWER)],
+            pushed=False,
+        ),
+        Scenario(
+            name="pr merge",
+            argv=["pr", "merge"],
+            interactions=[("Continue [y/N]?", "y\n")],
+        ),
+        Scenario(
+            name="pr rebase",
+            argv=["pr", "rebase"],
+        ),
+        Scenario(
+            name="pr reqreview",
+            argv=["pr", "reqreview"],
+            interactions=[("Reviewers", REVIEWER)],
+        ),
+        Scenario(
+            name="status",
+            argv=["status"],
+        ),
+        Scenario(
+            name="status --poll",
+            argv=["status", "--poll"],
+            # The first response is that of `status` itself, then
+            # cogite polls until checks are complete.
+            host={"pending_polls": poll_iterations},
+        ),
+    ]
+
+
+def get_open_pull_requests(scenario: Scenario) -> Tuple[str, ...]:
+    return (repository.FEATURE_BRANCH, ) if scenario.pushed else ()
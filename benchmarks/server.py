@@ -0,0 +1,163 @@
+"""Serve a fake Git host over HTTP, on the local machine.
+
+The server can be used by the benchmarks, by tests, or on its own::
+
+    $ python -m benchmarks.server --port 8000 --latency 0.1
+
+and then point cogite at it with the ``host-api-url`` option.
+"""
+
+import argparse
+import dataclasses
+import http.server
+import json
+import threading
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from . import host as host_module
+
+
+RATE_LIMITED_RESPONSE = {
+    "errors": [{
+        "type": "RATE_LIMITED",
+        "message": "API rate limit exceeded for user ID 1.",
+    }],
+}
+BAD_GATEWAY_CONTENT = b"<html><body><h1>502 Bad Gateway</h1></body></html>"
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    # Keep connections alive, like GitHub does.
+    protocol_version = "HTTP/1.1"
+    server: "Server"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.n_connections += 1
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/graphql":
+            self._send_json(404, {"message": "Not Found"})
+            return
+        fake_host = self.server.fake_host
+        fake_host.wait()
+        with self.server.lock:
+            self.server.n_requests += 1
+            if fake_host.should_fail():
+                self._send(502, BAD_GATEWAY_CONTENT, "text/html")
+                return
+            allowed = fake_host.consume_rate_limit()
+            headers = fake_host.get_rate_limit_headers()
+            response = fake_host.handle(payload) if allowed else RATE_LIMITED_RESPONSE
+        # Like GitHub, rate-limited GraphQL requests get a 200 response
+        # with errors.
+        self._send_json(200, response, headers)
+
+    def _send_json(self, status: int, content: dict, headers: Optional[Dict[str, str]] = None):
+        self._send(status, json.dumps(content).encode("utf-8"), "application/json", headers)
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        fake_host: host_module.FakeGitHost,
+        verbose: bool = False,
+    ):
+        super().__init__(address, Handler)
+        self.fake_host = fake_host
+        self.verbose = verbose
+        # The model is not thread-safe.
+        self.lock = threading.Lock()
+        self.n_connections = 0
+        self.n_requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode("ascii")
+        return f"http://{host}:{port}"
+
+
+def start(fake_host: host_module.FakeGitHost, address: Tuple[str, int] = ("127.0.0.1", 0)) -> Server:
+    """Start serving ``fake_host`` in a background thread. Call
+    ``shutdown()`` on the returned server to stop it.
+    """
+    server = Server(address, fake_host)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.server",
+        description="Serve a fake GitHub GraphQL API on the local machine.",
+    )
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    defaults = host_module.HostSettings()
+    for field in dataclasses.fields(host_module.HostSettings):
+        default = getattr(defaults, field.name)
+        if isinstance(default, tuple):
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                action="append",
+                default=[],
+                help="May be given multiple times.",
+            )
+        else:
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                type=type(default),
+                default=default,
+                help=f"(default: {default})",
+            )
+    return parser
+
+
+def main(argv=None):
+    args = vars(get_parser().parse_args(argv))
+    address = (args.pop("address"), args.pop("port"))
+    args["open_pull_requests"] = tuple(args["open_pull_requests"])
+    settings = host_module.HostSettings(**args)
+    server = Server(address, host_module.FakeGitHost(settings), verbose=True)
+    print(f"Serving fake Git host on {server.url}. Add this to your cogite configuration:")
+    print(f'    host-api-url = "{server.url}"')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
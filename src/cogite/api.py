@@ -1,4 +1,3 @@
-from . import backends
 from .config import Configuration
 from .context import Context
 
@@ -6,7 +5,8 @@ from .context import Context
 def get_client(configuration: Configuration, context: Context):
     backend = None
     if configuration.host_platform == 'github':
-        backend = backends.GitHubApiClient
+        from .backends import github
+        backend = github.GitHubApiClient
     if not backend:
         return None
     return backend(configuration, context)
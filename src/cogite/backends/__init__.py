@@ -1,3 +1,19 @@
-from .base import BaseClient
-from .github import GitHubApiClient
-from .github import GitHubOAuthDeviceFlowTokenGetter
+import importlib
+
+
+# Backends are imported lazily, i.e. only when they are used, to keep
+# the startup time of cogite low.
+_LAZY_ATTRIBUTES = {
+    'BaseClient': 'base',
+    'GitHubApiClient': 'github',
+    'GitHubOAuthDeviceFlowTokenGetter': 'github',
+}
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'") from None
+    module = importlib.import_module(f'.{module_name}', __name__)
+    return getattr(module, name)
@@ -1,14 +1,22 @@
 from typing import Iterable
+from typing import List
 from typing import Optional
+from typing import Tuple
 
 from cogite import models
 
 
 class BaseClient:
+    supports_collaborators_search = False
+
     def __init__(self, configuration, context):
         self.context = context
         self.configuration = configuration
 
+    @property
+    def repository(self) -> models.Repository:
+        raise NotImplementedError()
+
     def create_pull_request(
         self,
         *,
@@ -26,11 +34,35 @@ class BaseClient:
     def mark_pull_request_as_ready(self):
         raise NotImplementedError()
 
-    def get_collaborators(self) -> Iterable[models.User]:
+    def get_collaborators(self, refresh: bool = False) -> Iterable[models.User]:
+        raise NotImplementedError()
+
+    def search_collaborators(self, query: str, limit: int) -> Tuple[List[models.User], bool]:
+        """Return collaborators whose login or name match ``query``
+        (at most ``limit`` of them), and whether this list is complete.
+        """
         raise NotImplementedError()
 
     def request_reviews(self, users: Iterable[models.User]):
         raise NotImplementedError()
 
-    def get_pull_request_status(self) -> models.PullRequestStatus:
+    def get_pull_request_status(
+        self,
+        previous: Optional[models.PullRequestStatus] = None,
+    ) -> models.PullRequestStatus:
+        """Return the status of the pull request.
+
+        ``previous`` is the last known status, if any. Backends may
+        use it to avoid fetching the full status if nothing changed.
+        """
         raise NotImplementedError()
+
+    def get_pull_request_with_status(
+        self,
+    ) -> Tuple[Optional[models.PullRequest], Optional[models.PullRequestStatus]]:
+        # Backends may override this method if they can get both in
+        # a single request.
+        pull_request = self.get_pull_request()
+        if not pull_request:
+            return None, None
+        return pull_request, self.get_pull_request_status()
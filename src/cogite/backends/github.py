@@ -1,47 +1,105 @@
 import collections
 import dataclasses
+import datetime
+import functools
 import itertools
+import json
 import os
 import pathlib
 import pprint
+import threading
 import time
 from typing import Dict
 from typing import Iterable
 from typing import List
 from typing import Optional
-import urllib.error
+from typing import Tuple
 import urllib.parse
-import webbrowser
 
 from cogite import auth
 from cogite import cache
 from cogite import errors
 from cogite import interaction
 from cogite import models
-from cogite import requests
 from cogite import spinner
+from cogite import trace
 
 from . import base
 
 
 GRAPHQL_DIRECTORY = pathlib.Path(os.path.dirname(__file__)) / 'graphql' / 'github'
 
+
+# GraphQL documents are read on first use, not when this module is
+# imported, to keep the startup time of cogite low.
+@functools.lru_cache(maxsize=None)
 def get_graphql(stem):
     return (GRAPHQL_DIRECTORY / f"{stem}.graphql").read_text()
 
-QUERY_REPOSITORY = get_graphql('query_repository')
-QUERY_REPOSITORY_CONTRIBUTORS = get_graphql('query_repository_contributors')
-QUERY_PULL_REQUEST = get_graphql('query_pull_request')
-QUERY_PULL_REQUEST_STATUS = get_graphql('query_pull_request_status')
-MUTATION_CREATE_PULL_REQUEST = get_graphql('mutation_create_pull_request')
-MUTATION_MARK_AS_READY = get_graphql('mutation_mark_as_ready')
-MUTATION_REQUEST_REVIEWS = get_graphql('mutation_request_reviews')
 
 UNSET = object()
 
+# Repository settings rarely change, but they may.
+REPOSITORY_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+# A stale list of collaborators is still useful (and is refreshed in
+# the background, see `get_collaborators()`). But not forever: past
+# this age, it is refreshed before being returned.
+COLLABORATORS_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds
+# Maximum number of concurrent requests to fetch the pages of check
+# suites, check runs, etc. that do not fit in the first response.
+MAX_PAGINATION_WORKERS = 4
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    # `fromisoformat()` does not support the "Z" suffix before Python 3.11.
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _get_rate_limit(data: dict) -> Optional[models.RateLimit]:
+    info = data.get('rateLimit')
+    if not info:
+        return None
+    return models.RateLimit(
+        cost=info['cost'],
+        remaining=info['remaining'],
+        reset_at=_parse_datetime(info['resetAt']),
+    )
+
 
 def _get_pull_request_status(response: dict) -> models.PullRequestStatus:
-    pr_info = response['data']['node']
+    status = _get_pull_request_status_from_node(response['data']['node'])
+    status.rate_limit = _get_rate_limit(response['data'])
+    return status
+
+
+def _has_next_page(connection: Optional[dict]) -> bool:
+    return bool(connection and (connection.get('pageInfo') or {}).get('hasNextPage'))
+
+
+def _get_status_summary(pr_info: dict) -> Tuple[Optional[models.CommitState], Optional[str]]:
+    """Return the overall state of checks and a marker that changes
+    whenever a check or a review changes.
+    """
+    commit_info = pr_info['commits']['nodes'][0]['commit']
+    if 'statusCheckRollup' not in commit_info:  # not requested
+        return None, None
+    rollup = commit_info['statusCheckRollup']
+    state = _gh_commit_status_to_cogite_commit_state(rollup['state']) if rollup else None
+    marker = json.dumps(
+        [
+            commit_info['oid'],
+            rollup,
+            pr_info['reviewRequests'].get('totalCount'),
+            pr_info['reviews'].get('totalCount'),
+        ],
+        sort_keys=True,
+    )
+    return state, marker
+
+
+def _get_pull_request_status_from_node(pr_info: dict) -> models.PullRequestStatus:
     commit_info = pr_info['commits']['nodes'][0]['commit']
     status = models.PullRequestStatus(sha=commit_info['oid'])
 
@@ -65,6 +123,8 @@ def _get_pull_request_status(response: dict) -> models.PullRequestStatus:
                     run['status'], run['conclusion']
                 ),
                 url=run['permalink'],
+                started_at=_parse_datetime(run.get('startedAt')),
+                completed_at=_parse_datetime(run.get('completedAt')),
             )
             for run in itertools.chain.from_iterable(
                 suite_nodes['checkRuns'].get("nodes", [])
@@ -106,6 +166,7 @@ def _get_pull_request_status(response: dict) -> models.PullRequestStatus:
             models.PullRequestReview(author_login=login, state=state)
         )
     status.reviews.sort(key=lambda review: review.author_login)
+    status.state, status.marker = _get_status_summary(pr_info)
     # FIXME: we could remove the author's review (which will appear
     # if the author commented on their own pull request).
     return status
@@ -156,6 +217,8 @@ def _gh_review_state_to_cogite_review_state(github_state: str) -> models.ReviewS
 class GitHubApiClient(base.BaseClient):
     """A client for GitHub API v4 (GraphQL)."""
 
+    supports_collaborators_search = True
+
     def __init__(self, configuration, context):
         super().__init__(configuration, context)
         self.url = f'{configuration.host_api_url}/graphql'
@@ -165,20 +228,27 @@ class GitHubApiClient(base.BaseClient):
 
         # Set up caches here to make type checkers happy
         self._repository = UNSET
+        self._pull_request = UNSET
         self._session = UNSET
+        self._session_lock = threading.Lock()
+        self._collaborators_refresh: Optional[threading.Thread] = None
 
     @property
     def session(self):
-        if self._session != UNSET:
+        # The client may be used by multiple threads: make sure that
+        # they share the same session (and its pool of connections).
+        with self._session_lock:
+            if self._session != UNSET:
+                return self._session
+            auth_token = auth.get_token(self.context.host_domain)
+            if not auth_token:
+                raise errors.FatalError(
+                    f"No authentication token for {self.context.host_domain}. You must "
+                    f"first configure one with `cogite auth add`."
+                )
+            from cogite import requests
+            self._session = requests.Session(auth_token=auth_token)
             return self._session
-        auth_token = auth.get_token(self.context.host_domain)
-        if not auth_token:
-            raise errors.FatalError(
-                f"No authentication token for {self.context.host_domain}. You must "
-                f"first configure one with `cogite auth add`."
-            )
-        self._session = requests.Session(auth_token=auth_token)
-        return self._session
 
     def _post(self, query, variables=None):
         data = {'query': query, 'variables': variables or {}}
@@ -201,13 +271,11 @@ class GitHubApiClient(base.BaseClient):
         if cached is not cache.NOT_SET:
             self._repository = models.Repository(**cached)
             return self._repository
-        repository = self._get_repository_from_host()
-        cache.set(cache_key, dataclasses.asdict(repository))
-        self._repository = repository
-        return repository
+        self._set_repository(self._get_repository_from_host())
+        return self._repository
 
     def _get_repository_from_host(self) -> models.Repository:
-        query = QUERY_REPOSITORY
+        query = get_graphql('query_repository')
         variables = {
             'owner': self.owner,
             'repositoryName': self.repository_name,
@@ -219,15 +287,19 @@ class GitHubApiClient(base.BaseClient):
             host_autodeletes_branch_on_merge=repo_info['deleteBranchOnMerge'],
         )
 
+    def _set_repository(self, repository: models.Repository):
+        cache.set(self.context.remote_url, dataclasses.asdict(repository), ttl=REPOSITORY_CACHE_TTL)
+        self._repository = repository
+
     @property
     def pull_request(self):
-        if not hasattr(self, '_pull_request'):
+        if self._pull_request is UNSET:
             self._pull_request = self.get_pull_request()
         return self._pull_request
 
     def get_pull_request(self, branch: Optional[str] = None) -> Optional[models.PullRequest]:
         branch = branch or self.context.branch
-        query = QUERY_PULL_REQUEST
+        query = get_graphql('query_pull_request')
         variables = {
             'owner': self.owner,
             'repositoryName': self.repository_name,
@@ -251,6 +323,45 @@ class GitHubApiClient(base.BaseClient):
             url=pr_info['permalink'],
         )
 
+    def get_pull_request_with_status(self):
+        # Fetch the repository, the pull request and its status in a
+        # single request, instead of up to three sequential requests.
+        query = get_graphql('query_pull_request_with_status')
+        variables = {
+            'owner': self.owner,
+            'repositoryName': self.repository_name,
+            'headRefName': self.context.branch,
+        }
+        response = self._post(query, variables)
+        repo_info = response['data']['repository']
+        self._set_repository(
+            models.Repository(
+                id=repo_info['id'],
+                host_autodeletes_branch_on_merge=repo_info['deleteBranchOnMerge'],
+            )
+        )
+        data = repo_info['pullRequests']
+        if data['totalCount'] == 0:
+            self._pull_request = None
+            return None, None
+        if data['totalCount'] >= 2:
+            raise errors.GitHostError(
+                f"Unexpected number of open pull requests "
+                f"for branch '{self.context.branch}': {data['totalCount']}"
+            )
+        pr_info = data['nodes'][0]
+        self._pull_request = models.PullRequest(
+            destination_branch=pr_info['baseRefName'],
+            host_autodeletes_branch_on_merge=self._repository.host_autodeletes_branch_on_merge,
+            id=pr_info['id'],
+            number=pr_info['number'],
+            url=pr_info['permalink'],
+        )
+        self._fetch_truncated_pages(pr_info, pr_info['id'])
+        status = _get_pull_request_status_from_node(pr_info)
+        status.rate_limit = _get_rate_limit(response['data'])
+        return self._pull_request, status
+
     def create_pull_request(
         self,
         *,
@@ -260,7 +371,7 @@ class GitHubApiClient(base.BaseClient):
         body: str,
         draft=False,
     ) -> models.PullRequest:
-        mutation = MUTATION_CREATE_PULL_REQUEST
+        mutation = get_graphql('mutation_create_pull_request')
         variables = {
             'repositoryId': self.repository.id,
             'headRefName': head,
@@ -282,15 +393,53 @@ class GitHubApiClient(base.BaseClient):
         )
 
     def request_reviews(self, users: Iterable[models.User]):
-        mutation = MUTATION_REQUEST_REVIEWS
+        mutation = get_graphql('mutation_request_reviews')
         variables = {
             'pullRequestId': self.pull_request.id,
             'userIds': [user.id for user in users],
         }
         self._post(mutation, variables)
 
-    def get_collaborators(self) -> Iterable[models.User]:
-        query = QUERY_REPOSITORY_CONTRIBUTORS
+    def get_collaborators(self, refresh: bool = False) -> Iterable[models.User]:
+        """Return collaborators of the repository.
+
+        The list is cached on disk. If the cached list is older than
+        the configured TTL, it is returned as is and refreshed in a
+        background thread, so that the next call gets a fresh list.
+        The background refresh is abandoned if cogite exits before it
+        is done, which may happen in large organizations. That is why
+        a list older than ``COLLABORATORS_CACHE_MAX_AGE`` is refreshed
+        before being returned. If ``refresh`` is true, the cache is
+        ignored and updated.
+        """
+        cache_key = f"collaborators:{self.context.remote_url}"
+        cached = cache.NOT_SET if refresh else cache.get(cache_key)
+        if not isinstance(cached, dict):  # not cached
+            return self._refresh_collaborators(cache_key)
+        age = time.time() - cached['fetched_at']
+        if age > max(COLLABORATORS_CACHE_MAX_AGE, self.configuration.collaborators_cache_ttl):
+            return self._refresh_collaborators(cache_key)
+        collaborators = [models.User(**user) for user in cached['users']]
+        if age > self.configuration.collaborators_cache_ttl:
+            self._collaborators_refresh = threading.Thread(
+                target=self._refresh_collaborators,
+                args=(cache_key, ),
+                daemon=True,
+            )
+            self._collaborators_refresh.start()
+        return collaborators
+
+    def _refresh_collaborators(self, cache_key) -> List[models.User]:
+        collaborators = self._get_collaborators_from_host()
+        cached = {
+            'fetched_at': time.time(),
+            'users': [dataclasses.asdict(user) for user in collaborators],
+        }
+        cache.set(cache_key, cached, ttl=COLLABORATORS_CACHE_MAX_AGE)
+        return collaborators
+
+    def _get_collaborators_from_host(self) -> List[models.User]:
+        query = get_graphql('query_repository_contributors')
         variables = {
             'owner': self.owner,
             'repositoryName': self.repository_name,
@@ -313,21 +462,127 @@ class GitHubApiClient(base.BaseClient):
             variables['paginationCursor'] = data['pageInfo']['endCursor']
         return collaborators
 
+    def search_collaborators(self, query: str, limit: int) -> Tuple[List[models.User], bool]:
+        variables = {
+            'owner': self.owner,
+            'repositoryName': self.repository_name,
+            'query': query,
+            'first': limit,
+        }
+        response = self._post(get_graphql('query_search_collaborators'), variables)
+        data = response['data']['repository']['collaborators']
+        users = [
+            models.User(
+                id=user_info['id'],
+                login=user_info['login'],
+                name=user_info['name'] or '',
+            )
+            for user_info in data['nodes']
+        ]
+        return users, not data['pageInfo']['hasNextPage']
+
     def mark_pull_request_as_ready(self):
-        mutation = MUTATION_MARK_AS_READY
+        mutation = get_graphql('mutation_mark_as_ready')
         variables = {
             'pullRequestId': self.pull_request.id,
         }
         self._post(mutation, variables)
 
-    def get_pull_request_status(self) -> models.PullRequestStatus:
-        query = QUERY_PULL_REQUEST_STATUS
+    def get_pull_request_status(
+        self,
+        previous: Optional[models.PullRequestStatus] = None,
+    ) -> models.PullRequestStatus:
         variables = {
             'pullRequestId': self.pull_request.id,
         }
-        response = self._post(query, variables)
+        if previous and previous.marker:
+            # The full status is large and costly. Get a summary
+            # first, and the full status only if the summary changed.
+            response = self._post(get_graphql('query_pull_request_status_summary'), variables)
+            state, marker = _get_status_summary(response['data']['node'])
+            if marker == previous.marker:
+                return dataclasses.replace(
+                    previous,
+                    state=state,
+                    rate_limit=_get_rate_limit(response['data']),
+                )
+        response = self._post(get_graphql('query_pull_request_status'), variables)
+        self._fetch_truncated_pages(response['data']['node'], variables['pullRequestId'])
         return _get_pull_request_status(response)
 
+    def _fetch_truncated_pages(self, pr_info: dict, pr_id: str):
+        """Fetch the pages of check suites, check runs, review
+        requests and reviews that are missing from ``pr_info`` (the
+        response to a status query), and add them to it.
+
+        Nothing is fetched in the common case where nothing has been
+        truncated. Otherwise, independent connections are fetched
+        concurrently.
+        """
+        commit_info = pr_info['commits']['nodes'][0]['commit']
+        tasks = []
+        for field, stem in (('reviewRequests', 'query_review_requests'), ('reviews', 'query_reviews')):
+            if _has_next_page(pr_info[field]):
+                tasks.append(functools.partial(
+                    self._fetch_remaining_pages, stem, {'pullRequestId': pr_id}, field, pr_info[field],
+                ))
+        suites = commit_info.get('checkSuites')
+        if suites:
+            if _has_next_page(suites):
+                tasks.append(functools.partial(self._fetch_next_check_suites, commit_info['id'], suites))
+            tasks.extend(self._get_check_runs_tasks(suites['nodes']))
+        if not tasks:
+            return
+
+        # Imported here because it is rarely needed.
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(MAX_PAGINATION_WORKERS) as executor:
+            futures = {executor.submit(task) for task in tasks}
+            while futures:
+                done, futures = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    # Each task returns further tasks, if any.
+                    futures |= {executor.submit(task) for task in future.result()}
+
+    def _fetch_next_pages(self, stem: str, variables: dict, field: str, connection: dict) -> list:
+        """Fetch the pages that follow ``connection`` and add their
+        nodes to it. Return the new nodes.
+        """
+        query = get_graphql(stem)
+        new_nodes = []
+        page = connection
+        while _has_next_page(page):
+            response = self._post(query, {**variables, 'cursor': page['pageInfo']['endCursor']})
+            page = response['data']['node'][field]
+            new_nodes.extend(page['nodes'])
+        connection['nodes'].extend(new_nodes)
+        connection['pageInfo'] = page['pageInfo']
+        return new_nodes
+
+    def _fetch_remaining_pages(self, stem: str, variables: dict, field: str, connection: dict) -> list:
+        self._fetch_next_pages(stem, variables, field, connection)
+        return []  # no further task
+
+    def _fetch_next_check_suites(self, commit_id: str, suites: dict) -> list:
+        new_suites = self._fetch_next_pages('query_check_suites', {'commitId': commit_id}, 'checkSuites', suites)
+        # Check runs of new suites may have been truncated, too.
+        return self._get_check_runs_tasks(new_suites)
+
+    def _get_check_runs_tasks(self, suites: List[dict]) -> list:
+        return [
+            functools.partial(
+                self._fetch_remaining_pages,
+                'query_check_runs',
+                {'checkSuiteId': suite['id']},
+                'checkRuns',
+                suite['checkRuns'],
+            )
+            for suite in suites
+            if _has_next_page(suite['checkRuns'])
+        ]
+
 
 class GitHubOAuthDeviceFlowTokenGetter:
     """A class to create a new personal access token, using the device
@@ -355,10 +610,12 @@ class GitHubOAuthDeviceFlowTokenGetter:
         self.interval = verification_info.interval
 
         interaction.display(f"1. Copy your one-time verification code: {verification_info.user_code}")
-        input(
-            "2. Then press Enter to open github.com in your browser "
-            "and fill the form with this code..."
-        )
+        with trace.span('input', trace.CATEGORY_INTERACTION):
+            input(
+                "2. Then press Enter to open github.com in your browser "
+                "and fill the form with this code..."
+            )
+        import webbrowser
         webbrowser.open(verification_info.verification_uri)
 
         # Poll GitHub until the code is confirmed and GitHub returns
@@ -388,6 +645,8 @@ class GitHubOAuthDeviceFlowTokenGetter:
 
     def _get_verification_info(self) -> VerificationInfo:
         """Request a verification code from GitHub."""
+        from cogite import requests
+
         # Get verification code from GitHub.
         response = requests.send(
             'POST',
@@ -412,6 +671,7 @@ class GitHubOAuthDeviceFlowTokenGetter:
 
     def _get_access_token(self, device_code):
         """Poll GitHub and see if the verification code has been entered by the user."""
+        from cogite import requests
         response = requests.send(
             'POST',
             'https://github.com/login/oauth/access_token',
@@ -0,0 +1,32 @@
+"""Run functions in the background, without delaying the exit of
+cogite.
+
+The threads of ``concurrent.futures.ThreadPoolExecutor`` are joined
+when the interpreter exits, even after ``shutdown(wait=False)``. If
+the user quits (or an error occurs) while a background request is in
+progress, cogite would still wait for it to complete. Functions that
+are run here are abandoned instead.
+"""
+
+import concurrent.futures
+import threading
+
+
+def run(function, *args, **kwargs) -> concurrent.futures.Future:
+    """Call ``function`` in a daemon thread and return a future of its
+    result.
+    """
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as exc:  # pylint: disable=broad-exception-caught
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
@@ -1,13 +1,49 @@
+"""A small on-disk key-value cache.
+
+Entries are stored in an SQLite database, which gives us atomic
+writes and file locking for free (so that concurrent cogite
+processes do not lose or corrupt each other's writes), as well as
+indexed lookups that do not depend on the size of the cache.
+
+Each entry may have a time-to-live. The cache is bounded: when it
+holds more than ``MAX_ENTRIES`` entries, the least recently used
+ones are evicted. To keep reads cheap, the access time of an entry
+is only updated when it is older than ``ACCESS_TIME_GRANULARITY``:
+most lookups are then plain reads, that neither write to the disk nor
+take the write lock of the database.
+"""
+
 import json
 import os
 import pathlib
+import sqlite3
+import threading
+import time
+from typing import Dict
+from typing import Optional
 
 
 USER_CACHE_HOME = pathlib.Path(
     os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")
 )
 COGITE_CACHE_DIR = USER_CACHE_HOME / "cogite"
-COGITE_CACHE_FILE = COGITE_CACHE_DIR / "cache.json"
+COGITE_CACHE_FILE = COGITE_CACHE_DIR / "cache.sqlite"
+# The cache used to be stored in this file, in the same directory.
+LEGACY_CACHE_FILENAME = "cache.json"
+
+MAX_ENTRIES = 1000
+LOCK_TIMEOUT = 5  # seconds
+ACCESS_TIME_GRANULARITY = 60  # seconds
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    "  key TEXT PRIMARY KEY,"
+    "  value TEXT NOT NULL,"
+    "  expires_at REAL,"
+    "  accessed_at REAL NOT NULL"
+    ")",
+    "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)",
+)
 
 
 _encode = json.dumps
@@ -15,20 +51,104 @@ _decode = json.loads
 
 NOT_SET = object()
 
+# The cache is only an optimization: an unusable cache (e.g. a
+# read-only home directory, or a corrupted database) should not
+# prevent cogite from working.
+ERRORS = (OSError, sqlite3.Error)
 
-def get(key):
-    try:
-        encoded = COGITE_CACHE_FILE.read_text()
-    except FileNotFoundError:
-        return NOT_SET
-    return _decode(encoded).get(key, NOT_SET)
+_connections: Dict[pathlib.Path, sqlite3.Connection] = {}
+# An SQLite connection must not be used concurrently by multiple
+# threads.
+_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    path = COGITE_CACHE_FILE
+    connection = _connections.get(path)
+    if connection is None:
+        path.parent.mkdir(0o700, parents=True, exist_ok=True)
+        if not path.exists():
+            _remove_legacy_cache(path.parent)
+        connection = sqlite3.connect(
+            str(path),
+            timeout=LOCK_TIMEOUT,
+            check_same_thread=False,
+        )
+        with connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+        _connections[path] = connection
+    return connection
 
 
-def set(key, value):  # pylint: disable=redefined-builtin
+def _remove_legacy_cache(directory: pathlib.Path):
     try:
-        current = json.loads(COGITE_CACHE_FILE.read_text())
+        (directory / LEGACY_CACHE_FILENAME).unlink()
     except FileNotFoundError:
-        COGITE_CACHE_DIR.mkdir(0o700, parents=True, exist_ok=True)
-        current = {}
-    current[key] = value
-    COGITE_CACHE_FILE.write_text(_encode(current))
+        pass
+
+
+def get(key):
+    now = time.time()
+    with _lock:
+        try:
+            connection = _get_connection()
+            with connection:
+                row = connection.execute(
+                    "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return NOT_SET
+                value, expires_at, accessed_at = row
+                if expires_at is not None and expires_at <= now:
+                    connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return NOT_SET
+                if now - accessed_at >= ACCESS_TIME_GRANULARITY:
+                    connection.execute(
+                        "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+        except ERRORS:
+            return NOT_SET
+    return _decode(value)
+
+
+def set(key, value, ttl: Optional[float] = None):  # pylint: disable=redefined-builtin
+    """Store ``value`` (which must be JSON-serializable) under ``key``.
+
+    If ``ttl`` is given, the entry expires after that many seconds.
+    """
+    now = time.time()
+    expires_at = now + ttl if ttl is not None else None
+    encoded = _encode(value)
+    with _lock:
+        try:
+            connection = _get_connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, encoded, expires_at, now),
+                )
+                _evict(connection, now)
+        except ERRORS:
+            pass
+
+
+def delete(key):
+    with _lock:
+        try:
+            connection = _get_connection()
+            with connection:
+                connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+        except ERRORS:
+            pass
+
+
+def _evict(connection: sqlite3.Connection, now: float):
+    connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+    connection.execute(
+        "DELETE FROM cache WHERE key IN ("
+        "  SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+        ")",
+        (MAX_ENTRIES,),
+    )
@@ -1,24 +1,81 @@
 #!/usr/bin/env python
 """Check that the commits that the user is about to push, do not look
 like the user has forgotten to squash work-in-progress commits.
+
+The range of commits is read once, through a streaming `git log`, and
+all rules are evaluated in this single pass.
 """
 
+import dataclasses
 import os
-import subprocess
+import re
 import sys
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
 
+from cogite import git
 from cogite import interaction
 
 
 # If the user pushes MAX_COMMITS or more, ask for confirmation.
 MAX_COMMITS = 2
 DISPLAY_N_COMMITS = 5  # Don't display too much commits
-
-
-def run_command(command):
-    with subprocess.Popen(command, shell=True, stdout=subprocess.PIPE) as process:
-        process.wait()
-        return b"".join(process.stdout.readlines()).decode(sys.stdout.encoding)
+SQUASHABLE_KEYWORDS = ("wip", "-w-", "_w_", "fixup", "squash", "review", "revue")
+
+# Git uses this sha to indicate that a remote ref does not exist yet.
+NULL_SHA_REGEXP = re.compile(r"^0+$")
+
+
+@dataclasses.dataclass
+class Report:
+    n_commits: int = 0
+    # The most recent commits, as (sha, subject) tuples.
+    commits: List[Tuple[str, str]] = dataclasses.field(default_factory=list)
+    # Commits that look like they should have been squashed, as (sha,
+    # subject) tuples.
+    squashable_commits: List[Tuple[str, str]] = dataclasses.field(default_factory=list)
+
+
+def get_squashable_regexp(
+    keywords: Iterable[str] = SQUASHABLE_KEYWORDS,
+    patterns: Iterable[str] = (),
+) -> Optional[Pattern]:
+    """Return a regular expression that matches the message of
+    squashable commits, or ``None`` if there are no rules.
+
+    Keywords are searched anywhere in the message, case-insensitively
+    (like `git log --regexp-ignore-case --grep`). Patterns are regular
+    expressions, where ``^`` and ``$`` match at the beginning and end
+    of each line.
+    """
+    alternatives = [re.escape(keyword) for keyword in keywords]
+    alternatives += [f"(?:{pattern})" for pattern in patterns]
+    if not alternatives:
+        return None
+    return re.compile("|".join(alternatives), re.IGNORECASE | re.MULTILINE)
+
+
+def analyze_commits(
+    revisions: Iterable[str],
+    squashable_regexp: Optional[Pattern],
+    display_n_commits: int = DISPLAY_N_COMMITS,
+) -> Report:
+    report = Report()
+    for sha, message in git.iter_commits(*revisions):
+        report.n_commits += 1
+        subject = message.split("\n", 1)[0]
+        if len(report.commits) < display_n_commits:
+            report.commits.append((sha, subject))
+        if squashable_regexp and squashable_regexp.search(message):
+            report.squashable_commits.append((sha, subject))
+    return report
+
+
+def _format_commits(commits: List[Tuple[str, str]]) -> str:
+    return os.linesep.join(f"{sha[:7]} {subject}" for sha, subject in commits)
 
 
 def check_commits(
@@ -27,12 +84,25 @@ def check_commits(
     remote_sha,
     max_commits=MAX_COMMITS,
     display_n_commits=DISPLAY_N_COMMITS,
+    squashable_keywords=SQUASHABLE_KEYWORDS,
+    squashable_patterns=(),
 ):
     # `remote_ref` looks like 'refs/heads/<branch_name>'
     branch = remote_ref.split("/", 2)[-1]
 
-    commit_range = f"{remote_sha}..{local_sha}"
-    n_commits = int(run_command(f"git rev-list {commit_range} | wc -l"))
+    if NULL_SHA_REGEXP.match(remote_sha):
+        # The remote branch does not exist: check commits that are
+        # not on any remote branch.
+        revisions: Tuple[str, ...] = (local_sha, "--not", "--remotes")
+    else:
+        revisions = (f"{remote_sha}..{local_sha}", )
+    report = analyze_commits(
+        revisions,
+        get_squashable_regexp(squashable_keywords, squashable_patterns),
+        display_n_commits=display_n_commits,
+    )
+
+    n_commits = report.n_commits
     if n_commits >= max_commits:
         if n_commits > display_n_commits:
             msg = (
@@ -42,25 +112,17 @@ def check_commits(
         else:
             msg = f"[[warning]] You are about to push these {n_commits} commits to {branch}:"
         interaction.display(f"{os.linesep}{msg}")
-
-        n_to_display = min(n_commits, display_n_commits)
-        interaction.display(run_command(f'git log --pretty="%h %s" -n {n_to_display} {commit_range}'))
+        interaction.display(_format_commits(report.commits))
         interaction.display("Perhaps you have forgotten to squash them.")
         if not interaction.confirm(defaults_to_yes=False):
             return False
 
-    # FIXME: make these keywords configurable
-    keywords = ["wip", "-w-", "_w_", "fixup", "squash", "review", "revue"]
-    command = f"git log --color --pretty=medium --regexp-ignore-case {commit_range}"
-    for keyword in keywords:
-        command += f" --grep {keyword}"
-    squashable_commits = run_command(command)
-    if squashable_commits:
+    if report.squashable_commits:
         interaction.display(
             f"[[warning]] You are about to push commits to {branch} that look like "
             "squashable or work-in-progress commits:"
         )
-        interaction.display(squashable_commits)
+        interaction.display(_format_commits(report.squashable_commits))
         interaction.display(f"{os.linesep}Perhaps you have forgotten to squash them.")
         if not interaction.confirm(defaults_to_yes=False):
             return False
@@ -72,7 +134,7 @@ def main():
     git_args = sys.argv[1:]
     if not git_args:
         # Nothing to push.
-        sys.exit(os.ex_OK)
+        sys.exit(os.EX_OK)
 
     # Do not remove the `*_`. It would work (because we do receive 4
     # arguments) but pylint reports an `unbalanced-tuple-unpacking`
@@ -0,0 +1,64 @@
+"""Entry point of the Git pre-push hook that is installed by `cogite
+hook install`.
+
+This module is run on each push. It must only import the checker, and
+not the command line interface, its configuration or its backends,
+which would be much slower.
+"""
+
+import os
+import sys
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+from cogite import interaction
+from cogite.checks import pre_merge
+
+
+def parse_refs(lines: Iterable[str]) -> List[Tuple[str, str, str, str]]:
+    """Return the refs that are about to be pushed, as given by Git on
+    the standard input of pre-push hooks:
+
+        <local ref> <local sha> <remote ref> <remote sha>
+
+    Deleted refs are ignored, since they push no commits.
+    """
+    refs = []
+    for line in lines:
+        if not line.strip():
+            continue
+        local_ref, local_sha, remote_ref, remote_sha = line.split()
+        if pre_merge.NULL_SHA_REGEXP.match(local_sha):
+            continue
+        refs.append((local_ref, local_sha, remote_ref, remote_sha))
+    return refs
+
+
+def main():
+    # Arguments are the name and the URL of the remote, which we do
+    # not need. Refs are given on the standard input.
+    refs = parse_refs(sys.stdin.read().splitlines())
+    if not refs:
+        sys.exit(os.EX_OK)
+
+    # The standard input is not the terminal: reopen it to be able to
+    # ask for confirmation.
+    try:
+        sys.stdin = open('/dev/tty', encoding='utf-8')  # pylint: disable=consider-using-with
+    except OSError:
+        pass
+
+    try:
+        for _local_ref, local_sha, remote_ref, remote_sha in refs:
+            if not pre_merge.check_commits(local_sha, remote_ref, remote_sha):
+                sys.exit(1)
+    except EOFError:
+        sys.exit(interaction.interpret_rich_text(
+            f"{os.linesep}[[error]] Could not ask for confirmation (there is no terminal). "
+            "Use `git push --no-verify` to skip cogite checks."
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,38 @@
 import argparse
+import itertools
 import os
 import os.path
 import sys
 
 from . import api
+from . import cache
 from . import commands
 from . import config
 from . import context
 from . import errors
 from . import interaction
 from . import plugins
-from . import version
+from . import trace
+
+
+class VersionAction(argparse._VersionAction):
+    """Same as the standard "version" action, except that the version
+    is looked up only when needed, because it is slow.
+    """
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from . import version
+        self.version = f'%(prog)s {version.VERSION}'
+        super().__call__(parser, namespace, values, option_string)
+
+
+def _lazy(command_name):
+    """Return a callback that imports the command (and everything
+    that it needs) only when it is called.
+    """
+    def callback(*args, **kwargs):
+        return getattr(commands, command_name)(*args, **kwargs)
+    return callback
 
 
 def get_parser():
@@ -23,8 +45,15 @@ def get_parser():
     )
     parser.add_argument(
         '-v', '--version',
-        action='version',
-        version=f'%%(prog)s {version.VERSION}',
+        action=VersionAction,
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help=(
+            'Show how long each phase of the command took, and write a Chrome '
+            f'trace-event file (to the path given by {trace.TRACE_ENV_VAR}, if set).'
+        ),
     )
 
     # Yo dawg, I'm going to put subparsers in your subparsers.
@@ -36,10 +65,10 @@ def get_parser():
     auth_subparsers = auth.add_subparsers()
     auth_add_help = 'Interactively configure authentication.'
     auth_add = auth_subparsers.add_parser('add', help=auth_add_help, description=auth_add_help)
-    auth_add.set_defaults(callback=commands.add_auth)
+    auth_add.set_defaults(callback=_lazy('add_auth'))
 
     auth_delete = auth_subparsers.add_parser('delete', help='Delete authentication token.')
-    auth_delete.set_defaults(callback=commands.delete_auth)
+    auth_delete.set_defaults(callback=_lazy('delete_auth'))
 
     # pr (add|browse|draft|merge|ready|rebase|reqreview)
     pr_help = 'Commands related to pull requests'
@@ -71,37 +100,45 @@ def get_parser():
         dest='draft',
         help="Mark as a draft pull request.",
     )
-    pr_add.set_defaults(callback=commands.add_pull_request)
+    pr_add.set_defaults(callback=_lazy('add_pull_request'))
 
-    pr_draft.set_defaults(callback=commands.add_draft_pull_request)
+    pr_draft.set_defaults(callback=_lazy('add_draft_pull_request'))
 
     pr_browse_help = 'Open current pull request in a browser.'
     pr_browse = pr_subparsers.add_parser(
         'browse', help=pr_browse_help, description=pr_browse_help
     )
-    pr_browse.set_defaults(callback=commands.browse_pull_request)
+    pr_browse.set_defaults(callback=_lazy('browse_pull_request'))
     pr_browse.add_argument('branch', type=str, action='store', nargs='?')
 
     pr_merge_help = 'Merge (actually rebase and push) a pull request.'
     pr_merge = pr_subparsers.add_parser(
         'merge', help=pr_merge_help, description=pr_merge_help
     )
-    pr_merge.set_defaults(callback=commands.merge_pull_request)
+    pr_merge.set_defaults(callback=_lazy('merge_pull_request'))
 
     pr_ready_help = 'Mark a draft pull request as ready.'
     pr_ready = pr_subparsers.add_parser(
         'ready', help=pr_ready_help, description=pr_ready_help
     )
-    pr_ready.set_defaults(callback=commands.mark_pull_request_as_ready)
+    pr_ready.set_defaults(callback=_lazy('mark_pull_request_as_ready'))
 
     pr_rebase_help = 'Rebase a pull request.'
     pr_rebase = pr_subparsers.add_parser('rebase', help=pr_rebase_help, description=pr_rebase_help)
-    pr_rebase.set_defaults(callback=commands.rebase_branch)
+    pr_rebase.set_defaults(callback=_lazy('rebase_branch'))
 
     # FIXME: "reqreview" is long to type, can we find a shorter alias?
     pr_reqreview = 'Ask for reviews.'
     pr_reqreview = pr_subparsers.add_parser('reqreview', help=pr_reqreview, description=pr_reqreview)
-    pr_reqreview.set_defaults(callback=commands.request_reviews)
+    pr_reqreview.set_defaults(callback=_lazy('request_reviews'))
+
+    for subparser in (pr_add, pr_draft, pr_reqreview):
+        subparser.add_argument(
+            '--refresh-collaborators',
+            action='store_true',
+            dest='refresh_collaborators',
+            help='Ignore the cached list of collaborators and get it from the Git host.',
+        )
 
     # ci (browse)
     ci_help = 'Commands related to CI.'
@@ -111,15 +148,37 @@ def get_parser():
     ci_browse = ci_subparsers.add_parser(
         'browse', help='Open CI job in browser (defaults to current branch)'
     )
-    ci_browse.set_defaults(callback=commands.browse_ci)
+    ci_browse.set_defaults(callback=_lazy('browse_ci'))
     ci_browse.add_argument('branch', type=str, action='store', nargs='?')
 
+    # hook (install|uninstall)
+    hook_help = 'Commands related to Git hooks.'
+    hook = main_subparsers.add_parser('hook', help=hook_help, description=hook_help)
+    hook_subparsers = hook.add_subparsers()
+
+    hook_install_help = 'Install a pre-push hook that checks commits before they are pushed.'
+    hook_install = hook_subparsers.add_parser(
+        'install', help=hook_install_help, description=hook_install_help
+    )
+    hook_install.set_defaults(callback=_lazy('install_hook'))
+    hook_install.add_argument(
+        '--force',
+        action='store_true',
+        help='Overwrite any existing pre-push hook.',
+    )
+
+    hook_uninstall_help = 'Uninstall the pre-push hook.'
+    hook_uninstall = hook_subparsers.add_parser(
+        'uninstall', help=hook_uninstall_help, description=hook_uninstall_help
+    )
+    hook_uninstall.set_defaults(callback=_lazy('uninstall_hook'))
+
     # status (no sub-commands)
     status_help = 'Show status of the pull request.'
     status = main_subparsers.add_parser(
         'status', help=status_help, description=status_help
     )
-    status.set_defaults(callback=commands.show_status)
+    status.set_defaults(callback=_lazy('show_status'))
     status.add_argument(
         '-p',
         '--poll',
@@ -130,9 +189,21 @@ def get_parser():
     return parser
 
 
+def _split_main_options(argv):
+    """Split ``argv`` into the options of `cogite` itself (e.g.
+    ``--profile``), that come before the command, and the rest.
+    """
+    n_options = len(list(itertools.takewhile(lambda arg: arg.startswith('-'), argv)))
+    return argv[:n_options], argv[n_options:]
+
+
 def parse_args():
     parser = get_parser()
-    for command in plugins.get_extra_commands():
+    # Only install (and import) plugins that are relevant to the
+    # command that is being run.
+    _main_options, argv = _split_main_options(sys.argv[1:])
+    command_words = list(itertools.takewhile(lambda arg: not arg.startswith('-'), argv))
+    for command in plugins.get_extra_commands(command_words, get_parser):
         command().install(parser)
     args = parser.parse_args()
     if not hasattr(args, 'callback'):
@@ -142,6 +213,12 @@ def parse_args():
 
 
 def _main():
+    # Parse arguments first, so that `--help` and `--version` work
+    # (and are fast) outside of a Git checkout.
+    args = dict(vars(parse_args()))
+    callback = args.pop('callback')
+    args.pop('profile')  # handled by `main()`
+
     try:
         ctx = context.get_context()
     except errors.ContextError as exc:
@@ -152,9 +229,6 @@ def _main():
     if not client:
         sys.exit(f"Could not find any backend for platform '{configuration.host_platform}'")
 
-    args = dict(vars(parse_args()))
-    callback = args.pop('callback')
-
     # Include `client` and `configuration` in the context to simplify
     # the signature of all command functions.
     ctx.client = client
@@ -162,11 +236,29 @@ def _main():
     callback(ctx, **args)
 
 
+def _start_tracing():
+    """Enable tracing if requested, before arguments are parsed, so
+    that plugin discovery is traced too.
+    """
+    path = os.environ.get(trace.TRACE_ENV_VAR)
+    # Like argparse, only accept `--profile` before the command.
+    main_options, _argv = _split_main_options(sys.argv[1:])
+    if not path and '--profile' not in main_options:
+        return None
+    return trace.start(path or str(cache.COGITE_CACHE_DIR / 'trace.json'))
+
+
 def main():
+    tracer = _start_tracing()
     try:
-        _main()
+        with trace.span(' '.join(['cogite'] + sys.argv[1:]), trace.CATEGORY_COMMAND):
+            _main()
     except errors.FatalError as error:
         sys.exit(interaction.interpret_rich_text(str(error)))
+    finally:
+        if tracer:
+            trace.stop()
+            tracer.report()
 
 
 if __name__ == '__main__':
@@ -1,11 +1,29 @@
-from .auth import add_auth
-from .auth import delete_auth
-from .ci_browse import browse_ci
-from .pr_add import add_draft_pull_request
-from .pr_add import add_pull_request
-from .pr_browse import browse_pull_request
-from .pr_edit import mark_pull_request_as_ready
-from .pr_merge import merge_pull_request
-from .pr_rebase import rebase_branch
-from .pr_reviews import request_reviews
-from .status import show_status
+import importlib
+
+
+# Commands are imported lazily, i.e. only when they are used, so that
+# each command imports only what it needs.
+_LAZY_ATTRIBUTES = {
+    'add_auth': 'auth',
+    'delete_auth': 'auth',
+    'browse_ci': 'ci_browse',
+    'install_hook': 'hook',
+    'uninstall_hook': 'hook',
+    'add_draft_pull_request': 'pr_add',
+    'add_pull_request': 'pr_add',
+    'browse_pull_request': 'pr_browse',
+    'mark_pull_request_as_ready': 'pr_edit',
+    'merge_pull_request': 'pr_merge',
+    'rebase_branch': 'pr_rebase',
+    'request_reviews': 'pr_reviews',
+    'show_status': 'status',
+}
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'") from None
+    module = importlib.import_module(f'.{module_name}', __name__)
+    return getattr(module, name)
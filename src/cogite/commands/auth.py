@@ -1,5 +1,6 @@
 from cogite import auth
 from cogite import interaction
+from cogite import trace
 
 
 def choose_token_getter(getters):
@@ -14,9 +15,10 @@ def choose_token_getter(getters):
     while 1:
         choices_help = ', '.join(str(i) for i in range(1, len(getters)))
         choices_help += f' or {len(getters)}'
-        choice = input(
-            f"Please choose one of the methods above by typing {choices_help}, followed by Enter: "
-        )
+        with trace.span('input', trace.CATEGORY_INTERACTION):
+            choice = input(
+                f"Please choose one of the methods above by typing {choices_help}, followed by Enter: "
+            )
         try:
             choice = int(choice)
         except ValueError:
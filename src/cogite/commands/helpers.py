@@ -1,4 +1,5 @@
 from cogite import errors
+from cogite import spinner
 
 
 def assert_current_branch_is_feature_branch(branch, master_branch):
@@ -7,3 +8,34 @@ def assert_current_branch_is_feature_branch(branch, master_branch):
             "You are on the master branch, "
             "this command must be run from a feature branch."
         )
+
+
+def uses_collaborators_search(context):
+    # Fall back on the full list of collaborators if the backend
+    # does not support searching.
+    return (
+        context.configuration.collaborators_completion == 'search'
+        and context.client.supports_collaborators_search
+    )
+
+
+def prompt_for_reviewers(context, refresh_collaborators=False, collaborators_future=None):
+    """Ask the user to choose reviewers.
+
+    If given, ``collaborators_future`` is a future whose result is the
+    list of collaborators, that has been requested in the background.
+    """
+    # `completion` imports prompt_toolkit, which is slow to import.
+    from cogite import completion
+    client = context.client
+    if uses_collaborators_search(context):
+        return completion.prompt_for_users(search=client.search_collaborators)
+    with spinner.get_for_git_host_call():
+        try:
+            if collaborators_future:
+                collaborators = collaborators_future.result()
+            else:
+                collaborators = client.get_collaborators(refresh=refresh_collaborators)
+        except errors.GitHostError as exc:
+            raise errors.FatalError(str(exc)) from exc
+    return completion.prompt_for_users(collaborators)
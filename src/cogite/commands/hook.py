@@ -0,0 +1,57 @@
+import os
+import pathlib
+import shlex
+import sys
+
+from cogite import errors
+from cogite import interaction
+from cogite import shell
+
+
+# This marker lets us recognize (and not overwrite or remove) hooks
+# that have not been installed by cogite.
+HOOK_MARKER = "# Installed by cogite."
+HOOK_TEMPLATE = f"""#!/bin/sh
+{HOOK_MARKER} Use `cogite hook uninstall` to remove it.
+exec {{python}} -m cogite.checks.pre_push "$@"
+"""
+
+
+def _get_hook_path() -> pathlib.Path:
+    # This takes the `core.hooksPath` option and worktrees into
+    # account.
+    path = shell.run("git rev-parse --git-path hooks/pre-push").stdout[0]
+    return pathlib.Path(path).resolve()
+
+
+def _is_installed_by_cogite(path: pathlib.Path) -> bool:
+    return HOOK_MARKER in path.read_text(encoding='utf-8', errors='replace')
+
+
+def install_hook(context, *, force=False):  # pylint: disable=unused-argument
+    path = _get_hook_path()
+    if path.exists() and not force and not _is_installed_by_cogite(path):
+        raise errors.FatalError(
+            f"[[error]] A pre-push hook already exists at {path}. "
+            f"Use `--force` to overwrite it."
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Use the same interpreter as the current one, so that the hook
+    # works even if cogite is installed in a virtual environment.
+    path.write_text(HOOK_TEMPLATE.format(python=shlex.quote(sys.executable)), encoding='utf-8')
+    path.chmod(0o755)
+    interaction.display(f"[[success]] Installed pre-push hook at {path}.")
+
+
+def uninstall_hook(context):  # pylint: disable=unused-argument
+    path = _get_hook_path()
+    if not path.exists():
+        interaction.display("There is no pre-push hook to uninstall.")
+        return
+    if not _is_installed_by_cogite(path):
+        raise errors.FatalError(
+            f"[[error]] The pre-push hook at {path} has not been installed by cogite. "
+            f"It has been left untouched."
+        )
+    os.remove(path)
+    interaction.display(f"[[success]] Uninstalled pre-push hook at {path}.")
@@ -2,7 +2,7 @@ import itertools
 import os
 import typing
 
-from cogite import completion
+from cogite import background
 from cogite import context
 from cogite import errors
 from cogite import git
@@ -13,6 +13,13 @@ from cogite import spinner
 from . import helpers
 
 
+# Do not put the whole history of very long branches in the body of
+# the pull request. GitHub rejects bodies longer than 65536
+# characters anyway.
+MAX_COMMITS_IN_BODY = 100
+MAX_COMMITS_BYTES_IN_BODY = 32 * 1024
+
+
 def add_draft_pull_request(ctx: context.Context, **kwargs):
     return add_pull_request(ctx, draft=True, **kwargs)
 
@@ -23,19 +30,41 @@ def add_pull_request(
     base_branch: str,
     ignore_template: bool = False,
     draft: bool = False,
+    refresh_collaborators: bool = False,
 ):
-    client = ctx.client
     configuration = ctx.configuration
     base_branch = base_branch or configuration.master_branch
 
     helpers.assert_current_branch_is_feature_branch(ctx.branch, configuration.master_branch)
+    client = ctx.client
+
+    # The following requests depend neither on the push nor on what
+    # the user types in their editor. Send them in the background.
+    # Errors are raised when we get the results, i.e. at the same
+    # point as if the requests had not been sent in the background.
+    # If we exit before (e.g. if the user cancels), they are
+    # abandoned.
+    repository_future = background.run(lambda: client.repository)
 
     _git_push_to_origin(ctx.branch)
 
+    # Only fetch collaborators (which may take a while in large
+    # organizations) once we know that they will probably be needed.
+    collaborators_future = None
+    if not helpers.uses_collaborators_search(ctx):
+        collaborators_future = background.run(
+            client.get_collaborators, refresh=refresh_collaborators
+        )
+
     commits_text = os.linesep.join(
         itertools.chain.from_iterable(
             (commit, '', '')
-            for commit in git.get_commits_logs(base_branch, ctx.branch)
+            for commit in git.get_commits_logs(
+                base_branch,
+                ctx.branch,
+                limit=MAX_COMMITS_IN_BODY,
+                max_bytes=MAX_COMMITS_BYTES_IN_BODY,
+            )
         )
     )
 
@@ -73,6 +102,7 @@ def add_pull_request(
         on_failure='Failed to create pull request on Git host',
     ) as sp:
         try:
+            repository_future.result()
             pr = client.create_pull_request(
                 head=ctx.branch,
                 base=base_branch,
@@ -84,12 +114,9 @@ def add_pull_request(
             raise errors.FatalError(str(exc)) from exc
         sp.success()
 
-    with spinner.get_for_git_host_call():
-        try:
-            collaborators = client.get_collaborators()
-        except errors.GitHostError as exc:
-            raise errors.FatalError(str(exc)) from exc
-    reviewers = completion.prompt_for_users(collaborators)
+    reviewers = helpers.prompt_for_reviewers(
+        ctx, refresh_collaborators, collaborators_future=collaborators_future
+    )
     if reviewers:
         with spinner.get_for_git_host_call():
             try:
@@ -131,7 +158,7 @@ def _git_push_to_origin(current_branch_name):
     else:  # result.returncode == 0:  # upstream branch is already configured
         command = 'git push'
 
-    shell.run(
+    shell.run_streaming(
         command,
         progress='Pushing local branch to upstream...',
         on_success='Pushed local branch to upstream.',
@@ -74,7 +74,7 @@ def merge_pull_request(context):
         print_success=False,
         rebase_from=destination_branch,
     )
-    run_with_progress = lambda command: shell.run(command, progress=command)
+    run_with_progress = lambda command: shell.run_streaming(command, progress=command)
     # Pushing again to the branch lets GitHub automatically mark the
     # PR as merged when we push to the master afterwards. (And GitHub
     # will display a link to the PR on the commit(s).)
@@ -83,7 +83,12 @@ def merge_pull_request(context):
     run_with_progress(f'git rebase {branch}')  # this rebase should not fail
 
     if configuration.merge_enable_pre_checks and not cogite.checks.pre_merge.check_commits(
-        git.get_current_sha(), git.get_remote_branch(), git.get_remote_sha()
+        git.get_current_sha(),
+        git.get_remote_branch(),
+        git.get_remote_sha(),
+        max_commits=configuration.merge_max_commits,
+        squashable_keywords=configuration.merge_squashable_keywords,
+        squashable_patterns=configuration.merge_squashable_patterns,
     ):
         current_branch = git.get_current_branch()  # get it again (safety belt)
         if current_branch != destination_branch:
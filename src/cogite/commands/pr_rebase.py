@@ -24,7 +24,7 @@ def rebase_branch(context, *, print_success=True, rebase_from=MASTER_BRANCH):
         f'git checkout {branch}',
         f'git rebase {rebase_from}',  # may fail if there are conflicts
     ):
-        shell.run(command=command, progress=command)
+        shell.run_streaming(command=command, progress=command)
 
     if print_success:
         interaction.display(
@@ -1,13 +1,12 @@
-from cogite import completion
 from cogite import interaction
 from cogite import spinner
 
+from . import helpers
 
-def request_reviews(context):
+
+def request_reviews(context, *, refresh_collaborators=False):
     client = context.client
-    with spinner.get_for_git_host_call():
-        collaborators = client.get_collaborators()
-    users = completion.prompt_for_users(collaborators)
+    users = helpers.prompt_for_reviewers(context, refresh_collaborators)
     if users:
         with spinner.get_for_git_host_call():
             client.request_reviews(users)
@@ -1,62 +1,27 @@
 import curses
-import time
+import sys
 
 from cogite import errors
 from cogite import git
 from cogite import interaction
 from cogite import models
+from cogite import polling
 from cogite import spinner
+from cogite import status_view
 
 
 def show_status(context, poll=False):
     client = context.client
-    configuration = context.configuration
 
     with spinner.get_for_git_host_call():
-        pull_request = client.pull_request
+        pull_request, status = client.get_pull_request_with_status()
     if not pull_request:
         raise errors.FatalError(
             f"There is no open pull request on the current branch {context.branch}"
         )
 
     if poll:
-        try:
-            screen = curses.initscr()
-            curses.start_color()
-            curses.use_default_colors()
-            for i in range(0, curses.COLORS):
-                curses.init_pair(i, i, -1)
-            while True:
-                status = client.get_pull_request_status()
-                # addstr (for each build below) overwrites only the
-                # start of the line. I tried to clean each line first
-                # with setsyx and clrtoeol but the last character of
-                # the last line remains.
-                screen.erase()
-                screen.addstr(0, 0, "Waiting for checks...")
-                if not status.checks:
-                    screen.addstr(2, 0, "No check yet.")
-                for i, check in enumerate(status.checks):
-                    line = interaction.interpret_rich_text(
-                        f"{_symbol_for_state(check.state)} {check.name} — {check.url}",
-                        context=interaction.OutputContext.CURSES,
-                    )
-                    screen.addstr(
-                        2 + i, 0, line, curses.color_pair(_curses_color(check.state))
-                    )
-                screen.refresh()
-                if status.checks and not any(
-                    check.state == models.CommitState.PENDING
-                    for check in status.checks):
-                    break
-                time.sleep(configuration.status_poll_frequency)
-        except KeyboardInterrupt:
-            pass
-        finally:
-            curses.endwin()
-    else:
-        with spinner.get_for_git_host_call():
-            status = client.get_pull_request_status()
+        status = _poll(client, status, polling.get_scheduler(context))
 
     # Always print the statuses. When we poll and quit the loop
     # because the CI job is complete, the (curses) screen is
@@ -77,6 +42,49 @@ def show_status(context, poll=False):
         )
 
 
+def _poll(client, status, scheduler):
+    """Show the status of checks and refresh it until they are all
+    complete, or until the user quits. Return the latest status.
+    """
+    # Imported here because only polling needs it, and asyncio is
+    # slow to import.
+    import asyncio
+
+    from cogite import status_watcher
+
+    watcher = None
+    try:
+        screen = curses.initscr()
+        curses.noecho()
+        curses.cbreak()
+        screen.keypad(True)
+        status_view.init_colors()
+        view = status_view.StatusView(screen)
+        watcher = status_watcher.StatusWatcher(
+            client, status, scheduler, view, _get_check_lines, input_fd=sys.stdin.fileno(),
+        )
+        status = asyncio.run(watcher.run())
+    except KeyboardInterrupt:
+        if watcher:
+            status = watcher.status
+    finally:
+        curses.endwin()
+        if scheduler.history:
+            scheduler.history.record(status.checks)
+            scheduler.history.save()
+    return status
+
+
+def _get_check_lines(status):
+    return [
+        status_view.Line(
+            f"{_symbol_for_state(check.state)} {check.name} — {check.url}",
+            _curses_color(check.state),
+        )
+        for check in status.checks
+    ]
+
+
 def _show_check_state(status):
     if status.checks:
         interaction.display("Checks:")
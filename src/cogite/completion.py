@@ -1,46 +1,254 @@
+import bisect
+import heapq
 import re
+import threading
+import time
+from typing import Callable
+from typing import Dict
 from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
 
 import prompt_toolkit
 import prompt_toolkit.completion
 
 from cogite import interaction
 from cogite import models
+from cogite import trace
 
 
 USER_FORMATTER = "{login} ({name})"
 USER_REGEXP = re.compile(r" *(?P<login>[^\(]+?) \([^\)]*?\)")
 
+# Do not show (nor compute) too many completions.
+MAX_COMPLETIONS = 50
+
+SEARCH_DEBOUNCE = 0.15  # seconds
+SEARCH_LIMIT = 10
+
+# A search function gets a query and a maximum number of results. It
+# returns matching users and whether this list is complete (i.e. it
+# has not been truncated to the maximum number of results).
+SearchFunction = Callable[[str, int], Tuple[List[models.User], bool]]
+
+# Sorts after any character that may appear in a login or a name.
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def _matches(word: str, user: models.User) -> bool:
+    return word in user.login.lower() or word in user.name.lower()
+
+
+def _get_completion(user: models.User, word: str) -> prompt_toolkit.completion.Completion:
+    display = USER_FORMATTER.format(login=user.login, name=user.name or 'unnamed')
+    return prompt_toolkit.completion.Completion(
+        text=display,
+        start_position=-len(word),
+    )
+
+
+class UserIndex:
+    """An index of users, built once, that returns ranked matches.
+
+    Matches are ranked as follows:
+
+    1. users whose login starts with the searched word;
+    2. users whose name has a word that starts with the searched word;
+    3. users whose login contains the searched word;
+    4. users whose name contains the searched word.
+
+    Within each rank, users are sorted by login.
+
+    Logins and names are concatenated (in login order) in two large
+    strings, so that substring searches are done by ``str.find()``
+    and ``re.finditer()`` instead of a Python loop over all users.
+    """
 
-class UserCompleter(prompt_toolkit.completion.Completer):
     def __init__(self, users: Iterable[models.User]):
-        self.users = users
+        self.users = sorted(users, key=lambda user: user.login.lower())
+        self.logins = [user.login.lower() for user in self.users]
+        names = [user.name.lower().replace("\n", " ") for user in self.users]
+        self._logins_text, self._logins_offsets = _concatenate(self.logins)
+        self._names_text, self._names_offsets = _concatenate(names)
+
+    def search(self, word: str, limit: int = MAX_COMPLETIONS) -> List[models.User]:
+        word = word.lower()
+        if not word:
+            return self.users[:limit]
+
+        found: Set[int] = set()
+        ranked: List[int] = []
+
+        def add(indices: Iterable[int]):
+            for idx in indices:
+                if len(ranked) >= limit:
+                    return
+                if idx not in found:
+                    found.add(idx)
+                    ranked.append(idx)
+
+        # 1. Login prefix
+        start = bisect.bisect_left(self.logins, word)
+        end = bisect.bisect_left(self.logins, word + _MAX_CHAR, lo=start)
+        add(range(start, end))
+        # 2. Name word prefix. Each name is preceded by a new line.
+        add(
+            heapq.merge(
+                _find_all("\n" + word, self._names_text, self._names_offsets),
+                _find_all(" " + word, self._names_text, self._names_offsets),
+            )
+        )
+        # 3. Login substring
+        add(_find_all(word, self._logins_text, self._logins_offsets))
+        # 4. Name substring
+        add(_find_all(word, self._names_text, self._names_offsets))
+        return [self.users[idx] for idx in ranked]
+
+
+def _concatenate(texts: List[str]) -> Tuple[str, List[int]]:
+    """Return texts, each preceded by a new line, and the offset of
+    each text.
+    """
+    offsets = []
+    offset = 0
+    for text in texts:
+        offset += 1
+        offsets.append(offset)
+        offset += len(text)
+    return "\n" + "\n".join(texts), offsets
+
+
+def _get_index(offsets: List[int], position: int) -> int:
+    return bisect.bisect_right(offsets, position) - 1
+
+
+def _find_all(word: str, text: str, offsets: List[int]) -> Iterator[int]:
+    position = text.find(word)
+    while position != -1:
+        # `word` may start with the new line that precedes a text:
+        # look at its last character to know which text it is in.
+        idx = _get_index(offsets, position + len(word) - 1)
+        yield idx
+        # Look for the next match in the next line, including the new
+        # line that precedes it.
+        next_line = offsets[idx + 1] - 1 if idx + 1 < len(offsets) else len(text)
+        position = text.find(word, next_line)
+
+
+class UserCompleter(prompt_toolkit.completion.Completer):
+    def __init__(self, users: Iterable[models.User], limit: int = MAX_COMPLETIONS):
+        self.index = UserIndex(users)
+        self.limit = limit
 
     def get_completions(self, document, complete_event):
         # Based on prompt_toolkit's WordCompleter
         word = document.get_word_before_cursor().lower()
-        for user in self.users:
-            if word in user.login.lower() or word in user.name.lower():
-                display = USER_FORMATTER.format(login=user.login, name=user.name or 'unnamed')
-                yield prompt_toolkit.completion.Completion(
-                    text=display,
-                    start_position=-len(word),
-                )
+        for user in self.index.search(word, self.limit):
+            yield _get_completion(user, word)
+
+
+class SearchUserCompleter(prompt_toolkit.completion.Completer):
+    """Complete users by querying the Git host as the user types.
+
+    Results are memoized for each searched word. If the results for a
+    word are complete, the results for any longer word that contains
+    it are computed locally, without querying the Git host again.
+
+    This completer is meant to be wrapped in a ``ThreadedCompleter``,
+    because searching blocks.
+    """
 
+    def __init__(
+        self,
+        search: SearchFunction,
+        debounce: float = SEARCH_DEBOUNCE,
+        limit: int = SEARCH_LIMIT,
+    ):
+        self.search = search
+        self.debounce = debounce
+        self.limit = limit
+        self.seen: Dict[str, models.User] = {}
+        self._results: Dict[str, Tuple[List[models.User], bool]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get_completions(self, document, complete_event):
+        word = document.get_word_before_cursor().lower()
+        if not word:
+            return
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        users = self._get_local_results(word)
+        if users is None:
+            # Wait a bit: if the user is still typing, a new call
+            # will be made and this one can be abandoned.
+            time.sleep(self.debounce)
+            with self._lock:
+                if generation != self._generation:
+                    return
+            users = self.get_users(word)
+        for user in users:
+            yield _get_completion(user, word)
+
+    def _get_local_results(self, word: str) -> Optional[List[models.User]]:
+        with self._lock:
+            if word in self._results:
+                return self._results[word][0]
+            for searched, (users, complete) in self._results.items():
+                if complete and searched in word:
+                    return [user for user in users if _matches(word, user)]
+        return None
+
+    def get_users(self, word: str) -> List[models.User]:
+        users = self._get_local_results(word)
+        if users is not None:
+            return users
+        users, complete = self.search(word, self.limit)
+        with self._lock:
+            self._results[word] = (users, complete)
+            self.seen.update({user.login: user for user in users})
+        return users
+
+
+def prompt_for_users(
+    users: Optional[Iterable[models.User]] = None,
+    *,
+    search: Optional[SearchFunction] = None,
+):
+    """Ask the user to choose users.
+
+    If ``users`` is given, complete from this list. Otherwise,
+    complete by calling ``search`` as the user types.
+    """
+    if users is not None:
+        completer: prompt_toolkit.completion.Completer = UserCompleter(users)
+        by_login = {user.login: user for user in users}
+    else:
+        if search is None:
+            raise ValueError("One of `users` or `search` must be given.")
+        search_completer = SearchUserCompleter(search)
+        completer = prompt_toolkit.completion.ThreadedCompleter(search_completer)
+        # Filled as the user types.
+        by_login = search_completer.seen
 
-def prompt_for_users(users: Iterable[models.User]):
     while True:
-        completer = UserCompleter(users)
-        response = prompt_toolkit.prompt(
-            "Reviewers (leave blank if none, tab to complete, space to select, enter to validate): ",
-            completer=completer,
-        )
-        by_login = {
-            user.login: user
-            for user in users
-        }
+        with trace.span('prompt reviewers', trace.CATEGORY_INTERACTION):
+            response = prompt_toolkit.prompt(
+                "Reviewers (leave blank if none, tab to complete, space to select, enter to validate): ",
+                completer=completer,
+            )
+        logins = USER_REGEXP.findall(response)
+        if users is None:
+            for login in logins:
+                if login not in by_login:
+                    # The user has not been selected through completion.
+                    search_completer.get_users(login.lower())
         try:
-            return [by_login[login] for login in USER_REGEXP.findall(response)]
+            return [by_login[login] for login in logins]
         except KeyError as exc:
             login = exc.args[0]
             interaction.display(
@@ -1,9 +1,16 @@
 import dataclasses
+import hashlib
+import json
 import os
 import pathlib
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 
-import toml
+from . import cache
+from . import git
+from . import trace
 
 
 USER_CONFIG_HOME = pathlib.Path(
@@ -11,24 +18,60 @@ USER_CONFIG_HOME = pathlib.Path(
 )
 COGITE_CONFIG_DIR = USER_CONFIG_HOME / "cogite"
 
+# The merged options of all configuration files are cached under a key
+# that depends on the path, modification time and size of each file.
+CONFIGURATION_CACHE_KEY = "configuration:{signature}"
+
 
 @dataclasses.dataclass
 class Configuration:
     host_platform: str = "github"
     host_api_url: str = "https://api.github.com"
+    # `cogite status --poll` waits at least `status-poll-frequency`
+    # between two requests, and backs off up to `status-poll-max-interval`
+    # while nothing changes. It never uses more than this share of the
+    # remaining rate limit of the Git host.
     status_poll_frequency: int = 10  # seconds
+    status_poll_max_interval: int = 120  # seconds
+    status_poll_rate_limit_share: float = 0.1
 
     master_branch: str = "master"
 
     merge_enable_pre_checks: bool = True
     merge_auto_rebase: str = "ask"  # could be "always", "ask" or "never"
+    # Pre-merge checks: ask for confirmation if we are about to push
+    # this number of commits or more, or commits whose message
+    # contains one of these keywords (case-insensitive) or matches
+    # one of these regular expressions.
+    merge_max_commits: int = 2
+    merge_squashable_keywords: List[str] = dataclasses.field(
+        default_factory=lambda: ["wip", "-w-", "_w_", "fixup", "squash", "review", "revue"]
+    )
+    merge_squashable_patterns: List[str] = dataclasses.field(default_factory=list)
+
+    # How long the list of collaborators (used to request reviews)
+    # is considered fresh. Past that, it is refreshed in the background.
+    collaborators_cache_ttl: int = 24 * 60 * 60  # seconds
+    # "list" downloads all collaborators before prompting for
+    # reviewers. "search" queries the Git host as the user types,
+    # which is faster for repositories with many collaborators.
+    collaborators_completion: str = "list"  # could be "list" or "search"
 
     ci_url: Optional[str] = None
     ci_platform: Optional[str] = None
 
 
+def _loads_toml(text: str) -> dict:
+    try:
+        import tomllib  # Python >= 3.11
+    except ImportError:
+        import toml  # imported here because it is slow to import
+        return toml.loads(text)
+    return tomllib.loads(text)
+
+
 def read_toml(path: pathlib.Path, section: Optional[str] = None):
-    d = toml.loads(path.read_text())
+    d = _loads_toml(path.read_text())
     if section:
         for part in section.split('.'):
             d = d.get(part, {})
@@ -51,19 +94,50 @@ def _quote_for_path(url: str) -> str:
     return url.replace('/', '_')
 
 
-def get_configuration(context):
-    config = {}
-
+def _get_sources(context) -> List[Tuple[pathlib.Path, Optional[str]]]:
+    """Return configuration files and the section to read in each of
+    them, by increasing order of precedence.
+    """
     user_project_dir = COGITE_CONFIG_DIR / _quote_for_path(context.remote_url)
-    locations_sections = (
+    git_root = git.get_git_root()
+    return [
         (COGITE_CONFIG_DIR / 'config.toml', None),
         (user_project_dir / 'config.toml', None),
-        (pathlib.Path('./pyproject.toml'), 'tool.cogite'),
-        (pathlib.Path('./cogite.toml'), None)
-    )
-    for location, section in locations_sections:
-        if not location.exists():
+        (git_root / 'pyproject.toml', 'tool.cogite'),
+        (git_root / 'cogite.toml', None),
+    ]
+
+
+def _get_signature(sources: List[Tuple[pathlib.Path, Optional[str]]]) -> str:
+    stats: List[Tuple[str, Optional[str], Optional[int], Optional[int]]] = []
+    for path, section in sources:
+        try:
+            stat = path.stat()
+        except OSError:  # most probably, the file does not exist
+            stats.append((str(path), section, None, None))
+        else:
+            stats.append((str(path), section, stat.st_mtime_ns, stat.st_size))
+    return hashlib.sha256(json.dumps(stats).encode('utf-8')).hexdigest()
+
+
+def _read_options(sources: List[Tuple[pathlib.Path, Optional[str]]]) -> Dict:
+    options: Dict = {}
+    for path, section in sources:
+        if not path.exists():
             continue
-        config.update(**_replace_dashes(read_toml(location, section)))
+        options.update(**_replace_dashes(read_toml(path, section)))
+    return options
 
-    return Configuration(**config)
+
+@trace.traced(trace.CATEGORY_CONFIG)
+def get_configuration(context):
+    sources = _get_sources(context)
+    key = CONFIGURATION_CACHE_KEY.format(signature=_get_signature(sources))
+    options = cache.get(key)
+    if options is cache.NOT_SET:
+        options = _read_options(sources)
+        try:
+            cache.set(key, options)
+        except TypeError:  # not JSON-serializable (e.g. dates)
+            pass
+    return Configuration(**options)
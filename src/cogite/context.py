@@ -2,10 +2,10 @@ import dataclasses
 import re
 import urllib.parse
 
-from cogite import backends
 from cogite import config
 from cogite import errors
 from cogite import git
+from cogite.backends import base
 
 
 SSH_GIT_URL = re.compile('(?P<user>.+)@(?P<host>.+):(?P<path>.+)')
@@ -20,7 +20,7 @@ class Context:
     branch: str
 
     # Injected from `cli._main()`
-    client: backends.BaseClient
+    client: base.BaseClient
     configuration: config.Configuration
 
     def as_dict(self):
@@ -1,31 +1,375 @@
+import contextlib
+import dataclasses
+import functools
 import os
 import pathlib
 import re
+import subprocess
+import threading
+from typing import Dict
+from typing import Generator
+from typing import IO
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 from . import errors
+from . import git_session
 from . import shell
+from . import trace
 
 
-def get_git_root() -> pathlib.Path:
+# Most information that nearly all commands need (the current branch,
+# the URL of the remote, etc.) is read directly from the `.git`
+# directory, because spawning `git` processes is comparatively slow.
+# For setups that the functions below do not support, we fall back
+# on `git` itself.
+
+SHA_REGEXP = re.compile(r"^[0-9a-f]{40}([0-9a-f]{24})?$")
+CONFIG_SECTION_REGEXP = re.compile(
+    r'^\[\s*(?P<section>[\w.-]+)(\s+"(?P<subsection>(?:[^"\\]|\\.)*)")?\s*\](?P<rest>.*)$'
+)
+CONFIG_ESCAPES = {'n': '\n', 't': '\t', 'b': '\b', '"': '"', '\\': '\\'}
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class UnsupportedRepository(Exception):
+    """Raised when the `.git` directory cannot be read by the
+    functions below, which should then fall back on `git` itself.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class GitDirectory:
+    toplevel: pathlib.Path
+    # Where HEAD is. For a linked worktree, this is the worktree's
+    # own directory, e.g. ".git/worktrees/<name>".
+    git_dir: pathlib.Path
+    # Where refs and config are. For a linked worktree, this is the
+    # main ".git" directory.
+    common_dir: pathlib.Path
+
+
+def _with_fallback(fallback):
+    """Call the decorated function and, if the repository is not
+    supported, call ``fallback`` instead.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            try:
+                return function(*args, **kwargs)
+            except UnsupportedRepository:
+                return fallback(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def _find_git_directory(cwd: pathlib.Path) -> GitDirectory:
+    if any(
+        name in os.environ
+        for name in ('GIT_DIR', 'GIT_WORK_TREE', 'GIT_COMMON_DIR', 'GIT_CONFIG', 'GIT_CONFIG_GLOBAL')
+    ):
+        raise UnsupportedRepository("Git environment variables are set.")
+    for directory in (cwd, *cwd.parents):
+        dot_git = directory / '.git'
+        if dot_git.is_dir():
+            git_dir = dot_git
+            break
+        if dot_git.is_file():
+            # Linked worktree or submodule
+            content = dot_git.read_text().strip()
+            if not content.startswith('gitdir: '):
+                raise UnsupportedRepository(f"Unexpected content of {dot_git}")
+            git_dir = (directory / content[len('gitdir: '):]).resolve()
+            break
+    else:
+        raise UnsupportedRepository("Not in a Git checkout (or a bare repository).")
+
+    common_dir = git_dir
+    commondir_file = git_dir / 'commondir'
+    if commondir_file.exists():
+        common_dir = (git_dir / commondir_file.read_text().strip()).resolve()
+    if (common_dir / 'reftable').exists():
+        raise UnsupportedRepository("reftable is not supported.")
+    if not (git_dir / 'HEAD').is_file():
+        raise UnsupportedRepository(f"Could not find HEAD in {git_dir}")
+
+    git_directory = GitDirectory(
+        toplevel=directory.resolve(),
+        git_dir=git_dir,
+        common_dir=common_dir,
+    )
+    config = _read_config(git_directory)
+    if config.get(('core', None, 'worktree')) or _get_bool(config, 'core', None, 'bare'):
+        raise UnsupportedRepository("core.worktree and core.bare are not supported.")
+    if config.get(('extensions', None, 'refstorage'), ['files'])[-1] != 'files':
+        raise UnsupportedRepository("Only the 'files' ref storage is supported.")
+    return git_directory
+
+
+def _get_git_directory() -> GitDirectory:
+    return _find_git_directory(pathlib.Path.cwd())
+
+
+# Git configuration: `(section, subsection, key)` -> list of values
+Config = Dict[Tuple[str, Optional[str], str], List[str]]
+
+
+def _parse_config(text: str, path: pathlib.Path) -> Config:
+    """Parse a Git configuration file.
+
+    Includes (``include.path`` and ``includeIf.*.path``) are not
+    supported and make us fall back on `git` itself.
+    """
+    config: Config = {}
+    section, subsection = None, None
+    lines = iter(text.splitlines())
+    for line in lines:
+        line = line.strip()
+        while line.endswith('\\') and not line.endswith('\\\\'):
+            line = line[:-1] + next(lines, '')
+        if not line or line[0] in '#;':
+            continue
+        if line.startswith('['):
+            match = CONFIG_SECTION_REGEXP.match(line)
+            if not match:
+                raise UnsupportedRepository(f"Could not parse section '{line}' in {path}")
+            section = match.group('section').lower()
+            subsection = match.group('subsection')
+            if subsection is not None:
+                subsection = re.sub(r'\\(.)', r'\1', subsection)
+            elif '.' in section:
+                # Deprecated `[section.subsection]` syntax
+                section, subsection = section.split('.', 1)
+            line = match.group('rest').strip()
+            if not line or line[0] in '#;':
+                continue
+        if section is None:
+            raise UnsupportedRepository(f"Found a variable outside of a section in {path}")
+        key, sep, value = line.partition('=')
+        key = key.strip().lower()
+        value = _parse_config_value(value) if sep else 'true'
+        if section in ('include', 'includeif') and key == 'path':
+            raise UnsupportedRepository(f"Includes are not supported (found one in {path})")
+        config.setdefault((section, subsection, key), []).append(value)
+    return config
+
+
+def _parse_config_value(raw: str) -> str:
+    value = []
+    quoted = False
+    pending_space = ''
+    chars = iter(raw.strip())
+    for char in chars:
+        if char == '"':
+            quoted = not quoted
+        elif char == '\\':
+            escaped = next(chars, '')
+            value.append(pending_space + CONFIG_ESCAPES.get(escaped, escaped))
+            pending_space = ''
+        elif char in '#;' and not quoted:
+            break
+        elif char.isspace() and not quoted:
+            pending_space += char
+        else:
+            value.append(pending_space + char)
+            pending_space = ''
+    return ''.join(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _read_config_file(path: pathlib.Path, _mtime_ns: int, _size: int) -> Config:
+    # `_mtime_ns` and `_size` are only here to invalidate the cache if
+    # the file changes.
+    return _parse_config(path.read_text(encoding='utf-8'), path)
+
+
+def _read_config(git_directory: GitDirectory) -> Config:
+    xdg_config_home = pathlib.Path(os.environ.get('XDG_CONFIG_HOME', pathlib.Path.home() / '.config'))
+    paths = [
+        pathlib.Path('/etc/gitconfig'),
+        xdg_config_home / 'git' / 'config',
+        pathlib.Path.home() / '.gitconfig',
+        git_directory.common_dir / 'config',
+        git_directory.git_dir / 'config.worktree',
+    ]
+    if os.environ.get('GIT_CONFIG_NOSYSTEM'):
+        paths.pop(0)
+    config: Config = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        for key, values in _read_config_file(path, stat.st_mtime_ns, stat.st_size).items():
+            config.setdefault(key, []).extend(values)
+    return config
+
+
+def _get_bool(config: Config, section: str, subsection: Optional[str], key: str) -> bool:
+    values = config.get((section, subsection, key))
+    if not values:
+        return False
+    return values[-1].lower() in ('true', 'yes', 'on', '1')
+
+
+def _read_ref(git_directory: GitDirectory, ref: str, depth: int = 0) -> str:
+    """Return the sha of ``ref`` (e.g. "HEAD" or "refs/heads/main")."""
+    if depth > 5:
+        raise UnsupportedRepository(f"Too many levels of symbolic refs for {ref}")
+    # HEAD (and other pseudo-refs) are specific to each worktree.
+    base_dir = git_directory.git_dir if '/' not in ref else git_directory.common_dir
+    try:
+        content = (base_dir / ref).read_text().strip()
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        content = _read_packed_refs(git_directory).get(ref, '')
+        if not content:
+            raise UnsupportedRepository(f"Could not find ref {ref}") from None
+    if content.startswith('ref: '):
+        return _read_ref(git_directory, content[len('ref: '):], depth + 1)
+    if not SHA_REGEXP.match(content):
+        raise UnsupportedRepository(f"Unexpected content for ref {ref}: {content}")
+    return content
+
+
+def _read_packed_refs(git_directory: GitDirectory) -> Dict[str, str]:
+    try:
+        text = (git_directory.common_dir / 'packed-refs').read_text()
+    except FileNotFoundError:
+        return {}
+    refs = {}
+    for line in text.splitlines():
+        if not line or line[0] in '#^':
+            continue
+        sha, _, ref = line.partition(' ')
+        refs[ref.strip()] = sha
+    return refs
+
+
+def _read_head(git_directory: GitDirectory) -> str:
+    return (git_directory.git_dir / 'HEAD').read_text().strip()
+
+
+def _apply_instead_of(url: str, config: Config) -> str:
+    """Rewrite ``url`` according to ``url.<base>.insteadOf`` options,
+    like Git does: the longest matching prefix wins.
+    """
+    best_prefix, best_base = '', None
+    for (section, base, key), prefixes in config.items():
+        if section != 'url' or key != 'insteadof':
+            continue
+        for prefix in prefixes:
+            if url.startswith(prefix) and len(prefix) > len(best_prefix):
+                best_prefix, best_base = prefix, base
+    if best_base is None:
+        return url
+    return best_base + url[len(best_prefix):]
+
+
+def _get_git_root_from_git() -> pathlib.Path:
     return pathlib.Path(shell.run("git rev-parse --show-toplevel").stdout[0])
 
 
-def get_current_branch():
+@_with_fallback(_get_git_root_from_git)
+def get_git_root() -> pathlib.Path:
+    return _get_git_directory().toplevel
+
+
+def _get_current_branch_from_git():
     return shell.run("git rev-parse --abbrev-ref HEAD").stdout[0]
 
 
-def get_remote_branch():
+@_with_fallback(_get_current_branch_from_git)
+def get_current_branch():
+    head = _read_head(_get_git_directory())
+    if head.startswith('ref: refs/heads/'):
+        return head[len('ref: refs/heads/'):]
+    if SHA_REGEXP.match(head):
+        return 'HEAD'  # detached HEAD, like `git rev-parse --abbrev-ref HEAD`
+    raise UnsupportedRepository(f"Unexpected content for HEAD: {head}")
+
+
+def _get_upstream(git_directory: GitDirectory) -> Tuple[str, str]:
+    """Return the short name (e.g. "origin/main") and the full name
+    (e.g. "refs/remotes/origin/main") of the upstream branch of the
+    current branch, like `git rev-parse --symbolic-full-name @{u}`.
+    """
+    head = _read_head(git_directory)
+    if not head.startswith('ref: refs/heads/'):
+        raise UnsupportedRepository("HEAD is detached.")
+    branch = head[len('ref: refs/heads/'):]
+    config = _read_config(git_directory)
+    remote = config.get(('branch', branch, 'remote'), [''])[-1]
+    merge = config.get(('branch', branch, 'merge'), [''])[-1]
+    if not remote or not merge:
+        raise UnsupportedRepository(f"Could not find the upstream branch of {branch}")
+    if remote == '.':
+        ref = merge
+    else:
+        ref = _map_refspecs(merge, config.get(('remote', remote, 'fetch'), []))
+    if ref.startswith('refs/heads/'):
+        short = ref[len('refs/heads/'):]
+    elif ref.startswith('refs/remotes/'):
+        short = ref[len('refs/remotes/'):]
+        # Git disambiguates the short name if a local branch has the
+        # same name. We do not.
+        local = f'refs/heads/{short}'
+        if (git_directory.common_dir / local).exists() or local in _read_packed_refs(git_directory):
+            raise UnsupportedRepository(f"Ambiguous upstream branch: {short}")
+    else:
+        raise UnsupportedRepository(f"Unexpected upstream branch: {ref}")
+    return short, ref
+
+
+def _map_refspecs(ref: str, refspecs: List[str]) -> str:
+    """Return the remote-tracking ref of ``ref`` (a ref of the remote)
+    according to the fetch refspecs of the remote.
+    """
+    for refspec in refspecs:
+        if refspec.startswith('^'):
+            raise UnsupportedRepository("Negative refspecs are not supported.")
+        source, _, destination = refspec.lstrip('+').partition(':')
+        if '*' in source:
+            prefix, _, suffix = source.partition('*')
+            if ref.startswith(prefix) and ref.endswith(suffix) and len(ref) >= len(prefix) + len(suffix):
+                return destination.replace('*', ref[len(prefix):len(ref) - len(suffix)], 1)
+        elif ref == source and destination:
+            return destination
+    raise UnsupportedRepository(f"No remote-tracking branch for {ref}")
+
+
+def _get_remote_branch_from_git():
     return shell.run("git rev-parse --abbrev-ref --symbolic-full-name @{u}").stdout[0]
 
 
-def get_current_sha():
+@_with_fallback(_get_remote_branch_from_git)
+def get_remote_branch():
+    return _get_upstream(_get_git_directory())[0]
+
+
+def _get_current_sha_from_git():
     return shell.run("git rev-parse HEAD").stdout[0]
 
 
+@_with_fallback(_get_current_sha_from_git)
+def get_current_sha():
+    return _read_ref(_get_git_directory(), 'HEAD')
+
+
+def _get_remote_sha_from_git():
+    return shell.run("git rev-parse @{u}").stdout[0]
+
+
+@_with_fallback(_get_remote_sha_from_git)
 def get_remote_sha():
     # Warning: this function runs locally and does not contact the Git
     # host. It hence supposes that the local branch is up-to-date.
-    return shell.run("git rev-parse @{u}").stdout[0]
+    git_directory = _get_git_directory()
+    return _read_ref(git_directory, _get_upstream(git_directory)[1])
 
 
 def get_upstream_remote_sha(branch):
@@ -40,23 +384,17 @@ def get_upstream_remote_sha(branch):
 def get_n_commits_ahead_of_remote():
     # Warning: this function runs locally and does not contact the Git
     # host. It hence supposes that the local branch is up-to-date.
-    remote = get_remote_branch()
-    current = get_current_branch()
-    output = shell.run(f"git rev-list {remote}..{current} --count").stdout[0]
+    output = shell.run("git rev-list @{u}..HEAD --count").stdout[0]
     return int(output)
 
 
 def current_branch_has_commit(sha):
-    result = shell.run(f"git merge-base --is-ancestor {sha} @", expected_returncodes=(0, 1, 128))
-    # return codes:
-    # 0: the given commit is an ancestor of the current branch
-    # 1: the given commit is not an ancestor of the current branch
-    # 128: ditto (and the commit is not known locally, probably
-    # because local is not up-to-date).
-    return result.returncode == 0
+    # If the commit is not known locally (probably because local is
+    # not up-to-date), this returns False.
+    return git_session.get_session().is_ancestor(sha, 'HEAD')
 
 
-def get_remote_origin_url():
+def _get_remote_origin_url_from_git():
     # The following command expands insteadOf customizations, if any.
     try:
         return shell.run("git ls-remote --get-url").stdout[0]
@@ -65,13 +403,122 @@ def get_remote_origin_url():
         raise errors.FatalError(err) from exc
 
 
-def get_commits_logs(base_branch, branch):
-    # FIXME: docstring (+ rename function?)
-    log_lines = shell.run(f"git log {base_branch}..{branch} --reverse").stdout
+@_with_fallback(_get_remote_origin_url_from_git)
+def get_remote_origin_url():
+    # Like `git ls-remote --get-url`: use the remote of the current
+    # branch or, by default, "origin".
+    git_directory = _get_git_directory()
+    config = _read_config(git_directory)
+    remote = 'origin'
+    head = _read_head(git_directory)
+    if head.startswith('ref: refs/heads/'):
+        branch = head[len('ref: refs/heads/'):]
+        remote = config.get(('branch', branch, 'remote'), [remote])[-1]
+    urls = config.get(('remote', remote, 'url'))
+    if not urls:
+        raise UnsupportedRepository(f"Could not find URL of remote '{remote}'")
+    return _apply_instead_of(urls[0], config)
+
+
+def get_commits_logs(
+    base_branch: str,
+    branch: str,
+    limit: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield the message of each commit that is in ``branch`` but not
+    in ``base_branch``, oldest first.
+
+    Messages are read from `git log` as they come, without
+    materializing the whole log. Stop after ``limit`` messages, or
+    before going over ``max_bytes`` bytes of messages (the first
+    message is always yielded, though possibly truncated).
+    """
+    records = _iter_git_records(
+        ('git', 'log', '-z', '--format=%B', '--reverse', f'{base_branch}..{branch}'),
+        max_bytes=max_bytes,
+    )
+    n_messages = 0
+    n_bytes = 0
+    # Closing `records` stops `git log` if we stop early.
+    with contextlib.closing(records):
+        for message in records:
+            if limit is not None and n_messages >= limit:
+                break
+            n_bytes += len(message)
+            if max_bytes is not None and n_messages and n_bytes > max_bytes:
+                break
+            n_messages += 1
+            yield os.linesep.join(message.decode('utf-8', errors='replace').rstrip().splitlines())
+            if max_bytes is not None and n_bytes >= max_bytes:
+                break
+
+
+def iter_commits(*revisions: str) -> Iterator[Tuple[str, str]]:
+    """Yield the sha and message of each commit selected by
+    ``revisions`` (as accepted by `git rev-list`), newest first.
+
+    Commits are read from `git log` as they come, without
+    materializing the whole log.
+    """
+    records = _iter_git_records(('git', 'log', '-z', '--format=%H%n%B') + revisions + ('--',))
+    with contextlib.closing(records):
+        for record in records:
+            sha, _, message = record.decode('utf-8', errors='replace').partition('\n')
+            yield sha, message.rstrip()
+
+
+def _iter_git_records(
+    command: Tuple[str, ...],
+    max_bytes: Optional[int] = None,
+) -> Generator[bytes, None, None]:
+    """Run ``command``, which must output NUL-terminated records, and
+    yield each record as it comes.
+
+    If the generator is closed early, the command is killed.
+    """
+    # The span includes the time that the caller spends on each record.
+    with trace.span(' '.join(command), trace.CATEGORY_GIT), subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    ) as process:
+        assert process.stdout and process.stderr  # for mypy
+        # Read stderr concurrently. Otherwise, `git` would block if it
+        # filled the pipe (e.g. with many warnings) before closing
+        # stdout.
+        stderr, stderr_chunks = process.stderr, []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(stderr.read()), daemon=True)
+        stderr_reader.start()
+        exhausted = False
+        try:
+            yield from _read_nul_terminated(process.stdout, max_bytes)
+            exhausted = True
+        finally:
+            if not exhausted:
+                # There is no need to let `git` write the rest.
+                process.kill()
+            stderr_reader.join()
+        if process.wait() != 0:
+            err = f"[[error]] Got the following output when running `{' '.join(command)}`:{os.linesep}"
+            err += os.linesep.join(shell.get_lines(b''.join(stderr_chunks)))
+            raise errors.FatalError(err)
+
 
-    for commit_block in re.split(r"^commit [\da-f]{20,}", os.linesep.join(log_lines), flags=re.MULTILINE):
-        # `git log` indents the commit message with 4 spaces
-        current_commit_text = re.findall(r"^    (.*)$", commit_block, re.MULTILINE)
+def _read_nul_terminated(stream: IO[bytes], max_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """Yield each NUL-terminated record of ``stream``.
 
-        if current_commit_text:
-            yield os.linesep.join(current_commit_text)
+    If ``max_bytes`` is given, stop if a record gets larger than
+    that, instead of buffering it in memory.
+    """
+    pending = b''
+    while True:
+        chunk = stream.read1(READ_CHUNK_SIZE)  # type: ignore[attr-defined]
+        if not chunk:
+            break
+        records = (pending + chunk).split(b'\0')
+        pending = records.pop()
+        yield from records
+        if max_bytes is not None and len(pending) > max_bytes:
+            yield pending
+            return
+    if pending:
+        yield pending
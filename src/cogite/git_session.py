@@ -0,0 +1,212 @@
+"""A long-lived Git helper process for read-only queries.
+
+Spawning a `git` process for each query is comparatively slow,
+especially in large repositories. ``GitSession`` keeps a `git cat-file
+--batch` process alive for the duration of a command, and sends it
+all queries that it can answer: resolving revisions, reading commits
+and (to some extent) checking ancestry.
+
+Use ``get_session()`` to get the session that is shared by all
+modules. Ranges of commits are not read here but with a single
+streaming `git log` (see ``git.iter_commits()``), which is faster than
+walking the history object by object.
+"""
+
+import atexit
+import dataclasses
+import os
+import re
+import subprocess
+import threading
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from . import shell
+from . import trace
+
+
+# When checking ancestry, walk at most this number of commits through
+# `git cat-file` before falling back on `git merge-base`, which is
+# faster for long walks because it uses the commit-graph.
+MAX_ANCESTRY_WALK = 200
+
+SHA_REGEXP = re.compile(r'^[0-9a-f]{40,64}$')
+
+
+@dataclasses.dataclass
+class Commit:
+    sha: str
+    parents: List[str]
+    message: str
+
+    @property
+    def subject(self) -> str:
+        return self.message.split('\n', 1)[0]
+
+
+class GitSession:
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _get_process(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+                ['git', 'cat-file', '--batch'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.cwd,
+            )
+        return self._process
+
+    def _cat_file(self, revisions: List[str]) -> List[Optional[Tuple[str, bytes]]]:
+        """Return the sha and the (raw) content of each object, or
+        ``None`` if it does not exist.
+        """
+        results: List[Optional[Tuple[str, bytes]]] = []
+        with self._lock, trace.span('git cat-file --batch', trace.CATEGORY_GIT, revisions=revisions):
+            process = self._get_process()
+            assert process.stdin and process.stdout  # for mypy
+            # Send all queries at once, then read all responses.
+            process.stdin.write(b''.join(rev.encode('utf-8') + b'\n' for rev in revisions))
+            process.stdin.flush()
+            for _rev in revisions:
+                header = process.stdout.readline()
+                if not header:
+                    self._process = None
+                    raise RuntimeError("`git cat-file` exited unexpectedly.")
+                # `header` looks like "<sha> <type> <size>" or "<rev> missing".
+                parts = header.split()
+                if parts[-1] in (b'missing', b'ambiguous'):
+                    results.append(None)
+                    continue
+                content = process.stdout.read(int(parts[2]) + 1)  # +1 for the trailing new line
+                results.append((parts[0].decode('ascii'), content[:-1]))
+        return results
+
+    def resolve(self, *revisions: str) -> List[Optional[str]]:
+        """Return the sha of each revision, or ``None`` if it does not
+        exist.
+        """
+        return [commit.sha if commit else None for commit in self.read_commits(*revisions)]
+
+    def read_commits(self, *revisions: str) -> List[Optional[Commit]]:
+        """Return each commit, or ``None`` if it does not exist."""
+        results: Dict[str, Optional[Commit]] = {}
+        # `git cat-file` dies on some revisions (e.g. "@{u}" when
+        # there is no upstream branch): resolve them with `git
+        # rev-parse` first.
+        queries = {revision: revision for revision in revisions if _is_safe_for_cat_file(revision)}
+        unsafe = [revision for revision in revisions if revision not in queries]
+        for revision, sha in zip(unsafe, _rev_parse(unsafe)):
+            if sha:
+                queries[revision] = sha
+            else:
+                results[revision] = None
+        if queries:
+            objects = self._cat_file([f'{query}^{{commit}}' for query in queries.values()])
+            for revision, obj in zip(queries, objects):
+                results[revision] = _parse_commit(*obj) if obj else None
+        return [results[revision] for revision in revisions]
+
+    def read_commit(self, revision: str) -> Optional[Commit]:
+        return self.read_commits(revision)[0]
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """Return whether ``ancestor`` is an ancestor of ``descendant``
+        (or the same commit), like `git merge-base --is-ancestor`.
+
+        If ``ancestor`` does not exist locally, return ``False``.
+        """
+        ancestor_sha, descendant_sha = self.resolve(ancestor, descendant)
+        if not ancestor_sha or not descendant_sha:
+            return False
+        if ancestor_sha == descendant_sha:
+            return True
+        seen: Set[str] = set()
+        to_visit = [descendant_sha]
+        while to_visit and len(seen) < MAX_ANCESTRY_WALK:
+            commits = self.read_commits(*to_visit)
+            seen.update(to_visit)
+            to_visit = []
+            for commit in commits:
+                if commit is None:
+                    continue
+                if ancestor_sha in commit.parents:
+                    return True
+                to_visit.extend(parent for parent in commit.parents if parent not in seen)
+        if not to_visit:  # we have walked the whole history
+            return False
+        result = shell.run(
+            f'git merge-base --is-ancestor {ancestor_sha} {descendant_sha}',
+            expected_returncodes=(0, 1, 128),
+        )
+        return result.returncode == 0
+
+    def close(self):
+        with self._lock:
+            if self._process is not None:
+                if self._process.stdin:
+                    self._process.stdin.close()
+                self._process.wait()
+                if self._process.stdout:
+                    self._process.stdout.close()
+                self._process = None
+
+
+def _rev_parse(revisions: List[str]) -> List[Optional[str]]:
+    """Return the sha of each commit, or ``None`` if it does not exist.
+
+    All revisions are resolved by a single `git rev-parse`, unless
+    some do not exist: `git rev-parse` stops at the first one, after
+    printing the sha of the previous ones. It is then run again for
+    the following ones.
+    """
+    shas: List[Optional[str]] = []
+    while len(shas) < len(revisions):
+        remaining = revisions[len(shas):]
+        args = ' '.join(f'{revision}^{{commit}}' for revision in remaining)
+        result = shell.run(f'git rev-parse {args}', expected_returncodes=(0, 128))
+        # On failure, `git rev-parse` may print the revision that it
+        # could not resolve, which never looks like a sha.
+        for line in result.stdout[:len(remaining)]:
+            if not SHA_REGEXP.match(line):
+                break
+            shas.append(line)
+        if result.returncode != 0:
+            shas.append(None)
+    return shas
+
+
+def _is_safe_for_cat_file(revision: str) -> bool:
+    return '@{' not in revision and revision != '@' and '\n' not in revision
+
+
+def _parse_commit(sha: str, content: bytes) -> Commit:
+    headers, _, message = content.partition(b'\n\n')
+    parents = [
+        line.split()[1].decode('ascii')
+        for line in headers.split(b'\n')
+        if line.startswith(b'parent ')
+    ]
+    return Commit(sha=sha, parents=parents, message=message.decode('utf-8', errors='replace'))
+
+
+_sessions: Dict[str, GitSession] = {}
+
+
+def get_session() -> GitSession:
+    """Return the session for the current directory, which is shared
+    for the whole command.
+    """
+    cwd = os.getcwd()
+    session = _sessions.get(cwd)
+    if session is None:
+        session = _sessions[cwd] = GitSession(cwd)
+        atexit.register(session.close)
+    return session
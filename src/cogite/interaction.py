@@ -6,6 +6,8 @@ import subprocess
 import sys
 import tempfile
 
+from . import trace
+
 
 NO_COLOR = "NO_COLOR" in os.environ  # see https://no-color.org/
 
@@ -57,6 +59,7 @@ ANSI_ESCAPE_CODES = {
 }
 
 
+@trace.traced(trace.CATEGORY_INTERACTION)
 def input_from_file(starting_text=''):
     """Ask user for input by opening a file in their preferred editor.
 
@@ -77,6 +80,7 @@ def input_from_file(starting_text=''):
         return path.read_text(encoding="utf-8")
 
 
+@trace.traced(trace.CATEGORY_INTERACTION)
 def confirm(defaults_to_yes, with_edit_choice=False):
     if with_edit_choice:
         choices = ['y', 'e', 'n']
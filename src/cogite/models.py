@@ -1,6 +1,8 @@
 import dataclasses
+import datetime
 import enum
 from typing import List
+from typing import Optional
 
 
 class CommitState(enum.Enum):
@@ -49,6 +51,9 @@ class PullRequestCheck:
     name: str
     state: CommitState
     url: str
+    # Only available for some checks (e.g. GitHub check runs).
+    started_at: Optional[datetime.datetime] = None
+    completed_at: Optional[datetime.datetime] = None
 
 
 @dataclasses.dataclass
@@ -57,11 +62,26 @@ class PullRequestReview:
     author_login: str
 
 
+@dataclasses.dataclass
+class RateLimit:
+    # Cost of the request that returned this information
+    cost: int
+    remaining: int
+    # When the remaining points are reset, if the Git host tells us.
+    reset_at: Optional[datetime.datetime]
+
+
 @dataclasses.dataclass
 class PullRequestStatus:
     sha: str
     checks: List[PullRequestCheck] = dataclasses.field(default_factory=list)
     reviews: List[PullRequestReview] = dataclasses.field(default_factory=list)
+    rate_limit: Optional[RateLimit] = None
+    # Overall state of checks, if the Git host provides it.
+    state: Optional[CommitState] = None
+    # An opaque value that changes whenever a check or a review
+    # changes, if the Git host provides it.
+    marker: Optional[str] = None
 
 
 @dataclasses.dataclass
@@ -1,26 +1,94 @@
 import argparse
+import hashlib
+import importlib
+import os
+import sys
 
-
-try:
-    import importlib.metadata as importlib_metadata
-except ImportError:
-    # Python < 3.8
-    import importlib_metadata  # type: ignore[no-redef]
+from cogite import trace
 
 
 NAMESPACE_CI_URL_GETTER = 'cogite.plugins.ci_url_getter'
 NAMESPACE_COMMANDS = 'cogite.plugins.commands'
 
-
-def get_ci_url_getters():
-    return _get_plugins(NAMESPACE_CI_URL_GETTER)
-
-
-def get_extra_commands():
-    return _get_plugins(NAMESPACE_COMMANDS)
+# Looking up entry points requires reading metadata of all installed
+# distributions, which is slow. We keep an index of our entry points
+# in the cache, and rebuild it only when the environment changes.
+INDEX_CACHE_KEY = 'plugins:{namespace}:{signature}'
+INDEX_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+DISTRIBUTION_METADATA_SUFFIXES = ('.dist-info', '.egg-info', '.egg-link', '.pth')
 
 
-def _get_plugins(namespace):
+@trace.traced(trace.CATEGORY_PLUGINS)
+def get_ci_url_getters():
+    return [_load(entry['value']) for entry in _get_index(NAMESPACE_CI_URL_GETTER)]
+
+
+@trace.traced(trace.CATEGORY_PLUGINS)
+def get_extra_commands(command_words=None, get_parser=None):
+    """Return command plugins.
+
+    If ``command_words`` is given (e.g. ``["pr", "add"]``, as typed on
+    the command line), only plugins that install or modify this
+    command, its parent commands or its subcommands are returned (and
+    imported). Other plugins are irrelevant. ``get_parser`` must then
+    be a function that returns the parser without any plugins: it is
+    used to find out which commands each plugin installs or modifies.
+    """
+    index = _get_index(NAMESPACE_COMMANDS, get_parser)
+    return [
+        _load(entry['value'])
+        for entry in index
+        if command_words is None or _is_relevant(entry['commands'], command_words)
+    ]
+
+
+def _is_relevant(commands, command_words):
+    if commands is None:  # unknown, assume that it is relevant
+        return True
+    command_words = tuple(command_words)
+    for command in commands:
+        command = tuple(command)
+        n = min(len(command), len(command_words))
+        if command[:n] == command_words[:n]:
+            return True
+    return False
+
+
+def _get_environment_signature() -> str:
+    """Return a string that changes whenever a distribution is
+    installed, upgraded or removed.
+    """
+    parts = []
+    for path in sys.path:
+        parts.append(path)
+        try:
+            entries = os.scandir(path or '.')
+        except OSError:  # not a directory, or does not exist
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(DISTRIBUTION_METADATA_SUFFIXES):
+                    parts.append(f'{entry.name}:{entry.stat().st_mtime_ns}')
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _get_index(namespace, get_parser=None):
+    from cogite import cache
+    key = INDEX_CACHE_KEY.format(namespace=namespace, signature=_get_environment_signature())
+    index = cache.get(key)
+    if index is cache.NOT_SET:
+        index = _build_index(namespace, get_parser)
+        cache.set(key, index, ttl=INDEX_CACHE_TTL)
+    return index
+
+
+def _build_index(namespace, get_parser=None):
+    # Imported here because it is slow to import.
+    try:
+        import importlib.metadata as importlib_metadata
+    except ImportError:
+        # Python < 3.8
+        import importlib_metadata
     entry_points = importlib_metadata.entry_points()
     # `select()` appeared in Python 3.10. It is _not_ available in 3.8
     # and 3.9. However, it _is_ available in importlib_metadata (used
@@ -29,7 +97,61 @@ def _get_plugins(namespace):
         entry_points = entry_points.select(group=namespace)
     else:
         entry_points = entry_points.get(namespace, ())
-    return [entry_point.load() for entry_point in entry_points]
+    index = []
+    for entry_point in entry_points:
+        commands = None
+        if get_parser:
+            commands = _get_installed_commands(entry_point.load(), get_parser)
+        index.append({'value': entry_point.value, 'commands': commands})
+    return index
+
+
+def _get_installed_commands(plugin, get_parser):
+    """Return the commands that ``plugin`` installs or modifies."""
+    parser = get_parser()
+    before = _get_parser_signature(parser)
+    plugin().install(parser)
+    after = _get_parser_signature(parser)
+    commands = sorted(
+        list(command)
+        for command, actions in after.items()
+        if before.get(command) != actions
+    )
+    # The plugin may modify the parser in a way that we do not detect.
+    # Do not exclude it: it would never be loaded.
+    return commands or None
+
+
+def _get_parser_signature(parser, command=()):
+    """Return a mapping of each command (as a tuple of words) to the
+    arguments that it accepts and their defaults (including callbacks
+    that are set with ``set_defaults()``).
+    """
+    signature = {
+        command: (
+            tuple(sorted(str(action.option_strings or action.dest) for action in parser._actions)),
+            [(action.dest, action.default) for action in parser._actions],
+            dict(parser._defaults),
+        ),
+    }
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            for name, subparser in action._name_parser_map.items():
+                signature.update(_get_parser_signature(subparser, command + (name, )))
+    return signature
+
+
+def _load(value):
+    """Import and return the object that is referenced by an entry
+    point value, e.g. ``package.module:Class``.
+    """
+    module_name, _, attributes = value.partition(':')
+    # Ignore extras, if any (e.g. "package.module:Class [extra]").
+    attributes = attributes.split('[')[0].strip()
+    obj = importlib.import_module(module_name.strip())
+    for attribute in filter(None, attributes.split('.')):
+        obj = getattr(obj, attribute)
+    return obj
 
 
 class BaseCiUrlGetter:
@@ -0,0 +1,163 @@
+"""Decide when to poll the Git host again, while waiting for checks.
+
+We start with a short interval and back off exponentially while
+nothing changes. The interval is tightened when a pending check is
+expected to complete soon, based on how long it took in previous
+runs. And we never spend more than a share of the remaining rate
+limit of the Git host.
+"""
+
+import statistics
+import time
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from cogite import cache
+from cogite import models
+
+
+BACKOFF_FACTOR = 2
+# Poll this long after a check is expected to complete, to give the
+# Git host a chance to see it.
+EXPECTED_COMPLETION_MARGIN = 2  # seconds
+# If the Git host does not tell when the rate limit is reset, assume
+# that it is reset every hour (like GitHub's).
+DEFAULT_RATE_LIMIT_WINDOW = 60 * 60  # seconds
+
+CHECK_DURATIONS_CACHE_KEY = 'check-durations:{remote_url}'
+CHECK_DURATIONS_CACHE_TTL = 30 * 24 * 60 * 60  # seconds
+# Number of previous runs that are kept for each check.
+MAX_DURATIONS_PER_CHECK = 10
+
+
+class CheckHistory:
+    """Remember how long each check took in its last runs."""
+
+    def __init__(self, remote_url: str):
+        self.cache_key = CHECK_DURATIONS_CACHE_KEY.format(remote_url=remote_url)
+        durations = cache.get(self.cache_key)
+        # {check name: [[url, duration], ...]}
+        self.durations: Dict[str, List[List]] = {} if durations is cache.NOT_SET else durations
+        self.changed = False
+
+    def record(self, checks: List[models.PullRequestCheck]):
+        for check in checks:
+            if not (check.started_at and check.completed_at):
+                continue
+            runs = self.durations.setdefault(check.name, [])
+            if any(url == check.url for url, _duration in runs):
+                continue  # already recorded
+            duration = (check.completed_at - check.started_at).total_seconds()
+            runs.append([check.url, duration])
+            del runs[:-MAX_DURATIONS_PER_CHECK]
+            self.changed = True
+
+    def get_expected_duration(self, name: str) -> Optional[float]:
+        runs = self.durations.get(name)
+        if not runs:
+            return None
+        return statistics.median(duration for _url, duration in runs)
+
+    def save(self):
+        if self.changed:
+            cache.set(self.cache_key, self.durations, ttl=CHECK_DURATIONS_CACHE_TTL)
+            self.changed = False
+
+
+def _get_signature(status: models.PullRequestStatus) -> Tuple:
+    return (
+        status.sha,
+        tuple((check.name, check.state) for check in status.checks),
+        tuple((review.author_login, review.state) for review in status.reviews),
+    )
+
+
+class PollScheduler:
+    """Return how long to wait before the next poll.
+
+    ``min_interval`` and ``max_interval`` are in seconds.
+    ``budget_share`` is the share of the remaining rate limit (e.g.
+    0.1 for 10%) that we allow ourselves to spend until it is reset.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        budget_share: float,
+        history: Optional[CheckHistory] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.budget_share = budget_share
+        self.history = history
+        self.clock = clock
+        self.interval = min_interval
+        self._signature: Optional[Tuple] = None
+
+    def get_next_interval(self, status: models.PullRequestStatus) -> float:
+        now = self.clock()
+        if self.history:
+            self.history.record(status.checks)
+
+        signature = _get_signature(status)
+        if signature != self._signature:
+            interval = self.min_interval
+        else:
+            interval = min(self.interval * BACKOFF_FACTOR, self.max_interval)
+        self._signature = signature
+
+        expected_completion = self._get_next_expected_completion(status, now)
+        if expected_completion is not None:
+            interval = min(interval, max(expected_completion - now, self.min_interval))
+
+        self.interval = interval
+        return max(interval, self._get_budget_interval(status.rate_limit, now))
+
+    def _get_next_expected_completion(self, status: models.PullRequestStatus, now: float) -> Optional[float]:
+        """Return when the first pending check is expected to complete
+        (as a timestamp), or None if we do not know.
+        """
+        if not self.history:
+            return None
+        expected = []
+        for check in status.checks:
+            if check.state != models.CommitState.PENDING or not check.started_at:
+                continue
+            duration = self.history.get_expected_duration(check.name)
+            if duration is None:
+                continue
+            completion = check.started_at.timestamp() + duration + EXPECTED_COMPLETION_MARGIN
+            # Ignore checks that are already late: we do not know when
+            # they will complete.
+            if completion > now:
+                expected.append(completion)
+        return min(expected, default=None)
+
+    def _get_budget_interval(self, rate_limit: Optional[models.RateLimit], now: float) -> float:
+        """Return the minimum interval that keeps us within our share
+        of the remaining rate limit.
+        """
+        if not rate_limit:
+            return 0
+        until_reset: float = DEFAULT_RATE_LIMIT_WINDOW
+        if rate_limit.reset_at is not None:
+            until_reset = max(rate_limit.reset_at.timestamp() - now, 0)
+        n_polls = self.budget_share * rate_limit.remaining / max(rate_limit.cost, 1)
+        if n_polls < 1:
+            return until_reset
+        return until_reset / n_polls
+
+
+def get_scheduler(context) -> PollScheduler:
+    configuration = context.configuration
+    return PollScheduler(
+        min_interval=configuration.status_poll_frequency,
+        max_interval=configuration.status_poll_max_interval,
+        budget_share=configuration.status_poll_rate_limit_share,
+        history=CheckHistory(context.remote_url),
+    )
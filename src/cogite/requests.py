@@ -1,18 +1,45 @@
+import collections
 import dataclasses
+import http.client
+import io
 from json import JSONDecodeError
 from json import dumps as json_dumps
 from json import loads as json_loads
+import os
+import pathlib
+import re
+import select
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 import urllib.error
 import urllib.parse
 import urllib.request
 
 from cogite import errors
+from cogite import trace
 from cogite.version import VERSION
 
 
 TIMEOUT = 2  # seconds
 
+# Set this environment variable to record requests and their
+# responses to a file ("record:<path>"), or to replay them from a file
+# with the recorded timing ("replay:<path>") or as fast as possible
+# ("replay-fast:<path>"). See `Cassette`.
+CASSETTE_ENV_VAR = 'COGITE_CASSETTE'
+
+GRAPHQL_OPERATION_REGEXP = re.compile(r'\s*(query|mutation)\s+(?P<name>\w+)')
+
+# Requests that may be sent twice without any other effect. GraphQL
+# queries (but not mutations) are too, although they are sent with
+# POST.
+IDEMPOTENT_METHODS = ('DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT')
+
 
 @dataclasses.dataclass
 class Response:
@@ -21,7 +48,324 @@ class Response:
     data: Optional[dict]
 
 
-def send(method, url, query=None, data=None, json=None, headers=None):
+# Errors that we get when we reuse a connection that the server has
+# closed in the meantime (because it had been idle for too long).
+STALE_CONNECTION_ERRORS = (
+    BrokenPipeError,
+    ConnectionResetError,
+    http.client.BadStatusLine,  # includes `RemoteDisconnected`
+)
+
+
+@dataclasses.dataclass
+class PooledResponse:
+    """A fully read response, with the same interface as what
+    ``urllib.request.urlopen()`` returns (or, at least, the subset
+    that we use).
+    """
+    status: int
+    reason: str
+    headers: http.client.HTTPMessage
+    content: bytes
+
+    def read(self):
+        return self.content
+
+
+class ConnectionPool:
+    """Keep idle (keep-alive) HTTP connections around, keyed by
+    scheme and host, so that successive requests to the same host
+    do not pay for a new TCP (and TLS) handshake each time.
+
+    Connections are never shared: a connection is taken out of the
+    pool for the duration of a request and put back afterwards. This
+    makes the pool safe to use from multiple threads.
+    """
+
+    def __init__(self, timeout=TIMEOUT):
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _new_connection(self, scheme, host, timeout):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, timeout=timeout)
+        if scheme == 'http':
+            return http.client.HTTPConnection(host, timeout=timeout)
+        raise ValueError(f"Unsupported URL scheme: {scheme}")
+
+    def _acquire(self, key):
+        while True:
+            with self._lock:
+                if not self._idle[key]:
+                    return None, False
+                connection = self._idle[key].pop()
+            if not _is_dropped(connection):
+                return connection, True
+            connection.close()
+
+    def _release(self, key, connection):
+        with self._lock:
+            self._idle[key].append(connection)
+
+    def urlopen(self, request: urllib.request.Request, timeout=None):
+        """Send ``request`` and return a ``PooledResponse``.
+
+        This function behaves like ``urllib.request.urlopen()``: it
+        raises ``urllib.error.HTTPError`` if the response status is
+        not 2xx.
+        """
+        timeout = timeout or self.timeout
+        parsed = urllib.parse.urlsplit(request.full_url)
+        scheme = parsed.scheme
+        # Let urllib handle proxies, we do not want to reimplement that.
+        hostname = parsed.hostname or ''
+        if scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(hostname):
+            return urllib.request.urlopen(request, timeout=timeout)
+
+        key = (scheme, parsed.netloc)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        headers = dict(request.header_items())
+        method = request.get_method()
+
+        connection, reused = self._acquire(key)
+        if not connection:
+            connection = self._new_connection(scheme, parsed.netloc, timeout)
+        sent = False
+        try:
+            connection.request(method, path, body=request.data, headers=headers)
+            sent = True
+            response = connection.getresponse()
+            content = response.read()
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            if sent and not _is_idempotent(method, request.data):
+                # The server may have processed the request before
+                # closing the connection. It must not be sent twice
+                # (e.g. a mutation that creates a pull request).
+                raise
+            # The server closed the idle connection. Retry once with a
+            # fresh connection.
+            connection = self._new_connection(scheme, parsed.netloc, timeout)
+            try:
+                response, content = self._send(connection, method, path, request.data, headers)
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        result = PooledResponse(
+            status=response.status,
+            reason=response.reason,
+            headers=response.headers,
+            content=content,
+        )
+        if not 200 <= result.status < 300:
+            raise urllib.error.HTTPError(
+                request.full_url, result.status, result.reason, result.headers, io.BytesIO(result.content),
+            )
+        return result
+
+    def _send(self, connection, method, path, body, headers):
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        # The body must be fully read before the connection can be reused.
+        return response, response.read()
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+def _is_dropped(connection: http.client.HTTPConnection) -> bool:
+    """Return whether the server has closed an idle connection.
+
+    An idle connection should have nothing to read: if it is readable,
+    the server has closed it (or sent something unexpected).
+    """
+    if connection.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _is_idempotent(method: str, body) -> bool:
+    if method in IDEMPOTENT_METHODS:
+        return True
+    if not isinstance(body, bytes):
+        return False
+    try:
+        query = json_loads(body).get('query')
+    except (ValueError, AttributeError):
+        return False
+    if not isinstance(query, str):
+        return False
+    if query.lstrip().startswith('{'):  # shorthand syntax for a query
+        return True
+    match = GRAPHQL_OPERATION_REGEXP.match(query)
+    return match is not None and match.group(1) == 'query'
+
+
+def _make_headers(items) -> http.client.HTTPMessage:
+    headers = http.client.HTTPMessage()
+    for name, value in items:
+        headers[name] = value
+    return headers
+
+
+class Cassette:
+    """Record HTTP requests and their responses to a file, or replay
+    them from a file, without any network access.
+
+    The file holds one JSON object per line and per request, with the
+    method, URL and body of the request, the status, headers and
+    content of the response, and the time it took. Request headers
+    (including the authentication token) are not recorded.
+
+    When replaying, requests are matched on their method, URL and
+    body. Identical requests get their recorded responses in order;
+    once they are exhausted, the last one is repeated (which comes in
+    handy when polling for the status of a pull request).
+    """
+
+    def __init__(self, mode: str, path: pathlib.Path):
+        if mode not in ('record', 'replay', 'replay-fast'):
+            raise errors.FatalError(
+                f"Invalid value for {CASSETTE_ENV_VAR}: expected "
+                f"record:<path>, replay:<path> or replay-fast:<path>."
+            )
+        self.mode = mode
+        self.path = path
+        self._lock = threading.Lock()
+        self._recordings: Dict[Tuple[str, str, str], List[dict]] = collections.defaultdict(list)
+        try:
+            if mode == 'record':
+                # Start with an empty cassette.
+                path.write_text('')
+            else:
+                self._load()
+        except OSError as exc:
+            raise errors.FatalError(f"Could not open cassette: {exc}") from exc
+
+    @classmethod
+    def from_env(cls) -> Optional['Cassette']:
+        value = os.environ.get(CASSETTE_ENV_VAR)
+        if not value:
+            return None
+        mode, _sep, path = value.partition(':')
+        return cls(mode, pathlib.Path(path))
+
+    @staticmethod
+    def _get_key(method: str, url: str, body: Optional[bytes]) -> Tuple[str, str, str]:
+        return (method, url, (body or b'').decode('utf-8'))
+
+    def _load(self):
+        for line in self.path.read_text().splitlines():
+            if line.strip():
+                recording = json_loads(line)
+                key = self._get_key(recording['method'], recording['url'], recording['body'].encode('utf-8'))
+                self._recordings[key].append(recording)
+
+    def wrap(self, opener: Callable) -> Callable:
+        """Return an ``urlopen()``-like function that records or
+        replays requests, instead of (or on top of) ``opener``.
+        """
+        if self.mode == 'record':
+            return lambda request, timeout=None: self._record(opener, request, timeout)
+        return lambda request, timeout=None: self._replay(request)
+
+    def _record(self, opener, request: urllib.request.Request, timeout):
+        start = time.perf_counter()
+        try:
+            response = opener(request, timeout=timeout)
+            status, reason, headers = response.status, response.reason, response.headers
+            content = response.read()
+        except urllib.error.HTTPError as exc:
+            status, reason, headers = exc.code, exc.reason, exc.headers
+            content = exc.file.read()
+        duration = time.perf_counter() - start
+        recording = {
+            'method': request.get_method(),
+            'url': request.full_url,
+            'body': (request.data or b'').decode('utf-8'),  # type: ignore[union-attr]
+            'status': status,
+            'reason': reason,
+            'headers': list(headers.items()),
+            'content': content.decode('utf-8'),
+            'duration': duration,
+        }
+        with self._lock:
+            with self.path.open('a') as fp:
+                fp.write(json_dumps(recording) + '\n')
+        return self._make_response(request, recording)
+
+    def _replay(self, request: urllib.request.Request):
+        key = self._get_key(request.get_method(), request.full_url, request.data)  # type: ignore[arg-type]
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                raise errors.FatalError(
+                    f"No recorded response in {self.path} for {key[0]} request "
+                    f"to {key[1]} with body: {key[2]}"
+                )
+            recording = recordings.pop(0) if len(recordings) > 1 else recordings[0]
+        if self.mode == 'replay':
+            time.sleep(recording['duration'])
+        return self._make_response(request, recording)
+
+    def _make_response(self, request: urllib.request.Request, recording: dict) -> PooledResponse:
+        response = PooledResponse(
+            status=recording['status'],
+            reason=recording['reason'],
+            headers=_make_headers(recording['headers']),
+            content=recording['content'].encode('utf-8'),
+        )
+        if not 200 <= response.status < 300:
+            raise urllib.error.HTTPError(
+                request.full_url, response.status, response.reason, response.headers, io.BytesIO(response.content),
+            )
+        return response
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    global _cassette  # pylint: disable=global-statement
+    with _cassette_lock:
+        if _cassette is None and os.environ.get(CASSETTE_ENV_VAR):
+            _cassette = Cassette.from_env()
+        return _cassette
+
+
+def _get_span_name(method, url, json) -> str:
+    name = f"{method} {url}"
+    if json and isinstance(json.get('query'), str):
+        match = GRAPHQL_OPERATION_REGEXP.match(json['query'])
+        if match:
+            name += f" ({match.group('name')})"
+    return name
+
+
+def send(method, url, query=None, data=None, json=None, headers=None, opener=None):
     if query:
         url += "?" + urllib.parse.urlencode(query)
     if bool(json) and bool(data):
@@ -42,8 +386,13 @@ def send(method, url, query=None, data=None, json=None, headers=None):
         headers=headers,
         method=method,
     )
+    opener = opener or urllib.request.urlopen
+    cassette = get_cassette()
+    if cassette:
+        opener = cassette.wrap(opener)
     try:
-        return urllib.request.urlopen(request, timeout=TIMEOUT)
+        with trace.span(_get_span_name(method, url, json), trace.CATEGORY_HTTP):
+            return opener(request, timeout=TIMEOUT)
     except urllib.error.HTTPError as exc:
         content = exc.file.read().decode('utf-8')
         try:
@@ -56,6 +405,8 @@ def send(method, url, query=None, data=None, json=None, headers=None):
             f"Here is the response body: {json or content}"
         )
         raise errors.FatalError(error)
+    except errors.FatalError:
+        raise
     except Exception as exc:
         error = f"Got error when sending {method} request to {url}: {exc}"
         # We could perhaps raise a more specific error (such as
@@ -68,6 +419,10 @@ class Session:
         self.headers = {
             "Authorization": f"bearer {auth_token}",
         }
+        self.pool = ConnectionPool()
+
+    def close(self):
+        self.pool.close()
 
     def request(self, method, url, query=None, data=None, json=None) -> Response:
         response = send(
@@ -76,7 +431,8 @@ class Session:
             query=query,
             data=data,
             json=json,
-            headers=self.headers,
+            headers=dict(self.headers),
+            opener=self.pool.urlopen,
         )
         res = Response(
             status_code=response.status,
@@ -1,18 +1,42 @@
+import collections
 import dataclasses
 import os
+import queue
 import re
+import selectors
+import shutil
 import subprocess
+import threading
 import typing
 
 from . import errors
 from . import spinner
+from . import trace
+
+
+# `run_streaming()` keeps at most this number of lines of output.
+MAX_OUTPUT_LINES = 200
+READ_CHUNK_SIZE = 64 * 1024
 
 
 @dataclasses.dataclass
 class CommandResult:
     returncode: int
-    stdout: str
-    stderr: str
+    # Lines of stdout and stderr (see `get_lines()`).
+    stdout: typing.List[str]
+    stderr: typing.List[str]
+    # Lines of stdout and stderr, in the order in which they have
+    # been written. Only filled by `run_streaming()`.
+    output: typing.List[str] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class OutputLine:
+    stream: str  # "stdout" or "stderr"
+    text: str
+    # A transient line is meant to be overwritten by the next one
+    # (e.g. progress that `git` reports with carriage returns).
+    transient: bool = False
 
 
 def get_lines(bytestring):
@@ -25,12 +49,13 @@ def get_lines(bytestring):
 
 
 def _run(command: str):
-    result = subprocess.run(
-        command.split(' '),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=False,
-    )
+    with trace.span(command, trace.CATEGORY_SHELL):
+        result = subprocess.run(
+            command.split(' '),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
     return CommandResult(
         returncode=result.returncode,
         stdout=get_lines(result.stdout),
@@ -60,14 +85,173 @@ def run(
                 sp.failure()
 
     if check_ok and result.returncode not in expected_returncodes:
-        if result.stderr:
-            # XXX: Printing stdout and *then* stderr may not
-            # correspond to the order in which the output would have
-            # appeared if we had not captured it.
-            err = f"[[error]] Got the following output when running `{command}`:{os.linesep}"
-            err += os.linesep.join(result.stdout + result.stderr)
+        # XXX: Printing stdout and *then* stderr may not correspond
+        # to the order in which the output would have appeared if we
+        # had not captured it. Use `run_streaming()` if that matters.
+        _raise_error(command, result.stderr, result.stdout + result.stderr)
+
+    return result
+
+
+def _raise_error(command: str, stderr: typing.List[str], output: typing.Iterable[str]):
+    if stderr:
+        err = f"[[error]] Got the following output when running `{command}`:{os.linesep}"
+        err += os.linesep.join(output)
+    else:
+        err = f"[[error]] Got an empty error when running `{command}`."
+    raise errors.FatalError(err)
+
+
+def run_streaming(
+    command: str,
+    check_ok: bool = True,
+    expected_returncodes: typing.Iterable[int] = (0,),
+    progress: typing.Optional[str] = None,
+    on_success: typing.Optional[str] = None,
+    on_failure: typing.Optional[str] = None,
+    max_lines: int = MAX_OUTPUT_LINES,
+) -> CommandResult:
+    """Run a command like ``run()``, but read its output as it comes.
+
+    The latest line is shown in the spinner (if ``progress`` is
+    given). Only the last ``max_lines`` lines of stdout and stderr are
+    kept. The error report shows them in the order in which they have
+    been written.
+    """
+    stdout: typing.Deque[str] = collections.deque(maxlen=max_lines)
+    stderr: typing.Deque[str] = collections.deque(maxlen=max_lines)
+    output: typing.Deque[str] = collections.deque(maxlen=max_lines)
+    lines = {'stdout': stdout, 'stderr': stderr}
+
+    def _consume(process, sp=None):
+        for line in iter_output(process):
+            if sp:
+                sp.update(_get_progress_text(progress, line.text))
+            if not line.transient:
+                lines[line.stream].append(line.text)
+                output.append(line.text)
+        return process.wait()
+
+    with trace.span(command, trace.CATEGORY_SHELL), subprocess.Popen(
+        command.split(' '),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as process:
+        if not progress:
+            returncode = _consume(process)
         else:
-            err = f"[[error]] Got an empty error when running `{command}`."
-        raise errors.FatalError(err)
+            on_success = on_success or progress
+            on_failure = on_failure or progress
+            with spinner.Spinner(progress, on_success, on_failure) as sp:
+                returncode = _consume(process, sp)
+                if returncode in expected_returncodes:
+                    sp.success()
+                else:
+                    sp.failure()
 
+    result = CommandResult(
+        returncode=returncode,
+        stdout=list(stdout),
+        stderr=list(stderr),
+        output=list(output),
+    )
+    if check_ok and result.returncode not in expected_returncodes:
+        _raise_error(command, result.stderr, result.output)
     return result
+
+
+def _get_progress_text(progress: str, line: str) -> str:
+    width = shutil.get_terminal_size().columns - len(progress) - 5  # room for the spinner
+    if width < 10:
+        return progress
+    if len(line) > width:
+        line = line[:width - 1] + '…'
+    return f"{progress} {line}"
+
+
+def iter_output(process: subprocess.Popen) -> typing.Iterator[OutputLine]:
+    """Yield lines of stdout and stderr of ``process`` as they come.
+
+    Like ``get_lines()``, empty lines are skipped and text followed by
+    "\\r" is considered as overwritten. Such text is still yielded,
+    as a transient line.
+    """
+    pending = {'stdout': b'', 'stderr': b''}
+    if os.name == 'posix':
+        chunks = _read_chunks_with_selector(process)
+    else:  # pipes cannot be selected on Windows
+        chunks = _read_chunks_with_threads(process)
+    for stream, chunk in chunks:
+        if not chunk:  # end of file
+            lines, pending[stream] = pending[stream].split(b'\n'), b''
+        else:
+            lines = (pending[stream] + chunk).split(b'\n')
+            pending[stream] = lines.pop()
+        for line in lines:
+            text = _decode_line(line)
+            if text:
+                yield OutputLine(stream, text)
+        # Show the progress that is being reported on the incomplete
+        # line, if any.
+        *overwritten, rest = pending[stream].split(b'\r')
+        if overwritten:
+            # Only keep the latest progress, so that memory use does
+            # not grow with the number of updates.
+            pending[stream] = overwritten[-1] + b'\r' + rest
+            text = overwritten[-1].decode('utf-8', errors='replace')
+            if text:
+                yield OutputLine(stream, text, transient=True)
+
+
+def _decode_line(line: bytes) -> str:
+    text = line.decode('utf-8', errors='replace')
+    # Remove text if it's followed by "\r" (see `get_lines()`).
+    return re.sub(r".*\r", "", text.rstrip('\r'))
+
+
+def _read_chunks_with_selector(
+    process: subprocess.Popen,
+) -> typing.Iterator[typing.Tuple[str, bytes]]:
+    """Yield ``(stream, chunk)`` tuples, where ``chunk`` is empty at
+    the end of the stream.
+    """
+    with selectors.DefaultSelector() as selector:
+        for stream, pipe in (('stdout', process.stdout), ('stderr', process.stderr)):
+            assert pipe  # for mypy
+            os.set_blocking(pipe.fileno(), False)
+            selector.register(pipe, selectors.EVENT_READ, stream)
+        while selector.get_map():
+            for key, _events in selector.select():
+                try:
+                    chunk = os.read(key.fileobj.fileno(), READ_CHUNK_SIZE)  # type: ignore[union-attr]
+                except BlockingIOError:
+                    continue
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                yield key.data, chunk
+
+
+def _read_chunks_with_threads(
+    process: subprocess.Popen,
+) -> typing.Iterator[typing.Tuple[str, bytes]]:
+    chunks: queue.Queue = queue.Queue()
+
+    def _read(stream, pipe):
+        while True:
+            chunk = pipe.read1(READ_CHUNK_SIZE)
+            chunks.put((stream, chunk))
+            if not chunk:
+                return
+
+    threads = [
+        threading.Thread(target=_read, args=(stream, pipe), daemon=True)
+        for stream, pipe in (('stdout', process.stdout), ('stderr', process.stderr))
+    ]
+    for thread in threads:
+        thread.start()
+    n_open = len(threads)
+    while n_open:
+        stream, chunk = chunks.get()
+        if not chunk:
+            n_open -= 1
+        yield stream, chunk
@@ -1,5 +1,3 @@
-import yaspin
-
 from cogite import interaction
 
 
@@ -9,6 +7,9 @@ class Spinner:
         self.on_success = on_success
         self.on_failure = on_failure
 
+    def update(self, text):
+        self._spinner.text = text
+
     def success(self):
         self._spinner.text = self.on_success
         self._spinner.ok(interaction.interpret_rich_text('[[success]]'))
@@ -18,6 +19,7 @@ class Spinner:
         self._spinner.fail(interaction.interpret_rich_text('[[error]]'))
 
     def __enter__(self):
+        import yaspin  # imported here because it is slow to import
         self._spinner = yaspin.yaspin(text=self.progress).__enter__()
         return self
 
@@ -0,0 +1,162 @@
+"""A curses screen that shows a header and a scrollable list of lines,
+used by ``cogite status --poll``.
+
+The list is virtual: only the lines that fit on the screen are drawn,
+so hundreds of checks cost the same as a handful. The view remembers
+what each row of the screen shows, and only repaints rows that have
+changed since the previous frame.
+"""
+
+import curses
+import dataclasses
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from cogite import interaction
+
+
+HEADER_HEIGHT = 2  # the header and an empty line
+FOOTER_HEIGHT = 1
+# The rich text of each line is interpreted only once. Past this
+# number of lines, the cache is emptied.
+MAX_CACHED_LINES = 4096
+
+KEY_SCROLL_UP = (curses.KEY_UP, ord('k'))
+KEY_SCROLL_DOWN = (curses.KEY_DOWN, ord('j'))
+KEY_PAGE_UP = (curses.KEY_PPAGE,)
+KEY_PAGE_DOWN = (curses.KEY_NPAGE, ord(' '))
+KEY_HOME = (curses.KEY_HOME, ord('g'))
+KEY_END = (curses.KEY_END, ord('G'))
+
+# What a row of the screen shows: a text and its curses attributes.
+Row = Tuple[str, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class Line:
+    rich_text: str
+    # A curses color (e.g. `curses.COLOR_GREEN`), or -1 for the
+    # default color.
+    color: int = -1
+
+
+def init_colors():
+    """Initialize a color pair for each color, with the default
+    background. Each pair has the same number as its color.
+    """
+    curses.start_color()
+    curses.use_default_colors()
+    for i in range(0, curses.COLORS):
+        curses.init_pair(i, i, -1)
+
+
+class StatusView:
+    def __init__(self, screen):
+        self.screen = screen
+        self.header = ""
+        self.lines: List[Line] = []
+        self.empty_text = ""
+        self.offset = 0  # index of the first visible line
+        self._size = (0, 0)
+        self._frame: List[Optional[Row]] = []
+        self._texts: Dict[str, str] = {}
+
+    def set_content(self, header: str, lines: List[Line], empty_text: str = ""):
+        """Set the content of the view. ``empty_text`` is shown if
+        there is no line. Call ``render()`` to show it.
+        """
+        self.header = header
+        self.lines = lines
+        self.empty_text = empty_text
+
+    @property
+    def list_height(self) -> int:
+        height, _width = self.screen.getmaxyx()
+        return max(height - HEADER_HEIGHT - FOOTER_HEIGHT, 1)
+
+    def scroll(self, delta: int):
+        self.offset += delta
+        self._clamp_offset()
+
+    def handle_key(self, key: int) -> bool:
+        """Scroll or redraw the view if ``key`` is one of ours. Return
+        whether it was.
+        """
+        if key in KEY_SCROLL_UP:
+            self.scroll(-1)
+        elif key in KEY_SCROLL_DOWN:
+            self.scroll(1)
+        elif key in KEY_PAGE_UP:
+            self.scroll(-self.list_height)
+        elif key in KEY_PAGE_DOWN:
+            self.scroll(self.list_height)
+        elif key in KEY_HOME:
+            self.scroll(-len(self.lines))
+        elif key in KEY_END:
+            self.scroll(len(self.lines))
+        elif key == curses.KEY_RESIZE:
+            pass  # `render()` notices that the size has changed
+        else:
+            return False
+        self.render()
+        return True
+
+    def render(self):
+        size = self.screen.getmaxyx()
+        if size != self._size:
+            # Everything must be repainted.
+            self._size = size
+            self._frame = [None] * size[0]
+            self.screen.erase()
+        self._clamp_offset()
+        for y, row in enumerate(self._compose()):
+            if self._frame[y] != row:
+                self._paint(y, row)
+                self._frame[y] = row
+        self.screen.noutrefresh()
+        curses.doupdate()
+
+    def _clamp_offset(self):
+        self.offset = max(0, min(self.offset, len(self.lines) - self.list_height))
+
+    def _compose(self) -> List[Row]:
+        """Return the rows of the screen."""
+        height, _width = self._size
+        rows: List[Row] = [(self.header, 0), ("", 0)]
+        visible = self.lines[self.offset:self.offset + self.list_height]
+        if not self.lines:
+            rows.append((self.empty_text, 0))
+        for line in visible:
+            attr = curses.color_pair(line.color) if line.color >= 0 else 0
+            rows.append((self._get_text(line.rich_text), attr))
+        if len(self.lines) > self.list_height:
+            rows += [("", 0)] * (height - FOOTER_HEIGHT - len(rows))
+            last = self.offset + len(visible)
+            rows.append((
+                f"{self.offset + 1}-{last} of {len(self.lines)} "
+                f"(scroll with arrows, PgUp and PgDn)",
+                curses.A_DIM,
+            ))
+        rows += [("", 0)] * (height - len(rows))
+        return rows[:height]
+
+    def _get_text(self, rich_text: str) -> str:
+        text = self._texts.get(rich_text)
+        if text is None:
+            if len(self._texts) >= MAX_CACHED_LINES:
+                self._texts.clear()
+            text = interaction.interpret_rich_text(rich_text, context=interaction.OutputContext.CURSES)
+            self._texts[rich_text] = text
+        return text
+
+    def _paint(self, y: int, row: Row):
+        text, attr = row
+        _height, width = self._size
+        self.screen.move(y, 0)
+        self.screen.clrtoeol()
+        if text:
+            # Writing in the last column of the last row raises an
+            # error. Leave it empty.
+            self.screen.addnstr(y, 0, text, width - 1, attr)
@@ -0,0 +1,167 @@
+"""Watch the status of a pull request until its checks are complete,
+for ``cogite status --poll``.
+
+Requests to the Git host run in a background thread, while the event
+loop keeps handling keys: the user may scroll, force a refresh, open a
+failing check or quit at any time. If the user quits while a request
+is in progress, it is abandoned. Polls are sent one at a time, so that
+successive polls reuse the same keep-alive connection of the client.
+"""
+
+import asyncio
+import time
+from typing import Callable
+from typing import List
+from typing import Optional
+
+from cogite import background
+from cogite import models
+from cogite import polling
+from cogite import status_view
+
+
+KEY_QUIT = (ord('q'), 27)  # "q" or Escape
+KEY_REFRESH = (ord('r'),)
+KEY_OPEN = (ord('o'), ord('\n'))
+HELP = "r: refresh, o: open failing check, q: quit"
+
+
+class StatusWatcher:
+    def __init__(
+        self,
+        client,
+        status: models.PullRequestStatus,
+        scheduler: polling.PollScheduler,
+        view: status_view.StatusView,
+        get_lines: Callable[[models.PullRequestStatus], List[status_view.Line]],
+        input_fd: Optional[int] = None,
+    ):
+        self.client = client
+        self.status = status
+        self.scheduler = scheduler
+        self.view = view
+        self.get_lines = get_lines
+        self.input_fd = input_fd
+        self.next_poll_at: Optional[float] = None  # `time.monotonic()`
+        self._quit = False
+        # Created in `run()`, because they must belong to its loop
+        # (before Python 3.10).
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self) -> models.PullRequestStatus:
+        """Poll the Git host until all checks are complete or until
+        the user quits. Return the latest status.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        if self.input_fd is not None:
+            self.view.screen.nodelay(True)
+            self._loop.add_reader(self.input_fd, self._on_input)
+        try:
+            while True:
+                self._show()
+                if self._quit or self._is_complete():
+                    break
+                await self._sleep(self.scheduler.get_next_interval(self.status))
+                if self._quit:
+                    break
+                self.next_poll_at = None
+                self._show()
+                fetch = asyncio.wrap_future(
+                    background.run(self.client.get_pull_request_status, previous=self.status),
+                )
+                if not await self._wait_unless_quit(fetch):
+                    break
+                self.status = fetch.result()
+        finally:
+            if self.input_fd is not None:
+                self._loop.remove_reader(self.input_fd)
+        return self.status
+
+    def handle_key(self, key: int):
+        if key in KEY_QUIT:
+            self._quit = True
+            self._wake_up()
+        elif key in KEY_REFRESH:
+            self._wake_up()
+        elif key in KEY_OPEN:
+            self._open_failing_check()
+        else:
+            self.view.handle_key(key)
+
+    def _on_input(self):
+        while True:
+            key = self.view.screen.getch()
+            if key == -1:
+                break
+            self.handle_key(key)
+
+    def _wake_up(self):
+        assert self._wake
+        self._wake.set()
+
+    def _is_complete(self) -> bool:
+        return bool(self.status.checks) and not any(
+            check.state == models.CommitState.PENDING
+            for check in self.status.checks
+        )
+
+    async def _sleep(self, seconds: float):
+        """Sleep for ``seconds``, unless woken up by the user. Update
+        the countdown in the header every second.
+        """
+        assert self._wake
+        self._wake.clear()
+        self.next_poll_at = time.monotonic() + seconds
+        while not self._wake.is_set():
+            remaining = self.next_poll_at - time.monotonic()
+            if remaining <= 0:
+                break
+            self._show()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(remaining, 1))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _wait_unless_quit(self, future: asyncio.Future) -> bool:
+        """Wait for ``future``. Return False if the user quits before
+        it is done.
+        """
+        assert self._wake
+        self._wake.clear()
+        waiter = asyncio.ensure_future(self._wake.wait())
+        try:
+            while not future.done():
+                await asyncio.wait({future, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                if self._quit:
+                    # Abandon the request, which is left to complete
+                    # in its thread.
+                    future.cancel()
+                    return False
+                if waiter.done():  # woken up for another reason, keep waiting
+                    self._wake.clear()
+                    waiter = asyncio.ensure_future(self._wake.wait())
+        finally:
+            waiter.cancel()
+        return True
+
+    def _open_failing_check(self):
+        for check in self.status.checks:
+            if check.state in (models.CommitState.ERROR, models.CommitState.FAILURE):
+                # Imported here because it is slow to import.
+                import webbrowser
+
+                # Some browsers block until they exit.
+                background.run(webbrowser.open, check.url)
+                return
+
+    def _show(self):
+        if self.next_poll_at is None:
+            state = "refreshing..."
+        else:
+            remaining = max(self.next_poll_at - time.monotonic(), 0)
+            state = f"refresh in {remaining:.0f}s"
+        header = f"Waiting for checks ({state}). {HELP}"
+        self.view.set_content(header, self.get_lines(self.status), "No check yet.")
+        self.view.render()
@@ -0,0 +1,186 @@
+"""Measure how long each phase of a command takes.
+
+Tracing is disabled by default, and then costs (almost) nothing. When
+it is enabled (with ``cogite --profile`` or with the ``COGITE_TRACE``
+environment variable), every Git command, HTTP request, configuration
+loading, etc. is recorded as a timed span. A summary is printed at the
+end, and spans can be exported as a Chrome trace-event file, which can
+be opened in ``chrome://tracing`` or https://ui.perfetto.dev/.
+
+Spans of the ``interaction`` category measure how long we wait for the
+user (to answer a question, edit a pull request description, etc.).
+This time is excluded from the total duration of the command.
+"""
+
+import contextlib
+import dataclasses
+import functools
+import os
+import sys
+import threading
+import time
+import typing
+
+
+TRACE_ENV_VAR = 'COGITE_TRACE'
+
+CATEGORY_COMMAND = 'command'
+CATEGORY_CONFIG = 'config'
+CATEGORY_GIT = 'git'
+CATEGORY_HTTP = 'http'
+CATEGORY_INTERACTION = 'interaction'
+CATEGORY_PLUGINS = 'plugins'
+CATEGORY_SHELL = 'shell'
+
+# Number of spans that are listed in the summary.
+N_SLOWEST_SPANS = 10
+
+
+@dataclasses.dataclass
+class Span:
+    name: str
+    category: str
+    start: float  # seconds, as returned by `time.perf_counter()`
+    duration: float = 0.0
+    thread_id: int = 0
+    args: typing.Dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+
+
+class Tracer:
+    def __init__(self, path: typing.Optional[str] = None):
+        self.path = path
+        self.spans: typing.List[Span] = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str, **args):
+        new_span = Span(
+            name=name,
+            category=category,
+            start=time.perf_counter(),
+            thread_id=threading.get_ident(),
+            args=args,
+        )
+        try:
+            yield new_span
+        finally:
+            new_span.duration = time.perf_counter() - new_span.start
+            with self._lock:
+                self.spans.append(new_span)
+
+    def get_chrome_trace(self) -> dict:
+        """Return spans in the Chrome trace-event format."""
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {
+                    'name': recorded.name,
+                    'cat': recorded.category,
+                    'ph': 'X',  # complete event
+                    'ts': round((recorded.start - self.origin) * 1e6, 1),  # microseconds
+                    'dur': round(recorded.duration * 1e6, 1),
+                    'pid': pid,
+                    'tid': recorded.thread_id,
+                    'args': recorded.args,
+                }
+                for recorded in sorted(self.spans, key=lambda recorded: recorded.start)
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def write_chrome_trace(self, path: str):
+        import json
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as fp:
+            json.dump(self.get_chrome_trace(), fp)
+
+    def get_summary(self) -> str:
+        total = time.perf_counter() - self.origin
+        by_category: typing.Dict[str, typing.List[Span]] = {}
+        for recorded in self.spans:
+            by_category.setdefault(recorded.category, []).append(recorded)
+        interaction = sum(
+            recorded.duration for recorded in by_category.get(CATEGORY_INTERACTION, ())
+        )
+
+        lines = [
+            f"Total: {total:.3f}s, including {interaction:.3f}s of user "
+            f"interaction (excluded: {total - interaction:.3f}s)",
+            "",
+            f"{'category':<12} {'count':>6} {'total':>9}",
+        ]
+        for category, spans in sorted(by_category.items()):
+            if category == CATEGORY_COMMAND:
+                continue
+            duration = sum(recorded.duration for recorded in spans)
+            lines.append(f"{category:<12} {len(spans):>6} {duration:>8.3f}s")
+
+        lines += ["", f"Slowest spans (excluding {CATEGORY_INTERACTION}):"]
+        slowest = sorted(
+            (
+                recorded for recorded in self.spans
+                if recorded.category not in (CATEGORY_COMMAND, CATEGORY_INTERACTION)
+            ),
+            key=lambda recorded: recorded.duration,
+            reverse=True,
+        )
+        for recorded in slowest[:N_SLOWEST_SPANS]:
+            lines.append(f"{recorded.duration:>8.3f}s  {recorded.category:<8} {recorded.name}")
+        return os.linesep.join(lines)
+
+    def report(self):
+        print(self.get_summary(), file=sys.stderr)
+        if self.path:
+            self.write_chrome_trace(self.path)
+            print(f"Wrote trace to {self.path}", file=sys.stderr)
+
+
+_tracer: typing.Optional[Tracer] = None
+
+
+def start(path: typing.Optional[str] = None) -> Tracer:
+    """Enable tracing. Spans are written to ``path`` (if given) by
+    ``Tracer.report()``.
+    """
+    global _tracer  # pylint: disable=global-statement
+    if _tracer is None:
+        _tracer = Tracer(path)
+    elif path:
+        _tracer.path = path
+    return _tracer
+
+
+def stop() -> typing.Optional[Tracer]:
+    """Disable tracing and return the tracer, if tracing was enabled."""
+    global _tracer  # pylint: disable=global-statement
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, category: str, **args):
+    """Return a context manager that measures the time spent in its
+    block, if tracing is enabled.
+    """
+    if _tracer is None:
+        return contextlib.nullcontext()
+    return _tracer.span(name, category, **args)
+
+
+def traced(category: str, name: typing.Optional[str] = None):
+    """Decorate a function so that each call is recorded as a span."""
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with _tracer.span(span_name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,7 +1,9 @@
 import contextlib
+import functools
 import json
 import os
 import pathlib
+import subprocess
 import sys
 from unittest import mock
 
@@ -20,6 +22,7 @@ def get_json_test_data(*stems):
 
 
 def mock_authentication(test_function):
+    @functools.wraps(test_function)
     def wrapper(*args, **kwargs):
         with mock.patch("cogite.auth.get_token", lambda host_domain: "token"):
             test_function(*args, **kwargs)
@@ -27,11 +30,12 @@ def mock_authentication(test_function):
 
 
 def disable_disk_cache(test_function):
+    @functools.wraps(test_function)
     def wrapper(*args, **kwargs):
         with mock.patch.multiple(
                 "cogite.cache",
                 get=lambda key: cogite.cache.NOT_SET,
-                set=lambda key, value: value,
+                set=lambda key, value, ttl=None: value,
         ):
             test_function(*args, **kwargs)
     return wrapper
@@ -48,3 +52,43 @@ def fake_tty():
         yield
     finally:
         sys.stdout.isatty = orig_isatty
+
+
+def run_git(*args, cwd=None):
+    result = subprocess.run(
+        ('git', ) + args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+    )
+    return result.stdout.decode('utf-8').strip()
+
+
+class FakeScreen:
+    """Record what is painted, like a (very) small subset of a curses
+    window.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = [""] * height
+        self.painted = []
+        self.cursor = 0
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def erase(self):
+        self.rows = [""] * self.height
+
+    def move(self, y, _x):
+        self.cursor = y
+
+    def clrtoeol(self):
+        self.rows[self.cursor] = ""
+
+    def addnstr(self, y, _x, text, n, _attr):
+        assert y < self.height
+        self.rows[y] = text[:n]
+        self.painted.append(y)
+
+    def noutrefresh(self):
+        pass
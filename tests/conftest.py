@@ -0,0 +1,33 @@
+import curses
+
+import pytest
+
+from . import base
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    """Create a Git repository (isolated from the user's Git
+    configuration) and run the test from there.
+    """
+    home = tmp_path / 'home'
+    home.mkdir()
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(home / '.config'))
+    monkeypatch.setenv('GIT_CONFIG_NOSYSTEM', '1')
+    path = tmp_path / 'repository'
+    path.mkdir()
+    monkeypatch.chdir(path)
+    base.run_git('init', '--quiet', '--initial-branch', 'main')
+    base.run_git('config', 'user.email', 'jdoe@example.com')
+    base.run_git('config', 'user.name', 'Jane Doe')
+    base.run_git('commit', '--quiet', '--allow-empty', '--message', 'Initial commit')
+    base.run_git('remote', 'add', 'origin', 'gh:Polyconseil/cogite.git')
+    return path
+
+
+@pytest.fixture
+def fake_curses(monkeypatch):
+    """Let tests render to a ``base.FakeScreen``, without a terminal."""
+    monkeypatch.setattr(curses, "color_pair", lambda color: color << 8, raising=False)
+    monkeypatch.setattr(curses, "doupdate", lambda: None, raising=False)
@@ -17,7 +17,12 @@ def get_mock():
             # call code that would make an HTTP request
     """
     m = Mock()
-    with unittest.mock.patch("urllib.request.urlopen", m.urlopen):
+    # `cogite.requests.Session` does not call `urlopen()` but uses its
+    # own pool of connections, which has an `urlopen()`-like method.
+    with unittest.mock.patch("urllib.request.urlopen", m.urlopen), unittest.mock.patch(
+        "cogite.requests.ConnectionPool.urlopen",
+        lambda pool, request, **kwargs: m.urlopen(request, **kwargs),
+    ):
         yield m
 
 @dataclasses.dataclass
@@ -0,0 +1,191 @@
+"""Check that the fake Git host of the benchmarks is compatible with
+the GitHub client.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from benchmarks import host
+from benchmarks import results
+from benchmarks import server
+from cogite import config
+from cogite import context
+from cogite import errors
+from cogite import models
+from cogite import polling
+from cogite import status_view
+from cogite import status_watcher
+from cogite.backends import github
+
+from . import base
+
+
+@pytest.fixture(name="fake_server")
+def fixture_fake_server():
+    settings = host.HostSettings(n_collaborators=250, n_checks=3, pending_polls=1)
+    fake_server = server.start(host.FakeGitHost(settings))
+    yield fake_server
+    fake_server.shutdown()
+    fake_server.server_close()
+
+
+def _make_client(url, branch="feature"):
+    configuration = config.Configuration(host_api_url=url)
+    ctx = context.Context(
+        remote_url="git@github.com:Polyconseil/cogite.git",
+        host_domain="github.com",
+        owner="Polyconseil",
+        repository="cogite",
+        branch=branch,
+        client="dummy",
+        configuration="dummy",
+    )
+    return github.GitHubApiClient(configuration, ctx)
+
+
+@base.disable_disk_cache
+@base.mock_authentication
+def test_fake_host(fake_server):
+    client = _make_client(fake_server.url)
+    assert client.get_pull_request() is None
+
+    pr = client.create_pull_request(head="feature", base="master", title="Title", body="", draft=True)
+    assert pr.number == 1
+    client.mark_pull_request_as_ready()
+
+    collaborators = client.get_collaborators()
+    assert len(collaborators) == 250  # several pages
+    client.request_reviews(collaborators[:2])
+    users, complete = client.search_collaborators("user0012", limit=5)
+    assert [user.login for user in users] == [f"user0012{i}" for i in range(5)]
+    assert not complete
+
+    _pr, status = client.get_pull_request_with_status()
+    assert [check.state for check in status.checks] == [models.CommitState.PENDING] * 3
+    assert [review.author_login for review in status.reviews] == ["user00000", "user00001"]
+    status = client.get_pull_request_status(previous=status)
+    assert [check.state for check in status.checks] == [models.CommitState.SUCCESS] * 3
+    # Nothing has changed: only the summary is fetched.
+    assert client.get_pull_request_status(previous=status) == status
+
+
+def _report(medians, settings=None):
+    return {
+        "version": results.FORMAT_VERSION,
+        "metadata": {"settings": settings or {}},
+        "benchmarks": {name: {"median": median} for name, median in medians.items()},
+    }
+
+
+def test_compare(tmp_path):
+    old = _report({"status": 1.0, "pr add": 1.0})
+    new = _report({"status": 1.2, "pr add": 0.5})
+    path = tmp_path / "old.json"
+    path.write_text(json.dumps(old))
+    table, regressions = results.compare(results.load(path), new, threshold=0.1)
+    assert regressions == ["status"]
+    assert "faster" in table
+
+
+def _start_server(**settings):
+    return server.start(host.FakeGitHost(host.HostSettings(**settings)))
+
+
+@base.disable_disk_cache
+@base.mock_authentication
+def test_fake_host_reuses_connections():
+    fake_server = _start_server()
+    try:
+        client = _make_client(fake_server.url)
+        for _ in range(3):
+            assert client.get_pull_request() is None
+        assert fake_server.n_requests == 3
+        assert fake_server.n_connections == 1
+    finally:
+        fake_server.shutdown()
+        fake_server.server_close()
+
+
+@base.disable_disk_cache
+@base.mock_authentication
+def test_fake_host_rate_limit():
+    fake_server = _start_server(rate_limit=1)
+    try:
+        client = _make_client(fake_server.url)
+        client.get_pull_request()
+        with pytest.raises(errors.FatalError, match="RATE_LIMITED"):
+            client.get_pull_request()
+    finally:
+        fake_server.shutdown()
+        fake_server.server_close()
+
+
+@base.disable_disk_cache
+@base.mock_authentication
+def test_fake_host_errors():
+    fake_server = _start_server(error_rate=1)
+    try:
+        client = _make_client(fake_server.url)
+        with pytest.raises(errors.FatalError, match="502"):
+            client.get_pull_request()
+    finally:
+        fake_server.shutdown()
+        fake_server.server_close()
+
+
+@pytest.mark.parametrize(
+    "n_check_suites, n_check_requests",
+    (
+        (1, 2),  # 2 remaining pages of check runs
+        (60, 1),  # 1 remaining page of check suites
+    ),
+)
+@base.disable_disk_cache
+@base.mock_authentication
+def test_fake_host_paginates_status(n_check_suites, n_check_requests):
+    fake_server = _start_server(
+        n_checks=180,
+        n_check_suites=n_check_suites,
+        n_collaborators=200,
+        n_reviews=130,
+        open_pull_requests=("feature",),
+    )
+    try:
+        client = _make_client(fake_server.url)
+        client.request_reviews(client.get_collaborators()[-30:])
+        n_requests = fake_server.n_requests
+        _pr, status = client.get_pull_request_with_status()
+        assert len(status.checks) == 180
+        assert len({check.name for check in status.checks}) == 180
+        assert len(status.reviews) == 160
+        approved = [review for review in status.reviews if review.state == models.ReviewState.APPROVED]
+        assert len(approved) == 130
+        # 1 request for the status, the remaining pages of checks, 1
+        # for the remaining page of review requests and 2 for the
+        # remaining pages of reviews.
+        assert fake_server.n_requests - n_requests == 1 + n_check_requests + 1 + 2
+    finally:
+        fake_server.shutdown()
+        fake_server.server_close()
+
+
+@pytest.mark.usefixtures("fake_curses")
+@base.disable_disk_cache
+@base.mock_authentication
+def test_status_watcher_reuses_connection():
+    fake_server = _start_server(n_checks=3, pending_polls=3, open_pull_requests=("feature",))
+    try:
+        client = _make_client(fake_server.url)
+        _pr, status = client.get_pull_request_with_status()
+        scheduler = polling.PollScheduler(min_interval=0.01, max_interval=0.01, budget_share=0.1)
+        view = status_view.StatusView(base.FakeScreen(height=10, width=80))
+        watcher = status_watcher.StatusWatcher(client, status, scheduler, view, lambda status: [])
+        status = asyncio.run(watcher.run())
+        assert [check.state for check in status.checks] == [models.CommitState.SUCCESS] * 3
+        assert fake_server.n_requests > 3
+        assert fake_server.n_connections == 1
+    finally:
+        fake_server.shutdown()
+        fake_server.server_close()
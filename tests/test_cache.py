@@ -0,0 +1,85 @@
+from unittest import mock
+
+import pytest
+
+from cogite import cache
+
+
+@pytest.fixture(name="cache_file", autouse=True)
+def fixture_cache_file(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with mock.patch("cogite.cache.COGITE_CACHE_FILE", path):
+        yield path
+
+
+def test_get_and_set():
+    assert cache.get("key") is cache.NOT_SET
+    cache.set("key", {"a": 1})
+    assert cache.get("key") == {"a": 1}
+    cache.set("key", [1, 2])
+    assert cache.get("key") == [1, 2]
+
+
+def test_delete():
+    cache.set("key", "value")
+    cache.delete("key")
+    assert cache.get("key") is cache.NOT_SET
+
+
+def test_ttl():
+    with mock.patch("time.time", lambda: 1000):
+        cache.set("key", "value", ttl=10)
+    with mock.patch("time.time", lambda: 1009):
+        assert cache.get("key") == "value"
+    with mock.patch("time.time", lambda: 1010):
+        assert cache.get("key") is cache.NOT_SET
+
+
+def test_lru_eviction():
+    with mock.patch("cogite.cache.MAX_ENTRIES", 2):
+        with mock.patch("time.time", lambda: 1000):
+            cache.set("a", 1)
+        with mock.patch("time.time", lambda: 1001):
+            cache.set("b", 2)
+        with mock.patch("time.time", lambda: 1100):
+            cache.get("a")  # "a" is now more recently used than "b"
+        with mock.patch("time.time", lambda: 1101):
+            cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is cache.NOT_SET
+    assert cache.get("c") == 3
+
+
+def test_recent_access_time_is_not_updated():
+    with mock.patch("time.time", lambda: 1000):
+        cache.set("key", "value")
+    connection = cache._get_connection()
+    changes = connection.total_changes
+    with mock.patch("time.time", lambda: 1000 + cache.ACCESS_TIME_GRANULARITY - 1):
+        assert cache.get("key") == "value"
+    assert connection.total_changes == changes
+    with mock.patch("time.time", lambda: 1000 + cache.ACCESS_TIME_GRANULARITY):
+        assert cache.get("key") == "value"
+    assert connection.total_changes == changes + 1
+
+
+def test_corrupted_cache_file(cache_file):
+    cache_file.write_bytes(b"this is not an SQLite database")
+    assert cache.get("key") is cache.NOT_SET
+    cache.set("key", "value")  # does not raise
+
+
+def test_unwritable_cache_directory(tmp_path):
+    # The parent of the cache directory is a file: it cannot be created.
+    (tmp_path / "file").touch()
+    with mock.patch("cogite.cache.COGITE_CACHE_FILE", tmp_path / "file" / "cogite" / "cache.sqlite"):
+        assert cache.get("key") is cache.NOT_SET
+        cache.set("key", "value")  # does not raise
+        cache.delete("key")  # does not raise
+
+
+def test_legacy_cache_file_is_removed(cache_file):
+    legacy = cache_file.parent / "cache.json"
+    legacy.write_text('{"key": "value"}', encoding="utf-8")
+    assert cache.get("key") is cache.NOT_SET
+    assert not legacy.exists()
@@ -0,0 +1,117 @@
+import random
+import string
+import time
+
+import prompt_toolkit.document
+
+from cogite import completion
+from cogite import models
+
+
+USERS = [
+    models.User(id="1", login="jdoe", name="Jane Doe"),
+    models.User(id="2", login="jsmith", name="John Smith"),
+    models.User(id="3", login="bob", name=""),
+]
+
+
+def _complete(completer, text):
+    document = prompt_toolkit.document.Document(text)
+    return [c.text for c in completer.get_completions(document, None)]
+
+
+def test_user_completer():
+    completer = completion.UserCompleter(USERS)
+    assert _complete(completer, "J") == ["jdoe (Jane Doe)", "jsmith (John Smith)"]
+    assert _complete(completer, "smi") == ["jsmith (John Smith)"]
+    assert _complete(completer, "bo") == ["bob (unnamed)"]
+
+
+class TestSearchUserCompleter:
+    def _get_completer(self, limit=10):
+        searches = []
+
+        def search(query, limit):
+            searches.append(query)
+            matches = [user for user in USERS if completion._matches(query, user)]
+            return matches[:limit], len(matches) <= limit
+
+        completer = completion.SearchUserCompleter(search, debounce=0, limit=limit)
+        return completer, searches
+
+    def test_memoized_and_refined_locally(self):
+        completer, searches = self._get_completer()
+        assert _complete(completer, "j") == ["jdoe (Jane Doe)", "jsmith (John Smith)"]
+        assert _complete(completer, "js") == ["jsmith (John Smith)"]
+        assert _complete(completer, "j") == ["jdoe (Jane Doe)", "jsmith (John Smith)"]
+        assert searches == ["j"]
+        assert set(completer.seen) == {"jdoe", "jsmith"}
+
+    def test_truncated_results_are_not_refined_locally(self):
+        completer, searches = self._get_completer(limit=1)
+        assert _complete(completer, "j") == ["jdoe (Jane Doe)"]
+        assert _complete(completer, "js") == ["jsmith (John Smith)"]
+        assert searches == ["j", "js"]
+
+    def test_empty_word(self):
+        completer, searches = self._get_completer()
+        assert _complete(completer, "") == []
+        assert not searches
+
+
+class TestUserIndex:
+    def test_ranking(self):
+        users = [
+            models.User(id="1", login="zed", name="Anna Belle"),
+            models.User(id="2", login="xanna", name=""),
+            models.User(id="3", login="annabel", name=""),
+            models.User(id="4", login="yves", name="Joanna"),
+        ]
+        index = completion.UserIndex(users)
+        assert [user.login for user in index.search("Anna")] == [
+            "annabel",  # login prefix
+            "zed",  # name word prefix
+            "xanna",  # login substring
+            "yves",  # name substring
+        ]
+
+    def test_ranking_adjacent_names(self):
+        users = [
+            models.User(id="1", login="zz1", name="Anna A"),
+            models.User(id="2", login="zz2", name="Anna B"),
+            models.User(id="3", login="xanna", name=""),
+        ]
+        index = completion.UserIndex(users)
+        assert [user.login for user in index.search("anna")] == ["zz1", "zz2", "xanna"]
+        assert [user.login for user in index.search("a")] == ["zz1", "zz2", "xanna"]
+
+    def test_limit(self):
+        index = completion.UserIndex(USERS)
+        assert [user.login for user in index.search("j", limit=1)] == ["jdoe"]
+        assert [user.login for user in index.search("", limit=2)] == ["bob", "jdoe"]
+
+    def test_benchmark_many_users(self):
+        # With tens of thousands of users, completion must stay
+        # fast enough to be computed on each keystroke.
+        rng = random.Random(0)
+
+        def random_word(length):
+            return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+        users = [
+            models.User(
+                id=str(i),
+                login=random_word(rng.randint(4, 12)),
+                name=f"{random_word(6).title()} {random_word(8).title()}",
+            )
+            for i in range(50_000)
+        ]
+        index = completion.UserIndex(users)
+        durations = []
+        for word in ("a", "ab", "abc", "jean", "zzzz", "1"):
+            start = time.perf_counter()
+            index.search(word)
+            durations.append(time.perf_counter() - start)
+        # Usually a few milliseconds at most, but leave some slack
+        # for slow CI machines.
+        assert max(durations) < 0.05
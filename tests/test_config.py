@@ -0,0 +1,58 @@
+import os
+import types
+from unittest import mock
+
+import pytest
+
+from cogite import config
+
+
+@pytest.fixture(name="context")
+def fixture_context(repository, tmp_path):
+    with mock.patch("cogite.cache.COGITE_CACHE_FILE", tmp_path / "cache.sqlite"):
+        with mock.patch("cogite.config.COGITE_CONFIG_DIR", tmp_path / "config"):
+            yield types.SimpleNamespace(remote_url="gh:Polyconseil/cogite.git")
+
+
+def test_defaults(context):
+    configuration = config.get_configuration(context)
+    assert configuration == config.Configuration()
+
+
+def test_precedence(context, repository, tmp_path):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "config.toml").write_text(
+        'master-branch = "main"\nstatus-poll-frequency = 5\n'
+    )
+    (repository / "pyproject.toml").write_text(
+        '[tool.black]\nline-length = 100\n[tool.cogite]\nstatus-poll-frequency = 20\n'
+    )
+    configuration = config.get_configuration(context)
+    assert configuration.master_branch == "main"
+    assert configuration.status_poll_frequency == 20
+
+    (repository / "cogite.toml").write_text('status-poll-frequency = 30\n')
+    assert config.get_configuration(context).status_poll_frequency == 30
+
+
+def test_read_from_git_root(context, repository, monkeypatch):
+    (repository / "cogite.toml").write_text('master-branch = "main"\n')
+    (repository / "sub").mkdir()
+    monkeypatch.chdir(repository / "sub")
+    assert config.get_configuration(context).master_branch == "main"
+
+
+def test_cache(context, repository):
+    path = repository / "cogite.toml"
+    path.write_text('master-branch = "main"\n')
+    assert config.get_configuration(context).master_branch == "main"
+
+    with mock.patch("cogite.config.read_toml") as read_toml:
+        assert config.get_configuration(context).master_branch == "main"
+    read_toml.assert_not_called()
+
+    # Files are read again if any of them changes.
+    path.write_text('master-branch = "trunk"\n')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert config.get_configuration(context).master_branch == "trunk"
@@ -1,7 +1,256 @@
 import pathlib
+import sys
 
+import pytest
+
+from cogite import background
+from cogite import errors
 from cogite import git
+from cogite import git_session
+from cogite import shell
+
+from .base import run_git as _git
 
 
 def test_get_git_root():
     assert git.get_git_root() == pathlib.Path('.').resolve()
+
+
+class TestReadFromGitDirectory:
+    """Check that functions that read the `.git` directory return the
+    same information as `git` itself.
+    """
+
+    def _assert_same_as_git(self):
+        assert git.get_git_root() == git._get_git_root_from_git()
+        assert git.get_current_branch() == git._get_current_branch_from_git()
+        assert git.get_current_sha() == git._get_current_sha_from_git()
+        assert git.get_remote_origin_url() == git._get_remote_origin_url_from_git()
+
+    def test_basics(self, repository):
+        self._assert_same_as_git()
+        assert git.get_current_branch() == 'main'
+
+    def test_subdirectory(self, repository, monkeypatch):
+        (repository / 'sub' / 'dir').mkdir(parents=True)
+        monkeypatch.chdir(repository / 'sub' / 'dir')
+        self._assert_same_as_git()
+        assert git.get_git_root() == repository.resolve()
+
+    def test_packed_refs(self, repository):
+        _git('checkout', '--quiet', '-b', 'feature/branch')
+        _git('pack-refs', '--all')
+        assert not (repository / '.git' / 'refs' / 'heads' / 'feature' / 'branch').exists()
+        self._assert_same_as_git()
+        assert git.get_current_branch() == 'feature/branch'
+
+    def test_detached_head(self, repository):
+        _git('checkout', '--quiet', '--detach')
+        self._assert_same_as_git()
+        assert git.get_current_branch() == 'HEAD'
+
+    def test_branch_changes_are_seen(self, repository):
+        assert git.get_current_branch() == 'main'
+        _git('checkout', '--quiet', '-b', 'other')
+        _git('commit', '--quiet', '--allow-empty', '--message', 'Other commit')
+        self._assert_same_as_git()
+        assert git.get_current_branch() == 'other'
+
+    def test_instead_of(self, repository):
+        _git('config', '--global', 'url.https://github.com/.insteadOf', 'gh:')
+        _git('config', '--global', 'url.git@github.com:.insteadOf', 'g')  # shorter prefix
+        self._assert_same_as_git()
+        assert git.get_remote_origin_url() == 'https://github.com/Polyconseil/cogite.git'
+
+    def test_remote_of_current_branch(self, repository):
+        _git('remote', 'add', 'fork', 'https://example.com/jdoe/cogite.git')
+        _git('config', 'branch.main.remote', 'fork')
+        self._assert_same_as_git()
+        assert git.get_remote_origin_url() == 'https://example.com/jdoe/cogite.git'
+
+    def test_worktree(self, repository, tmp_path, monkeypatch):
+        worktree = tmp_path / 'worktree'
+        _git('worktree', 'add', '--quiet', '-b', 'in-worktree', str(worktree))
+        monkeypatch.chdir(worktree)
+        self._assert_same_as_git()
+        assert git.get_current_branch() == 'in-worktree'
+        assert git.get_git_root() == worktree.resolve()
+
+    def test_upstream(self, repository, monkeypatch):
+        _git('update-ref', 'refs/remotes/origin/main', 'HEAD')
+        _git('commit', '--quiet', '--allow-empty', '--message', 'Second commit')
+        _git('branch', '--quiet', '--set-upstream-to', 'origin/main')
+        assert git.get_remote_branch() == git._get_remote_branch_from_git() == 'origin/main'
+        assert git.get_remote_sha() == git._get_remote_sha_from_git() == _git('rev-parse', 'HEAD~1')
+        assert git.get_n_commits_ahead_of_remote() == 1
+
+        _git('pack-refs', '--all')
+        expected = _git('rev-parse', 'HEAD~1')
+        with monkeypatch.context() as patched:
+            patched.setattr(shell, 'run', None)  # `git` must not be run
+            assert git.get_remote_sha() == expected
+
+        _git('config', 'remote.origin.fetch', '+refs/heads/*:refs/remotes/upstream/*')
+        _git('update-ref', 'refs/remotes/upstream/main', 'HEAD')
+        assert git.get_remote_branch() == git._get_remote_branch_from_git() == 'upstream/main'
+        assert git.get_remote_sha() == git._get_remote_sha_from_git() == _git('rev-parse', 'HEAD')
+
+    def test_local_upstream(self, repository):
+        _git('checkout', '--quiet', '-b', 'feature', '--track', 'main')
+        assert git.get_remote_branch() == git._get_remote_branch_from_git() == 'main'
+        assert git.get_remote_sha() == git._get_remote_sha_from_git()
+
+    def test_no_upstream(self, repository):
+        with pytest.raises(errors.FatalError):
+            git.get_remote_branch()
+        with pytest.raises(errors.FatalError):
+            git.get_remote_sha()
+
+    def test_fallback_on_includes(self, repository, monkeypatch):
+        _git('config', 'include.path', 'other.config')
+        monkeypatch.setattr(
+            shell, 'run', lambda command: shell.CommandResult(returncode=0, stdout=['from git'], stderr=[]),
+        )
+        assert git.get_remote_origin_url() == 'from git'
+
+
+class TestGitSession:
+
+    def test_resolve(self, repository):
+        session = git_session.GitSession()
+        head = _git('rev-parse', 'HEAD')
+        assert session.resolve('HEAD', 'main', 'unknown', '@{u}') == [head, head, None, None]
+        # The process is kept alive and sees changes in the repository.
+        _git('commit', '--quiet', '--allow-empty', '--message', 'Second commit')
+        assert session.resolve('HEAD') == [_git('rev-parse', 'HEAD')]
+        session.close()
+
+    def test_resolve_revisions_unknown_to_cat_file(self, repository, monkeypatch):
+        calls = []
+        run = shell.run
+
+        def counting_run(command, **kwargs):
+            calls.append(command)
+            return run(command, **kwargs)
+
+        monkeypatch.setattr(shell, 'run', counting_run)
+        session = git_session.GitSession()
+        head = _git('rev-parse', 'HEAD')
+        assert session.resolve('@', 'main@{0}') == [head, head]
+        assert len(calls) == 1  # all at once
+        calls.clear()
+        # There is no upstream branch: `git rev-parse` is run again
+        # for the following revisions.
+        assert session.resolve('@', '@{u}', 'main@{0}') == [head, None, head]
+        assert len(calls) == 2
+        session.close()
+
+    def test_read_commits(self, repository):
+        _git('commit', '--quiet', '--allow-empty', '--message', 'Second commit\n\nWith a body.')
+        session = git_session.GitSession()
+        second, first, unknown = session.read_commits('HEAD', 'HEAD~1', 'unknown')
+        assert first.parents == []
+        assert first.message == 'Initial commit\n'
+        assert second.parents == [first.sha]
+        assert second.subject == 'Second commit'
+        assert second.message == 'Second commit\n\nWith a body.\n'
+        assert unknown is None
+        session.close()
+
+    def test_is_ancestor(self, repository, monkeypatch):
+        first = _git('rev-parse', 'HEAD')
+        _git('checkout', '--quiet', '-b', 'other')
+        _git('commit', '--quiet', '--allow-empty', '--message', 'Other commit')
+        other = _git('rev-parse', 'HEAD')
+        _git('checkout', '--quiet', 'main')
+        _git('merge', '--quiet', '--no-ff', '--no-edit', 'other')
+        _git('commit', '--quiet', '--allow-empty', '--message', 'Last commit')
+        session = git_session.GitSession()
+        assert session.is_ancestor(first, 'HEAD')
+        assert session.is_ancestor(other, 'HEAD')
+        assert session.is_ancestor('HEAD', 'HEAD')
+        assert not session.is_ancestor('HEAD', other)
+        assert not session.is_ancestor('0' * 40, 'HEAD')
+        # Long walks are delegated to `git merge-base`.
+        monkeypatch.setattr(git_session, 'MAX_ANCESTRY_WALK', 1)
+        assert session.is_ancestor(first, 'HEAD')
+        assert not session.is_ancestor('HEAD', other)
+        session.close()
+
+    def test_current_branch_has_commit(self, repository):
+        first = _git('rev-parse', 'HEAD')
+        _git('checkout', '--quiet', '-b', 'other')
+        _git('commit', '--quiet', '--allow-empty', '--message', 'Other commit')
+        assert git.current_branch_has_commit(first)
+        _git('checkout', '--quiet', 'main')
+        assert not git.current_branch_has_commit(_git('rev-parse', 'other'))
+
+
+class TestGetCommitsLogs:
+
+    @pytest.fixture
+    def branch(self, repository):
+        _git('checkout', '--quiet', '-b', 'feature')
+        _git('commit', '--quiet', '--allow-empty', '--message', 'First', '--message', 'Body\nof first.')
+        for i in range(2, 6):
+            _git('commit', '--quiet', '--allow-empty', '--message', f'Commit {i}')
+        return 'feature'
+
+    def test_all(self, branch):
+        logs = list(git.get_commits_logs('main', branch))
+        assert logs == ['First\n\nBody\nof first.', 'Commit 2', 'Commit 3', 'Commit 4', 'Commit 5']
+
+    def test_limit(self, branch):
+        assert list(git.get_commits_logs('main', branch, limit=2)) == ['First\n\nBody\nof first.', 'Commit 2']
+
+    def test_max_bytes(self, branch):
+        # The first message is always included.
+        assert list(git.get_commits_logs('main', branch, max_bytes=1)) == ['First\n\nBody\nof first.']
+        # Each message is followed by a new line in `git log` output.
+        logs = list(git.get_commits_logs('main', branch, max_bytes=len('First\n\nBody\nof first.\nCommit 2\n')))
+        assert logs == ['First\n\nBody\nof first.', 'Commit 2']
+
+    def test_small_chunks(self, branch, monkeypatch):
+        monkeypatch.setattr(git, 'READ_CHUNK_SIZE', 3)
+        assert len(list(git.get_commits_logs('main', branch))) == 5
+
+    def test_unknown_branch(self, repository):
+        with pytest.raises(errors.FatalError):
+            list(git.get_commits_logs('main', 'unknown'))
+
+    @pytest.mark.parametrize('returncode', (0, 1))
+    def test_large_stderr(self, returncode):
+        # Write more than a pipe can hold to stderr, before stdout.
+        code = (
+            "import sys; sys.stderr.write('warning\\n' * 100_000); "
+            f"sys.stdout.write('a\\0b\\0'); sys.exit({returncode})"
+        )
+        command = (sys.executable, '-c', code)
+        records = background.run(lambda: list(git._iter_git_records(command)))
+        if returncode:
+            with pytest.raises(errors.FatalError, match='warning'):
+                records.result(timeout=10)
+        else:
+            assert records.result(timeout=10) == [b'a', b'b']
+
+
+def test_parse_config():
+    text = '\n'.join((
+        '[core]',
+        '\tbare = false ; comment',
+        '[remote "origin"]',
+        '    url = "git@github.com:Polyconseil/cogite.git"',
+        '[Branch "Main"] remote = fork',
+        '[url "https://example.com/"]',
+        '  insteadOf',
+        '[alias]',
+        '  quoted = "a \\"b\\" # c"  # comment',
+    ))
+    config = git._parse_config(text, pathlib.Path('config'))
+    assert config == {
+        ('core', None, 'bare'): ['false'],
+        ('remote', 'origin', 'url'): ['git@github.com:Polyconseil/cogite.git'],
+        ('branch', 'Main', 'remote'): ['fork'],
+        ('url', 'https://example.com/', 'insteadof'): ['true'],
+        ('alias', None, 'quoted'): ['a "b" # c'],
+    }
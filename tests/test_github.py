@@ -1,7 +1,12 @@
 import contextlib
+import dataclasses
+import datetime
 import json
 import re
+import time
+from unittest import mock
 
+from cogite import cache
 from cogite import config
 from cogite import context
 from cogite import models
@@ -15,8 +20,11 @@ GRAPHQL_RESPONSES_DIR = base.TEST_DATA_PATH / "graphql_responses" / "github"
 GRAPHQL_RESPONSE_MAPPING = {
     "query pullRequest": "query_pull_request.json",
     "query pullRequestStatus": "query_pull_request_status.json",
+    "query pullRequestStatusSummary": "query_pull_request_status_summary.json",
+    "query pullRequestWithStatus": "query_pull_request_with_status.json",
     "query repository": "query_repository.json",
     "query repositoryContributors": "query_repository_contributors.json",
+    "query searchCollaborators": "query_search_collaborators.json",
     "mutation createPullRequest": "mutation_create_pull_request.json",
     "mutation markAsReady": "mutation_mark_as_ready.json",
     "mutation requestReviews": "mutation_request_reviews.json",
@@ -38,9 +46,9 @@ def _make_client():
 
 @contextlib.contextmanager
 def install_github_api_mock():
-    with requests_mocker.get_mock() as mock:
-        mock.register_callback(get_mock_response)
-        yield mock
+    with requests_mocker.get_mock() as api_mock:
+        api_mock.register_callback(get_mock_response)
+        yield api_mock
 
 
 def get_mock_response(request):
@@ -114,6 +122,7 @@ def test_request_reviews():
         client.request_reviews([models.User(id="1", login="jdoe", name="Jane Doe")])
 
 
+@base.disable_disk_cache
 @base.mock_authentication
 def test_get_collaborators():
     client = _make_client()
@@ -124,6 +133,56 @@ def test_get_collaborators():
         assert client.get_collaborators() == expected
 
 
+@base.mock_authentication
+def test_get_collaborators_from_cache():
+    client = _make_client()
+    cached_user = models.User(id='1', login='jdoe', name='Jane Doe')
+    fresh_user = models.User(id='MDQ6VXNlcjQ3MTMyMQ==', login='dbaty', name='Damien Baty')
+    disk_cache = {}
+    with mock.patch.multiple(
+        "cogite.cache",
+        get=lambda key: disk_cache.get(key, cache.NOT_SET),
+        set=lambda key, value, ttl=None: disk_cache.__setitem__(key, value),
+    ):
+        disk_cache["collaborators:dummy"] = {
+            "fetched_at": time.time(),
+            "users": [dataclasses.asdict(cached_user)],
+        }
+        with install_github_api_mock() as api_mock:
+            # Fresh cache: no request.
+            assert client.get_collaborators() == [cached_user]
+            assert not api_mock.calls
+
+            # Stale cache: the stale list is returned and refreshed
+            # in the background.
+            disk_cache["collaborators:dummy"]["fetched_at"] = time.time() - 2 * 24 * 60 * 60
+            assert client.get_collaborators() == [cached_user]
+            client._collaborators_refresh.join()
+            assert len(api_mock.calls) == 1
+            assert client.get_collaborators() == [fresh_user]
+
+            # Too old: the list is refreshed right away.
+            disk_cache["collaborators:dummy"]["users"] = []
+            disk_cache["collaborators:dummy"]["fetched_at"] = 0
+            assert client.get_collaborators() == [fresh_user]
+            assert len(api_mock.calls) == 2
+
+            # Forced refresh
+            disk_cache["collaborators:dummy"]["users"] = []
+            assert client.get_collaborators(refresh=True) == [fresh_user]
+            assert len(api_mock.calls) == 3
+
+
+@base.mock_authentication
+def test_search_collaborators():
+    client = _make_client()
+    expected = [
+        models.User(id='MDQ6VXNlcjQ3MTMyMQ==', login='dbaty', name='Damien Baty'),
+    ]
+    with install_github_api_mock():
+        assert client.search_collaborators("dba", 10) == (expected, True)
+
+
 @base.mock_authentication
 def test_mark_pull_request_as_ready():
     client = _make_client()
@@ -149,6 +208,56 @@ def test_get_pull_request_status():
         assert client.get_pull_request_status() == expected
 
 
+def _get_operations(api_mock):
+    return [
+        re.match("(query|mutation) [^ ]+", json.loads(call.request.data)["query"]).group(0)
+        for call in api_mock.calls
+    ]
+
+
+@base.mock_authentication
+def test_get_pull_request_status_unchanged():
+    client = _make_client()
+    summary = base.get_json_test_data('graphql_responses', 'github', 'query_pull_request_status_summary.json')
+    _state, marker = github._get_status_summary(summary['data']['node'])
+    previous = models.PullRequestStatus(sha='b04e404e1715fe9ac60bd53643264df3f0dfcb67', marker=marker)
+    with install_github_api_mock() as api_mock:
+        status = client.get_pull_request_status(previous=previous)
+    # Only the summary has been fetched.
+    assert _get_operations(api_mock) == ['query pullRequest', 'query pullRequestStatusSummary']
+    assert status.checks == previous.checks
+    assert status.state == models.CommitState.SUCCESS
+    assert status.rate_limit.remaining == 4990
+
+
+@base.mock_authentication
+def test_get_pull_request_status_changed():
+    client = _make_client()
+    previous = models.PullRequestStatus(sha='0' * 40, marker='previous marker')
+    with install_github_api_mock() as api_mock:
+        status = client.get_pull_request_status(previous=previous)
+    # The summary has changed: the full status has been fetched.
+    assert _get_operations(api_mock) == [
+        'query pullRequest', 'query pullRequestStatusSummary', 'query pullRequestStatus',
+    ]
+    assert [check.name for check in status.checks] == ['test']
+
+
+@base.disable_disk_cache
+@base.mock_authentication
+def test_get_pull_request_with_status():
+    client = _make_client()
+    with install_github_api_mock() as api_mock:
+        pull_request, status = client.get_pull_request_with_status()
+        # Repository and pull request are now in the memory cache.
+        assert client.repository.id == "MDEwOlJlcG9zaXRvcnkzMTM0MzAwMDg="
+        assert client.pull_request == pull_request
+    assert len(api_mock.calls) == 1
+    assert pull_request.number == 30
+    assert status.sha == 'b04e404e1715fe9ac60bd53643264df3f0dfcb67'
+    assert [check.name for check in status.checks] == ['test']
+
+
 class TestGetPullRequestStatus:
     def test_status_with_checks(self):
         response = base.get_json_test_data('github', 'pull_request_status_checks.json')
@@ -178,3 +287,76 @@ class TestGetPullRequestStatus:
         assert status.reviews[1].author_login == 'reviewer2'
         assert status.reviews[2].state == models.ReviewState.APPROVED
         assert status.reviews[2].author_login == 'reviewer3'
+
+    def test_rate_limit_and_timing(self):
+        response = base.get_json_test_data('github', 'pull_request_status_checks.json')
+        response['data']['rateLimit'] = {'cost': 1, 'remaining': 4999, 'resetAt': '2021-02-15T12:00:00Z'}
+        commit = response['data']['node']['commits']['nodes'][0]['commit']
+        run = commit['checkSuites']['nodes'][0]['checkRuns']['nodes'][0]
+        run['startedAt'] = '2021-02-15T11:00:00Z'
+        run['completedAt'] = '2021-02-15T11:04:30Z'
+        status = github._get_pull_request_status(response)
+        assert status.rate_limit == models.RateLimit(
+            cost=1,
+            remaining=4999,
+            reset_at=datetime.datetime(2021, 2, 15, 12, tzinfo=datetime.timezone.utc),
+        )
+        check = next(check for check in status.checks if check.name == run['name'])
+        assert (check.completed_at - check.started_at).total_seconds() == 270
+
+
+def _connection(nodes, end_cursor=None, **extra):
+    page_info = {'hasNextPage': end_cursor is not None, 'endCursor': end_cursor}
+    return {'nodes': nodes, 'pageInfo': page_info, **extra}
+
+
+def _run(name):
+    return {'conclusion': 'SUCCESS', 'name': name, 'permalink': f'https://example.com/{name}', 'status': 'COMPLETED'}
+
+
+def test_fetch_truncated_pages():
+    pr_info = {
+        'commits': {'nodes': [{'commit': {
+            'id': 'commit',
+            'oid': 'sha',
+            'status': None,
+            'checkSuites': _connection(
+                [{'id': 'suite-1', 'checkRuns': _connection([_run('a1')], 'a1')}],
+                'suite-1',
+            ),
+        }}]},
+        'reviewRequests': _connection([]),
+        'reviews': _connection([{'author': {'login': 'r1'}, 'state': 'APPROVED'}], 'r1'),
+    }
+    pages = {
+        ('checkRuns', 'suite-1', 'a1'): {'checkRuns': _connection([_run('a2')], 'a2')},
+        ('checkRuns', 'suite-1', 'a2'): {'checkRuns': _connection([_run('a3')])},
+        ('checkSuites', 'commit', 'suite-1'): {'checkSuites': _connection(
+            [{'id': 'suite-2', 'checkRuns': _connection([_run('b1')], 'b1')}],
+        )},
+        ('checkRuns', 'suite-2', 'b1'): {'checkRuns': _connection([_run('b2')])},
+        ('reviews', 'pr', 'r1'): {'reviews': _connection([{'author': {'login': 'r2'}, 'state': 'APPROVED'}])},
+    }
+    requested = []
+
+    def post(query, variables):
+        operation = re.match(r'query (\w+)', query).group(1)
+        node_id = variables.get('commitId') or variables.get('checkSuiteId') or variables['pullRequestId']
+        requested.append((operation, node_id, variables['cursor']))
+        return {'data': {'node': pages[(operation, node_id, variables['cursor'])]}}
+
+    client = _make_client()
+    client._post = post
+    client._fetch_truncated_pages(pr_info, 'pr')
+    assert sorted(requested) == sorted(pages)
+
+    status = github._get_pull_request_status_from_node(pr_info)
+    assert [check.name for check in status.checks] == ['a1', 'a2', 'a3', 'b1', 'b2']
+    assert [review.author_login for review in status.reviews] == ['r1', 'r2']
+
+
+def test_fetch_truncated_pages_nothing_truncated():
+    response = base.get_json_test_data('github', 'pull_request_status_checks.json')
+    client = _make_client()
+    client._post = None  # must not be called
+    client._fetch_truncated_pages(response['data']['node'], 'pr')
@@ -0,0 +1,79 @@
+import os
+import subprocess
+
+import pytest
+
+from cogite import errors
+from cogite.checks import pre_push
+from cogite.commands import hook
+
+from .base import run_git
+
+
+def test_install_and_uninstall(repository):
+    path = repository / '.git' / 'hooks' / 'pre-push'
+    hook.install_hook(None)
+    assert os.access(path, os.X_OK)
+    assert 'cogite.checks.pre_push' in path.read_text(encoding='utf-8')
+    # Installing again is fine.
+    hook.install_hook(None)
+    hook.uninstall_hook(None)
+    assert not path.exists()
+
+
+def test_do_not_overwrite_other_hooks(repository):
+    path = repository / '.git' / 'hooks' / 'pre-push'
+    path.parent.mkdir(exist_ok=True)
+    path.write_text('#!/bin/sh\nexit 0\n', encoding='utf-8')
+    with pytest.raises(errors.FatalError):
+        hook.install_hook(None)
+    with pytest.raises(errors.FatalError):
+        hook.uninstall_hook(None)
+    assert path.read_text(encoding='utf-8') == '#!/bin/sh\nexit 0\n'
+    hook.install_hook(None, force=True)
+    assert 'cogite' in path.read_text(encoding='utf-8')
+
+
+def test_hooks_path(repository):
+    run_git('config', 'core.hooksPath', 'my-hooks')
+    hook.install_hook(None)
+    assert (repository / 'my-hooks' / 'pre-push').exists()
+
+
+def test_parse_refs():
+    null_sha = '0' * 40
+    lines = [
+        f'refs/heads/main {"a" * 40} refs/heads/main {"b" * 40}',
+        f'(delete) {null_sha} refs/heads/old {"c" * 40}',
+        f'refs/heads/new {"d" * 40} refs/heads/new {null_sha}',
+        '',
+    ]
+    assert pre_push.parse_refs(lines) == [
+        ('refs/heads/main', 'a' * 40, 'refs/heads/main', 'b' * 40),
+        ('refs/heads/new', 'd' * 40, 'refs/heads/new', null_sha),
+    ]
+
+
+def test_push(repository, tmp_path):
+    remote = tmp_path / 'remote.git'
+    run_git('init', '--quiet', '--bare', str(remote))
+    run_git('remote', 'set-url', 'origin', str(remote))
+    run_git('push', '--quiet', 'origin', 'main')
+    hook.install_hook(None)
+
+    run_git('commit', '--quiet', '--allow-empty', '--message', 'Add feature')
+    subprocess.run(['git', 'push', '--quiet', 'origin', 'main'], stdin=subprocess.DEVNULL, check=True)
+
+    run_git('commit', '--quiet', '--allow-empty', '--message', 'WIP')
+    # There is no terminal to ask for confirmation: the push is
+    # rejected.
+    result = subprocess.run(
+        ['git', 'push', '--quiet', 'origin', 'main'],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,  # detach from the terminal, if any
+        check=False,
+    )
+    assert result.returncode != 0
+    assert b'--no-verify' in result.stderr
@@ -1,19 +1,127 @@
+import os
+import sys
+import textwrap
 from unittest import mock
 
+import pytest
+
+from cogite import cli
 from cogite import plugins
 
 
-def test_get_ci_url_getters():
-    # Cogite itself does not register plugins and I don't want to do
-    # that just for tests. Fortunately, one of the development
-    # dependencies to register plugins. Yes, it's a bit ugly.
-    with mock.patch("cogite.plugins.NAMESPACE_CI_URL_GETTER", "sphinx.html_themes"):
-        results = plugins.get_ci_url_getters()
-    assert "sphinx_rtd_theme" in {module.__name__ for module in results}
+@pytest.fixture(autouse=True)
+def cache_file(tmp_path):
+    with mock.patch("cogite.cache.COGITE_CACHE_FILE", tmp_path / "cache.sqlite"):
+        yield
+
+
+def _install_distribution(site_packages, name, source, entry_points):
+    (site_packages / f"{name}.py").write_text(textwrap.dedent(source))
+    dist_info = site_packages / f"{name}-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n")
+    (dist_info / "entry_points.txt").write_text(textwrap.dedent(entry_points))
+    return dist_info
+
+
+@pytest.fixture(name="site_packages")
+def fixture_site_packages(tmp_path, monkeypatch):
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    monkeypatch.syspath_prepend(str(site_packages))
+    yield site_packages
+    for module in ("cogite_test_plugin", "cogite_defaults_plugin"):
+        monkeypatch.delitem(sys.modules, module, raising=False)
+
+
+@pytest.fixture(name="installed_plugin")
+def fixture_installed_plugin(site_packages):
+    """Install a fake distribution that provides a command plugin
+    (``cogite ci tweak``) and a CI URL getter.
+    """
+    source = '''
+        from cogite.plugins import BaseCiUrlGetter
+        from cogite.plugins import BaseCommandPlugin
+
+        class CiTweakCommand(BaseCommandPlugin):
+            def install(self, parser):
+                ci_subparsers = self.get_command_subparsers(parser, 'ci')
+                tweak = ci_subparsers.add_parser('tweak')
+                tweak.set_defaults(callback=lambda context: None)
+
+        class CiUrlGetter(BaseCiUrlGetter):
+            def get_url(self, context, branch):
+                return "https://ci.example.com"
+    '''
+    entry_points = '''
+        [cogite.plugins.commands]
+        CiTweakCommand = cogite_test_plugin:CiTweakCommand
+
+        [cogite.plugins.ci_url_getter]
+        CiUrlGetter = cogite_test_plugin:CiUrlGetter
+    '''
+    return _install_distribution(site_packages, "cogite_test_plugin", source, entry_points)
+
+
+def test_get_ci_url_getters(installed_plugin):
+    results = plugins.get_ci_url_getters()
+    assert [getter.__name__ for getter in results] == ["CiUrlGetter"]
+
+
+def test_get_extra_commands(installed_plugin):
+    results = plugins.get_extra_commands()
+    assert [command.__name__ for command in results] == ["CiTweakCommand"]
+
+
+@pytest.mark.parametrize(
+    "command_words, expected",
+    (
+        ([], ["CiTweakCommand"]),  # e.g. `cogite --help`
+        (["ci"], ["CiTweakCommand"]),
+        (["ci", "tweak"], ["CiTweakCommand"]),
+        (["ci", "browse", "my-branch"], []),
+        (["pr", "add"], []),
+    ),
+)
+def test_get_extra_commands_for_command(installed_plugin, command_words, expected):
+    results = plugins.get_extra_commands(command_words, cli.get_parser)
+    assert [command.__name__ for command in results] == expected
+
+
+def test_index_is_cached(installed_plugin):
+    with mock.patch("cogite.plugins._build_index", wraps=plugins._build_index) as build_index:
+        plugins.get_extra_commands()
+        plugins.get_extra_commands()
+        assert build_index.call_count == 1
+
+        # Simulate an upgrade of the distribution.
+        stat = installed_plugin.stat()
+        os.utime(installed_plugin, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        plugins.get_extra_commands()
+        assert build_index.call_count == 2
+
 
+@pytest.mark.parametrize(
+    "command_words, expected",
+    (
+        ([], ["CiBrowseCallback"]),
+        (["ci", "browse", "my-branch"], ["CiBrowseCallback"]),
+        (["pr", "add"], []),
+    ),
+)
+def test_get_extra_commands_that_only_change_defaults(site_packages, command_words, expected):
+    source = '''
+        from cogite.plugins import BaseCommandPlugin
 
-def test_get_extra_commands():
-    # See comment in test above. Yes, it's ugly here, too.
-    with mock.patch("cogite.plugins.NAMESPACE_COMMANDS", "sphinx.html_themes"):
-        results = plugins.get_extra_commands()
-    assert "sphinx_rtd_theme" in {module.__name__ for module in results}
+        class CiBrowseCallback(BaseCommandPlugin):
+            def install(self, parser):
+                ci_subparsers = self.get_command_subparsers(parser, 'ci')
+                ci_subparsers.choices['browse'].set_defaults(callback=lambda context: None)
+    '''
+    entry_points = '''
+        [cogite.plugins.commands]
+        CiBrowseCallback = cogite_defaults_plugin:CiBrowseCallback
+    '''
+    _install_distribution(site_packages, "cogite_defaults_plugin", source, entry_points)
+    results = plugins.get_extra_commands(command_words, cli.get_parser)
+    assert [command.__name__ for command in results] == expected
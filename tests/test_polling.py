@@ -0,0 +1,81 @@
+import datetime
+
+from cogite import models
+from cogite import polling
+
+from . import base
+
+
+NOW = datetime.datetime(2021, 1, 1, 12, tzinfo=datetime.timezone.utc)
+
+
+def _status(*states, started_at=None, rate_limit=None):
+    checks = [
+        models.PullRequestCheck(
+            name=f"check-{i}", state=state, url=f"https://example.com/{i}", started_at=started_at,
+        )
+        for i, state in enumerate(states)
+    ]
+    return models.PullRequestStatus(sha="sha", checks=checks, rate_limit=rate_limit)
+
+
+def _scheduler(history=None):
+    return polling.PollScheduler(
+        min_interval=10,
+        max_interval=120,
+        budget_share=0.1,
+        history=history,
+        clock=NOW.timestamp,
+    )
+
+
+def test_backoff():
+    scheduler = _scheduler()
+    status = _status(models.CommitState.PENDING)
+    intervals = [scheduler.get_next_interval(status) for _ in range(6)]
+    assert intervals == [10, 20, 40, 80, 120, 120]
+    # A change resets the interval.
+    assert scheduler.get_next_interval(_status(models.CommitState.SUCCESS)) == 10
+
+
+def test_rate_limit_budget():
+    scheduler = _scheduler()
+    rate_limit = models.RateLimit(cost=2, remaining=1000, reset_at=NOW + datetime.timedelta(hours=1))
+    # We may spend 10% of 1000 points, i.e. 50 requests in one hour.
+    assert scheduler.get_next_interval(_status(rate_limit=rate_limit)) == 3600 / 50
+
+    rate_limit = models.RateLimit(cost=2, remaining=10, reset_at=NOW + datetime.timedelta(minutes=5))
+    # Not even a single request: wait until the reset.
+    assert scheduler.get_next_interval(_status(rate_limit=rate_limit)) == 300
+
+    # Unknown reset time: assume a window of one hour.
+    rate_limit = models.RateLimit(cost=2, remaining=1000, reset_at=None)
+    assert scheduler.get_next_interval(_status(rate_limit=rate_limit)) == 3600 / 50
+
+
+@base.disable_disk_cache
+def test_expected_completion():
+    history = polling.CheckHistory("git@github.com:Polyconseil/cogite.git")
+    done = _status(models.CommitState.SUCCESS)
+    for i, minutes in enumerate((4, 5, 6)):
+        check = done.checks[0]
+        check.url = f"https://example.com/run/{i}"
+        check.started_at = NOW - datetime.timedelta(hours=1)
+        check.completed_at = check.started_at + datetime.timedelta(minutes=minutes)
+        history.record(done.checks)
+        history.record(done.checks)  # recorded only once
+    assert history.get_expected_duration("check-0") == 300
+    assert history.changed
+
+    scheduler = _scheduler(history)
+    # The check started 4m30s ago, and usually takes 5 minutes.
+    status = _status(models.CommitState.PENDING, started_at=NOW - datetime.timedelta(seconds=270))
+    assert scheduler.get_next_interval(status) == 10
+    assert scheduler.get_next_interval(status) == 20
+    # The check is expected to complete in 30 seconds (+ margin).
+    assert scheduler.get_next_interval(status) == 30 + polling.EXPECTED_COMPLETION_MARGIN
+
+    # The check is late: back off as usual.
+    status = _status(models.CommitState.PENDING, started_at=NOW - datetime.timedelta(minutes=10))
+    assert scheduler.get_next_interval(status) == 64
+    assert scheduler.get_next_interval(status) == 120
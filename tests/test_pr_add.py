@@ -0,0 +1,64 @@
+import subprocess
+import sys
+import textwrap
+import time
+from unittest import mock
+
+import pytest
+
+from cogite import config
+from cogite import errors
+from cogite.commands import pr_add
+
+
+# Collaborators are very slow to fetch, and the user declines to
+# create the pull request.
+DECLINE_SCRIPT = textwrap.dedent('''
+    import time
+    from unittest import mock
+
+    from cogite import config
+    from cogite.commands import pr_add
+
+    class SlowClient:
+        supports_collaborators_search = False
+
+        @property
+        def repository(self):
+            time.sleep(60)
+
+        def get_collaborators(self, refresh=False):
+            time.sleep(60)
+
+    ctx = mock.Mock(branch="feature", configuration=config.Configuration(), client=SlowClient())
+    with mock.patch.multiple(
+        "cogite.commands.pr_add",
+        _git_push_to_origin=lambda branch: None,
+        _get_pull_request_template=lambda: None,
+    ), mock.patch("cogite.git.get_commits_logs", lambda *args, **kwargs: ["Add feature"]), \\
+            mock.patch("cogite.interaction.confirm", lambda *args, **kwargs: False):
+        pr_add.add_pull_request(ctx, base_branch="main")
+''')
+
+
+def test_exit_without_waiting_for_background_requests():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", DECLINE_SCRIPT],
+        stdout=subprocess.DEVNULL,
+        check=True,
+        timeout=30,
+    )
+    assert time.perf_counter() - start < 10
+
+
+def test_do_not_fetch_collaborators_if_push_fails():
+    client = mock.Mock(supports_collaborators_search=False)
+    ctx = mock.Mock(branch="feature", configuration=config.Configuration(), client=client)
+    with mock.patch(
+        "cogite.commands.pr_add._git_push_to_origin",
+        side_effect=errors.FatalError("Could not push local branch to upstream."),
+    ):
+        with pytest.raises(errors.FatalError):
+            pr_add.add_pull_request(ctx, base_branch="main")
+    assert not client.get_collaborators.called
@@ -0,0 +1,88 @@
+import subprocess
+import time
+from unittest import mock
+
+from cogite.checks import pre_merge
+
+from .base import run_git
+
+
+def _commit(message):
+    run_git('commit', '--quiet', '--allow-empty', '--message', message)
+    return run_git('rev-parse', 'HEAD')
+
+
+def _analyze(revisions, keywords=pre_merge.SQUASHABLE_KEYWORDS, patterns=()):
+    regexp = pre_merge.get_squashable_regexp(keywords, patterns)
+    return pre_merge.analyze_commits(revisions, regexp, display_n_commits=2)
+
+
+def test_analyze_commits(repository):
+    base = run_git('rev-parse', 'HEAD')
+    first = _commit('Add feature')
+    second = _commit('WIP: tests')
+    third = _commit('Fix typo\n\nfixup! Add feature')
+    report = _analyze([f'{base}..HEAD'])
+    assert report.n_commits == 3
+    assert report.commits == [(third, 'Fix typo'), (second, 'WIP: tests')]
+    assert report.squashable_commits == [(third, 'Fix typo'), (second, 'WIP: tests')]
+
+    report = _analyze([f'{base}..HEAD'], keywords=(), patterns=[r'^add '])
+    assert report.squashable_commits == [(first, 'Add feature')]
+
+    report = _analyze([f'{base}..HEAD'], keywords=(), patterns=())
+    assert report.squashable_commits == []
+
+
+def test_check_commits(repository):
+    base = run_git('rev-parse', 'HEAD')
+    _commit('Add feature')
+    head = _commit('wip')
+    with mock.patch('cogite.interaction.confirm', return_value=False) as confirm:
+        with mock.patch('cogite.interaction.display') as display:
+            assert not pre_merge.check_commits(head, 'refs/heads/main', base, max_commits=3)
+    confirm.assert_called_once()
+    displayed = '\n'.join(call.args[0] for call in display.call_args_list)
+    assert f'{head[:7]} wip' in displayed
+    assert 'Add feature' not in displayed
+
+    with mock.patch('cogite.interaction.confirm') as confirm:
+        assert pre_merge.check_commits(head, 'refs/heads/main', base, squashable_keywords=())
+    # Only for the number of commits.
+    confirm.assert_called_once()
+
+
+def test_check_commits_new_remote_branch(repository):
+    run_git('update-ref', 'refs/remotes/origin/main', 'HEAD')
+    head = _commit('Add feature')
+    with mock.patch('cogite.interaction.confirm', return_value=False) as confirm:
+        assert pre_merge.check_commits(head, 'refs/heads/main', '0' * 40)
+    confirm.assert_not_called()
+
+
+def test_many_commits(repository):
+    # Create commits with `git fast-import`, which is much faster
+    # than calling `git commit` 10000 times.
+    n_commits = 10000
+    lines = []
+    for i in range(n_commits):
+        message = f'Commit {i}' if i != 1234 else 'fixup! Commit 1233'
+        lines += [
+            'commit refs/heads/main',
+            f'committer Jane Doe <jdoe@example.com> {1600000000 + i} +0000',
+            f'data {len(message)}',
+            message,
+        ]
+        if i == 0:
+            lines.append('from HEAD^0')
+    subprocess.run(
+        ['git', 'fast-import', '--quiet', '--force'],
+        input='\n'.join(lines).encode() + b'\n',
+        check=True,
+    )
+    start = time.perf_counter()
+    report = _analyze(['HEAD~10000..HEAD'])
+    elapsed = time.perf_counter() - start
+    assert report.n_commits == n_commits
+    assert [subject for _sha, subject in report.squashable_commits] == ['fixup! Commit 1233']
+    assert elapsed < 1
@@ -0,0 +1,162 @@
+import contextlib
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from cogite import errors
+from cogite import requests
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # enable keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.client_ports.append(self.client_address[1])
+        if self.server.drop_requests:
+            # Close the connection without responding, as if it had
+            # been closed while the request was in flight.
+            self.server.drop_requests -= 1
+            self.close_connection = True
+            return
+        status = 404 if self.path == "/not-found" else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.server.close_after_response:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def run_server(close_after_response=False):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.client_ports = []
+    server.close_after_response = close_after_response
+    server.drop_requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_session_reuses_connection():
+    with run_server() as (server, url):
+        session = requests.Session(auth_token="token")
+        for _ in range(3):
+            response = session.post(f"{url}/graphql", json={"query": "{}"})
+            assert response.data == {"ok": True}
+        session.close()
+    assert len(server.client_ports) == 3
+    assert len(set(server.client_ports)) == 1
+
+
+def test_session_reconnects_after_server_closed_connection():
+    with run_server(close_after_response=True) as (server, url):
+        session = requests.Session(auth_token="token")
+        for _ in range(2):
+            response = session.post(f"{url}/graphql", json={"query": "{}"})
+            assert response.data == {"ok": True}
+        session.close()
+    assert len(set(server.client_ports)) == 2
+
+
+@pytest.mark.parametrize(
+    "query, retried",
+    (
+        ("query pullRequest { id }", True),
+        ("{ id }", True),
+        ("mutation createPullRequest { id }", False),
+    ),
+)
+def test_session_retries_only_queries_after_connection_loss(query, retried):
+    with run_server() as (server, url):
+        session = requests.Session(auth_token="token")
+        session.post(f"{url}/graphql", json={"query": query})
+        server.drop_requests = 1
+        if retried:
+            response = session.post(f"{url}/graphql", json={"query": query})
+            assert response.data == {"ok": True}
+        else:
+            with pytest.raises(errors.FatalError):
+                session.post(f"{url}/graphql", json={"query": query})
+        session.close()
+    # The first request, the dropped one and, if any, the retry
+    assert len(server.client_ports) == (3 if retried else 2)
+
+
+def test_session_raises_on_http_error():
+    with run_server() as (_server, url):
+        session = requests.Session(auth_token="token")
+        with pytest.raises(errors.FatalError, match="Got non-OK status code 404"):
+            session.post(f"{url}/not-found", json={"query": "{}"})
+        session.close()
+
+
+@pytest.fixture(name="cassette")
+def fixture_cassette(monkeypatch, tmp_path):
+    path = tmp_path / "cassette.jsonl"
+
+    def use_cassette(mode):
+        monkeypatch.setenv(requests.CASSETTE_ENV_VAR, f"{mode}:{path}")
+        monkeypatch.setattr(requests, "_cassette", None)
+
+    yield use_cassette
+
+
+def test_cassette_record_and_replay(cassette):
+    cassette("record")
+    with run_server() as (server, url):
+        session = requests.Session(auth_token="token")
+        session.post(f"{url}/graphql", json={"query": "{}"})
+        with pytest.raises(errors.FatalError, match="Got non-OK status code 404"):
+            session.post(f"{url}/not-found", json={"query": "{}"})
+        session.close()
+    assert len(server.client_ports) == 2
+
+    # The server is not running anymore.
+    cassette("replay-fast")
+    session = requests.Session(auth_token="token")
+    for _ in range(2):  # the last response is repeated
+        response = session.post(f"{url}/graphql", json={"query": "{}"})
+        assert response.data == {"ok": True}
+    with pytest.raises(errors.FatalError, match="Got non-OK status code 404"):
+        session.post(f"{url}/not-found", json={"query": "{}"})
+    with pytest.raises(errors.FatalError, match="No recorded response"):
+        session.post(f"{url}/graphql", json={"query": "{other}"})
+
+
+def test_cassette_replay_with_recorded_timing(cassette, tmp_path):
+    recording = {
+        "method": "GET",
+        "url": "https://example.com/",
+        "body": "",
+        "status": 200,
+        "reason": "OK",
+        "headers": [["Content-Type", "text/plain"]],
+        "content": "Hello",
+        "duration": 0.2,
+    }
+    (tmp_path / "cassette.jsonl").write_text(json.dumps(recording) + "\n")
+    cassette("replay")
+    session = requests.Session(auth_token="token")
+    start = time.perf_counter()
+    assert session.get("https://example.com/").content == "Hello"
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_cassette_invalid_mode(cassette):
+    cassette("rewind")
+    with pytest.raises(errors.FatalError, match="Invalid value for COGITE_CASSETTE"):
+        requests.get_cassette()
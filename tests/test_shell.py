@@ -1,6 +1,11 @@
 import os
+import sys
+import textwrap
 from unittest import mock
 
+import pytest
+
+from cogite import errors
 from cogite import shell
 
 
@@ -23,3 +28,74 @@ class TestGetLines:
     def test_handle_carriage_return(self):
         input_ = "line 1\r\nthis will not appear\rline 2\r\n".encode("utf-8")
         assert shell.get_lines(input_) == ["line 1", "line 2"]
+
+
+class TestRunStreaming:
+
+    def _write_script(self, tmp_path, source):
+        path = tmp_path / 'script.py'
+        path.write_text(textwrap.dedent(source))
+        return f'{sys.executable} {path}'
+
+    def test_interleaving(self, tmp_path):
+        command = self._write_script(tmp_path, """
+            import sys
+            import time
+            for i in range(3):
+                print(f'out {i}', flush=True)
+                time.sleep(0.05)  # let the test read each line
+                print(f'err {i}', file=sys.stderr, flush=True)
+                time.sleep(0.05)
+            sys.exit(3)
+        """)
+        with pytest.raises(errors.FatalError) as exc_info:
+            shell.run_streaming(command)
+        assert 'out 0\nerr 0\nout 1\nerr 1\nout 2\nerr 2' in str(exc_info.value).replace(os.linesep, '\n')
+
+        result = shell.run_streaming(command, expected_returncodes=(3,))
+        assert result.stdout == ['out 0', 'out 1', 'out 2']
+        assert result.stderr == ['err 0', 'err 1', 'err 2']
+
+    def test_ring_buffer(self, tmp_path):
+        command = self._write_script(tmp_path, """
+            for i in range(1000):
+                print(f'line {i}')
+        """)
+        result = shell.run_streaming(command, max_lines=2)
+        assert result.stdout == ['line 998', 'line 999']
+        assert result.output == ['line 998', 'line 999']
+
+    def test_carriage_return(self, tmp_path):
+        command = self._write_script(tmp_path, """
+            import sys
+            for i in range(3):
+                sys.stderr.write(f'progress {i}\\r')
+                sys.stderr.flush()
+            sys.stderr.write('done\\r\\n')
+        """)
+        result = shell.run_streaming(command)
+        assert result.stderr == ['done']
+
+    def test_iter_output(self, tmp_path):
+        command = self._write_script(tmp_path, """
+            import sys
+            sys.stderr.write('progress\\r')
+            sys.stderr.flush()
+            sys.stdin.read()  # wait for the test to read the progress
+            print('done')
+        """)
+        with shell.subprocess.Popen(
+            command.split(' '),
+            stdin=shell.subprocess.PIPE,
+            stdout=shell.subprocess.PIPE,
+            stderr=shell.subprocess.PIPE,
+        ) as process:
+            lines = shell.iter_output(process)
+            assert next(lines) == shell.OutputLine('stderr', 'progress', transient=True)
+            process.stdin.close()
+            # Like `get_lines()`, keep the last line even if it ends
+            # with a carriage return.
+            remaining = list(lines)
+        assert len(remaining) == 2
+        assert shell.OutputLine('stderr', 'progress') in remaining
+        assert shell.OutputLine('stdout', 'done') in remaining
@@ -0,0 +1,204 @@
+"""Check the startup time of each command.
+
+Each command is imported in a fresh interpreter (as when running
+`cogite <command>`) with `python -X importtime`. We check that it does
+not import slow modules that it does not need, and that it does not
+regress compared to the baseline that is recorded in
+`tests/data/startup_baseline.json`:
+
+- the number of cogite modules that it imports;
+- its import time, relative to the import time of a fixed set of
+  standard modules (so that the baseline does not depend on how fast
+  the machine is).
+
+After an intended change, record a new baseline with::
+
+    $ python -m tests.test_startup
+
+Import times do not account for what happens after imports. The wall
+time of `cogite --help` is hence checked, too.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from . import base
+
+
+# Modules that are slow to import and that most commands do not need.
+SLOW_MODULES = {
+    "curses",
+    "importlib.metadata",
+    "prompt_toolkit",
+    "toml",
+    "webbrowser",
+    "yaspin",
+}
+
+# For each command: the module that implements it and the slow
+# modules that it is allowed to import.
+COMMANDS = {
+    "--version": (None, {"importlib.metadata"}),
+    "auth add": ("auth", set()),
+    "auth delete": ("auth", set()),
+    "ci browse": ("ci_browse", {"webbrowser"}),
+    "hook install": ("hook", set()),
+    "hook uninstall": ("hook", set()),
+    "pr add": ("pr_add", set()),
+    "pr browse": ("pr_browse", {"webbrowser"}),
+    "pr merge": ("pr_merge", set()),
+    "pr ready": ("pr_edit", set()),
+    "pr rebase": ("pr_rebase", set()),
+    "pr reqreview": ("pr_reviews", set()),
+    "status": ("status", {"curses"}),
+}
+
+BASELINE_PATH = base.TEST_DATA_PATH / "startup_baseline.json"
+# Import times are compared to the import time of these modules, that
+# most commands need anyway.
+REFERENCE_CODE = "import argparse, dataclasses, http.client, json, sqlite3, subprocess, urllib.request"
+# A command regresses if its relative import time or the number of
+# cogite modules that it imports is more than 50% above the baseline.
+# This is generous (to avoid failures on busy machines), yet enough to
+# catch an eagerly imported heavy dependency.
+REGRESSION_MARGIN = 0.5
+# `cogite --help` builds the parser of all commands, with plugins. It
+# must not take more than this multiple of the time that it takes to
+# start an interpreter and import the reference modules. This is
+# generous, yet enough to catch a slow side effect (e.g. a network
+# request) at startup.
+MAX_RELATIVE_HELP_TIME = 2
+
+
+def _get_import_code(module):
+    if module.startswith("checks."):
+        return f"import cogite.{module}"
+    return f"import cogite.cli; import cogite.commands.{module}"
+
+
+def _import(code):
+    """Run ``code`` in a fresh interpreter. Return the names of the
+    imported modules, and the total import time (in microseconds).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    # Lines look like: "import time: self [us] | cumulative | imported package",
+    # where the name of the package is indented if it is imported by
+    # another package.
+    imported = set()
+    total = 0
+    for line in result.stderr.decode("utf-8").splitlines()[1:]:
+        _self, cumulative, name = line.split("|")
+        imported.add(name.strip())
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return imported, total
+
+
+def _get_relative_import_time(code, n_runs=5):
+    """Return the import time of ``code`` relative to the import time
+    of the reference modules.
+
+    Runs are interleaved, so that a machine that is temporarily busy
+    slows down both alike.
+    """
+    reference, measured = [], []
+    for _ in range(n_runs):
+        reference.append(_import(REFERENCE_CODE)[1])
+        measured.append(_import(code)[1])
+    return min(measured) / min(reference)
+
+
+def _get_wall_time(args, env):
+    start = time.perf_counter()
+    subprocess.run(args, stdout=subprocess.DEVNULL, env=env, check=True)
+    return time.perf_counter() - start
+
+
+def _measure(module):
+    code = _get_import_code(module)
+    imported, _total = _import(code)
+    return {
+        "cogite_modules": sum(1 for name in imported if name.split(".")[0] == "cogite"),
+        "relative_import_time": round(_get_relative_import_time(code), 2),
+    }
+
+
+def _get_measured_modules():
+    modules = {module for module, _allowed in COMMANDS.values() if module is not None}
+    return sorted(modules | {"checks.pre_push"})
+
+
+def record_baseline():
+    baseline = {module: _measure(module) for module in _get_measured_modules()}
+    with BASELINE_PATH.open("w", encoding="utf-8") as fp:
+        json.dump(baseline, fp, indent=2, sort_keys=True)
+        fp.write("\n")
+
+
+@pytest.mark.parametrize("command", sorted(COMMANDS))
+def test_command_does_not_import_slow_modules(command):
+    module, allowed = COMMANDS[command]
+    imported, _total = _import(_get_import_code(module) if module else "import cogite.cli")
+    unexpected = (SLOW_MODULES - allowed) & imported
+    assert not unexpected, f"`cogite {command}` imports {unexpected}"
+
+
+def test_graphql_documents_are_not_read_on_import():
+    code = (
+        "import cogite.backends.github as github; "
+        "assert github.get_graphql.cache_info().currsize == 0"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.parametrize("module", _get_measured_modules())
+def test_no_startup_regression(module):
+    with BASELINE_PATH.open(encoding="utf-8") as fp:
+        expected = json.load(fp)[module]
+    measured = _measure(module)
+    for key, value in measured.items():
+        assert value <= expected[key] * (1 + REGRESSION_MARGIN), (
+            f"{key} of {module} has regressed: {value} (baseline: {expected[key]}). "
+            f"If this is expected, record a new baseline with `python -m tests.test_startup`."
+        )
+
+
+def test_help_wall_time(tmp_path):
+    # Use an empty cache. It is filled by the first run, like it would
+    # be for a user.
+    env = {**os.environ, "XDG_CACHE_HOME": str(tmp_path / "cache")}
+    reference, measured = [], []
+    # Runs are interleaved, like in `_get_relative_import_time()`.
+    for _ in range(5):
+        reference.append(_get_wall_time([sys.executable, "-c", REFERENCE_CODE], env))
+        measured.append(_get_wall_time([sys.executable, "-m", "cogite.cli", "--help"], env))
+    relative = min(measured) / min(reference)
+    assert relative <= MAX_RELATIVE_HELP_TIME, (
+        f"`cogite --help` took {min(measured):.3f}s, {relative:.1f} times as long "
+        f"as importing the reference modules ({min(reference):.3f}s)."
+    )
+
+
+def test_pre_push_hook_imports_only_the_checker():
+    imported, _total = _import(_get_import_code("checks.pre_push"))
+    unexpected = {
+        module for module in imported
+        if module in SLOW_MODULES
+        or module.startswith(("cogite.backends", "cogite.commands"))
+        or module in {"cogite.api", "cogite.cli", "cogite.config", "cogite.context"}
+    }
+    assert not unexpected, f"The pre-push hook imports {unexpected}"
+
+
+if __name__ == "__main__":
+    record_baseline()
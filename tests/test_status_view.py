@@ -0,0 +1,94 @@
+import curses
+
+import pytest
+
+from cogite import status_view
+
+from . import base
+
+
+pytestmark = pytest.mark.usefixtures("fake_curses")
+
+
+def _lines(n, prefix="check"):
+    return [status_view.Line(f"[[green]]✔[[/]] {prefix}-{i}", curses.COLOR_GREEN) for i in range(n)]
+
+
+def test_render_only_visible_lines():
+    screen = base.FakeScreen(height=10, width=40)
+    view = status_view.StatusView(screen)
+    view.set_content("Waiting for checks...", _lines(500))
+    view.render()
+    assert screen.rows[0] == "Waiting for checks..."
+    assert screen.rows[2:9] == [f"✔ check-{i}" for i in range(7)]
+    assert screen.rows[9].startswith("1-7 of 500")
+    assert len(screen.painted) == 9  # header and rows, not the empty line
+
+
+def test_repaint_only_changed_rows():
+    screen = base.FakeScreen(height=10, width=40)
+    view = status_view.StatusView(screen)
+    lines = _lines(5)
+    view.set_content("Waiting for checks...", lines)
+    view.render()
+    screen.painted.clear()
+
+    lines[3] = status_view.Line("[[red]]✖[[/]] check-3", curses.COLOR_RED)
+    view.set_content("Waiting for checks...", lines)
+    view.render()
+    assert screen.painted == [5]
+    assert screen.rows[5] == "✖ check-3"
+
+    # Nothing changed: nothing is painted.
+    screen.painted.clear()
+    view.render()
+    assert not screen.painted
+
+
+def test_scroll():
+    screen = base.FakeScreen(height=10, width=40)
+    view = status_view.StatusView(screen)
+    view.set_content("Waiting for checks...", _lines(20))
+    view.render()
+    assert view.handle_key(curses.KEY_NPAGE)
+    assert screen.rows[2] == "✔ check-7"
+    assert view.handle_key(curses.KEY_END)
+    assert screen.rows[8] == "✔ check-19"
+    assert screen.rows[9].startswith("14-20 of 20")
+    view.handle_key(curses.KEY_DOWN)  # cannot scroll past the end
+    assert view.offset == 13
+    assert view.handle_key(curses.KEY_HOME)
+    assert view.offset == 0
+    assert not view.handle_key(ord("x"))
+
+
+def test_resize_and_long_lines():
+    screen = base.FakeScreen(height=5, width=10)
+    view = status_view.StatusView(screen)
+    view.set_content("Waiting for checks...", [], empty_text="No check yet.")
+    view.render()
+    assert screen.rows[:3] == ["Waiting f", "", "No check "]
+
+    screen.height, screen.width = 8, 30
+    screen.rows = [""] * 8
+    view.handle_key(curses.KEY_RESIZE)
+    assert screen.rows[:3] == ["Waiting for checks...", "", "No check yet."]
+
+
+def test_rich_text_is_interpreted_once(monkeypatch):
+    calls = []
+    interpret = status_view.interaction.interpret_rich_text
+    monkeypatch.setattr(
+        status_view.interaction,
+        "interpret_rich_text",
+        lambda text, context: calls.append(text) or interpret(text, context),
+    )
+    screen = base.FakeScreen(height=10, width=40)
+    view = status_view.StatusView(screen)
+    view.set_content("Waiting for checks...", _lines(3))
+    view.render()
+    view.scroll(0)
+    screen.rows = [""] * 10
+    view._size = (0, 0)  # force a full repaint
+    view.render()
+    assert len(calls) == 3
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import pathlib
+import subprocess
+import sys
+import textwrap
+import time
+import webbrowser
+
+import pytest
+
+from cogite import models
+from cogite import polling
+from cogite import status_view
+from cogite import status_watcher
+
+from . import base
+
+
+pytestmark = pytest.mark.usefixtures("fake_curses")
+
+
+def _status(state):
+    check = models.PullRequestCheck(name="tests", state=state, url="https://ci.example.com/1")
+    return models.PullRequestStatus(sha="sha", checks=[check])
+
+
+class FakeClient:
+    def __init__(self, *statuses, latency=0):
+        self.statuses = list(statuses)
+        self.latency = latency
+        self.n_calls = 0
+
+    def get_pull_request_status(self, previous=None):  # pylint: disable=unused-argument
+        self.n_calls += 1
+        time.sleep(self.latency)
+        return self.statuses.pop(0)
+
+
+def _get_lines(status):
+    return [status_view.Line(f"{check.state.name} {check.name}") for check in status.checks]
+
+
+def _make_watcher(client, status, interval=60, input_fd=None):
+    scheduler = polling.PollScheduler(min_interval=interval, max_interval=interval, budget_share=0.1)
+    view = status_view.StatusView(base.FakeScreen(height=10, width=80))
+    return status_watcher.StatusWatcher(client, status, scheduler, view, _get_lines, input_fd=input_fd)
+
+
+async def _run_and_press(watcher, *keys, delay=0.05):
+    async def press():
+        for key in keys:
+            await asyncio.sleep(delay)
+            watcher.handle_key(ord(key))
+    task = asyncio.ensure_future(press())
+    status = await asyncio.wait_for(watcher.run(), timeout=5)
+    await task
+    return status
+
+
+def test_stop_when_checks_are_complete():
+    client = FakeClient(_status(models.CommitState.SUCCESS))
+    watcher = _make_watcher(client, _status(models.CommitState.PENDING), interval=0.01)
+    status = asyncio.run(watcher.run())
+    assert status.checks[0].state == models.CommitState.SUCCESS
+    assert client.n_calls == 1
+    assert watcher.view.screen.rows[2] == "SUCCESS tests"
+
+
+def test_refresh_on_key():
+    client = FakeClient(_status(models.CommitState.SUCCESS))
+    watcher = _make_watcher(client, _status(models.CommitState.PENDING), interval=60)
+    start = time.monotonic()
+    status = asyncio.run(_run_and_press(watcher, 'r'))
+    assert time.monotonic() - start < 1
+    assert status.checks[0].state == models.CommitState.SUCCESS
+
+
+def test_quit_while_fetching():
+    client = FakeClient(_status(models.CommitState.SUCCESS), latency=1)
+    watcher = _make_watcher(client, _status(models.CommitState.PENDING), interval=0)
+    start = time.monotonic()
+    status = asyncio.run(_run_and_press(watcher, 'q'))
+    assert time.monotonic() - start < 0.5
+    # The status that was being fetched is ignored.
+    assert status.checks[0].state == models.CommitState.PENDING
+
+
+# The user quits while a very slow request is in progress.
+QUIT_WHILE_FETCHING_SCRIPT = textwrap.dedent('''
+    import asyncio
+    import curses
+    import time
+
+    from cogite import models
+    from cogite import polling
+    from cogite import status_view
+    from cogite import status_watcher
+    from tests import base
+
+    class SlowClient:
+        def get_pull_request_status(self, previous=None):
+            time.sleep(60)
+
+    curses.color_pair = lambda color: 0
+    curses.doupdate = lambda: None
+    status = models.PullRequestStatus(sha="sha")
+    scheduler = polling.PollScheduler(min_interval=0, max_interval=0, budget_share=0.1)
+    view = status_view.StatusView(base.FakeScreen(height=10, width=80))
+    watcher = status_watcher.StatusWatcher(SlowClient(), status, scheduler, view, lambda status: [])
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.1, watcher.handle_key, ord("q"))
+        await watcher.run()
+
+    asyncio.run(main())
+''')
+
+
+def test_exit_without_waiting_for_request():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", QUIT_WHILE_FETCHING_SCRIPT],
+        cwd=pathlib.Path(__file__).parent.parent,
+        check=True,
+        timeout=30,
+    )
+    assert time.perf_counter() - start < 10
+
+
+def test_header_shows_countdown():
+    watcher = _make_watcher(FakeClient(), _status(models.CommitState.PENDING), interval=60)
+    asyncio.run(_run_and_press(watcher, 'q'))
+    assert watcher.view.screen.rows[0].startswith("Waiting for checks (refresh in 60s).")
+
+
+def test_open_failing_check(monkeypatch):
+    opened = []
+    monkeypatch.setattr(webbrowser, "open", opened.append)
+    watcher = _make_watcher(FakeClient(), _status(models.CommitState.FAILURE))
+    watcher.status = models.PullRequestStatus(
+        sha="sha",
+        checks=[
+            models.PullRequestCheck(name="lint", state=models.CommitState.SUCCESS, url="https://ci.example.com/1"),
+            models.PullRequestCheck(name="tests", state=models.CommitState.FAILURE, url="https://ci.example.com/2"),
+        ],
+    )
+
+    async def open_and_wait():
+        watcher._loop = asyncio.get_running_loop()  # pylint: disable=protected-access
+        watcher.handle_key(ord('o'))
+        await asyncio.sleep(0.1)
+
+    asyncio.run(open_and_wait())
+    assert opened == ["https://ci.example.com/2"]
+
+
+def test_read_keys_from_input():
+    read_fd, write_fd = os.pipe()
+    client = FakeClient()
+    watcher = _make_watcher(client, _status(models.CommitState.PENDING), input_fd=read_fd)
+    screen = watcher.view.screen
+
+    def getch():
+        try:
+            return os.read(read_fd, 1)[0]
+        except BlockingIOError:
+            return -1
+
+    os.set_blocking(read_fd, False)
+    screen.nodelay = lambda flag: None
+    screen.getch = getch
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.05, os.write, write_fd, b"q")
+        return await asyncio.wait_for(watcher.run(), timeout=5)
+
+    try:
+        asyncio.run(run())
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+    assert client.n_calls == 0
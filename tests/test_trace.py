@@ -0,0 +1,74 @@
+import json
+import time
+from unittest import mock
+
+import pytest
+
+from cogite import cli
+from cogite import requests
+from cogite import trace
+
+
+@pytest.fixture(name="tracer")
+def fixture_tracer(tmp_path):
+    yield trace.start(str(tmp_path / "trace.json"))
+    trace.stop()
+
+
+def test_disabled():
+    assert not trace.is_enabled()
+    with trace.span("name", trace.CATEGORY_SHELL) as span:
+        assert span is None
+
+
+def test_spans(tracer):
+
+    @trace.traced(trace.CATEGORY_INTERACTION)
+    def ask():
+        time.sleep(0.05)
+
+    with trace.span("git status", trace.CATEGORY_SHELL):
+        pass
+    ask()
+
+    assert [(span.name, span.category) for span in tracer.spans] == [
+        ("git status", trace.CATEGORY_SHELL),
+        ("test_spans.<locals>.ask", trace.CATEGORY_INTERACTION),
+    ]
+    assert tracer.spans[1].duration >= 0.05
+    summary = tracer.get_summary()
+    assert "interaction" in summary
+    assert "git status" in summary.split("Slowest spans")[1]
+    assert "ask" not in summary.split("Slowest spans")[1]
+
+    tracer.report()
+    with open(tracer.path, encoding="utf-8") as fp:
+        events = json.load(fp)["traceEvents"]
+    assert [event["name"] for event in events] == ["git status", "test_spans.<locals>.ask"]
+    assert all(event["ph"] == "X" for event in events)
+    assert events[1]["dur"] >= 50_000  # microseconds
+
+
+def test_graphql_operation_name():
+    json_data = {"query": "query pullRequestStatus($id: ID!) { node(id: $id) { id } }"}
+    assert requests._get_span_name("POST", "https://api.github.com/graphql", json_data) == (
+        "POST https://api.github.com/graphql (pullRequestStatus)"
+    )
+    assert requests._get_span_name("GET", "https://example.com", None) == "GET https://example.com"
+
+
+@pytest.mark.parametrize(
+    "argv, enabled",
+    (
+        (["cogite", "--profile", "status"], True),
+        (["cogite", "status"], False),
+        # Like argparse, only accept `--profile` before the command.
+        (["cogite", "status", "--profile"], False),
+    ),
+)
+def test_profile_option(argv, enabled, monkeypatch):
+    monkeypatch.delenv(trace.TRACE_ENV_VAR, raising=False)
+    with mock.patch("sys.argv", argv):
+        tracer = cli._start_tracing()
+    trace.stop()
+    assert bool(tracer) == enabled